@@ -1,9 +1,11 @@
 import os
+import threading
 import django
+from django.conf import settings
 from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
 from django.core.asgi import get_asgi_application
 import games.routing  # твой роутер для WebSocket
+from games.middleware import TokenAuthMiddleware
 
 # Указываем Django, какой settings использовать
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
@@ -14,10 +16,17 @@ django.setup()
 # HTTP-приложение (обычный Django)
 django_asgi_app = get_asgi_application()
 
+if settings.RESPONSE_CACHE_WARM:
+    from core.response_cache import ResponseCache
+
+    # прогрев кэша ответов не должен задерживать старт
+    threading.Thread(target=ResponseCache.warm, name="response-cache-warm", daemon=True).start()
+
 # ASGI-приложение с поддержкой HTTP и WebSocket
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    "websocket": AuthMiddlewareStack(
+    # JWT на рукопожатии вместо сессий: без запросов в БД на каждое подключение
+    "websocket": TokenAuthMiddleware(
         URLRouter(
             games.routing.websocket_urlpatterns
         )
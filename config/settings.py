@@ -13,6 +13,7 @@ from datetime import timedelta
 from pathlib import Path
 import os
 import redis
+import redis.asyncio as aioredis
 
 
 
@@ -223,9 +224,74 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Ежесекундные timer_update для клиентов без поддержки дедлайна (timer_mode=ticks).
+# Когда все клиенты перейдут на timer_mode=deadline, можно выключить.
+PVP_TIMER_TICKS = os.getenv("PVP_TIMER_TICKS", "True").lower() == "true"
+
+# Сколько игроков помещается в одну PvP-комнату; заполненные комнаты уходят из лобби.
+PVP_ROOM_CAPACITY = int(os.getenv("PVP_ROOM_CAPACITY", 10))
+
+# Лимиты действий ws/pvp на пользователя (общие для всех вкладок и воркеров):
+# действие -> (burst, пополнение токенов в секунду)
+PVP_RATE_LIMITS = {
+    "auth": (int(os.getenv("PVP_RATE_AUTH_BURST", 5)), float(os.getenv("PVP_RATE_AUTH_REFILL", 0.2))),
+    "bet": (int(os.getenv("PVP_RATE_BET_BURST", 5)), float(os.getenv("PVP_RATE_BET_REFILL", 2))),
+    "bet_gift": (int(os.getenv("PVP_RATE_BET_GIFT_BURST", 3)), float(os.getenv("PVP_RATE_BET_GIFT_REFILL", 1))),
+    "sync": (int(os.getenv("PVP_RATE_SYNC_BURST", 5)), float(os.getenv("PVP_RATE_SYNC_REFILL", 1))),
+}
+
+# Токен для /metrics (Prometheus); без него эндпоинт закрыт
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Раунды, у которых дедлайн прошёл в одном тике таймера, рассчитываются одной транзакцией.
+PVP_BATCH_SETTLEMENT = os.getenv("PVP_BATCH_SETTLEMENT", "True").lower() == "true"
+
+# Ставки ws/pvp копятся по комнате столько миллисекунд и применяются пачкой (не больше PVP_BET_BATCH_MAX).
+# 0 — каждая ставка применяется сразу, как раньше.
+PVP_BET_BATCH_WINDOW_MS = int(os.getenv("PVP_BET_BATCH_WINDOW_MS", 20))
+PVP_BET_BATCH_MAX = int(os.getenv("PVP_BET_BATCH_MAX", 200))
+
+# Как часто таймер раундов рассылает сокетам online_count (только если число изменилось).
+PVP_ONLINE_PUSH_SECONDS = int(os.getenv("PVP_ONLINE_PUSH_SECONDS", 5))
+
+# Как часто таймер ищет живые комнаты с прошедшим дедлайном, которые так и не ушли на расчёт,
+# и сколько секунд после дедлайна даётся на обычный расчёт, прежде чем раунд вернут в очередь.
+PVP_SETTLE_SWEEP_SECONDS = int(os.getenv("PVP_SETTLE_SWEEP_SECONDS", 30))
+PVP_SETTLE_SWEEP_GRACE = int(os.getenv("PVP_SETTLE_SWEEP_GRACE", 60))
+
+# Кэш ответов публичных эндпоинтов (core/response_cache.py): сбрасывается событиями,
+# TTL — страховка на случай пропущенного события. Прогрев — при старте веб-процесса.
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 600))
+RESPONSE_CACHE_WARM = os.getenv("RESPONSE_CACHE_WARM", "True").lower() == "true"
+
+# Доменные события (core/events.py): outbox -> Redis Streams -> группы потребителей.
+OUTBOX_RELAY_BATCH = int(os.getenv("OUTBOX_RELAY_BATCH", 500))
+OUTBOX_RELAY_INTERVAL = float(os.getenv("OUTBOX_RELAY_INTERVAL", 0.2))
+EVENTS_STREAM_MAXLEN = int(os.getenv("EVENTS_STREAM_MAXLEN", 100000))
+EVENTS_READ_COUNT = int(os.getenv("EVENTS_READ_COUNT", 200))
+# через сколько перечитывать неподтверждённые события (и забирать их у упавших потребителей)
+EVENTS_RETRY_SECONDS = int(os.getenv("EVENTS_RETRY_SECONDS", 30))
+# после стольких доставок событие, которое обработчик так и не принял, уходит в events:dlq:{group}
+EVENTS_MAX_DELIVERIES = int(os.getenv("EVENTS_MAX_DELIVERIES", 5))
+
+# Холодный архив (games/services/archive.py): завершённые игры и спины старше N дней
+# уходят в gzip JSONL — на диск в GAME_ARCHIVE_ROOT или в приватный префикс S3.
+GAME_ARCHIVE_AFTER_DAYS = int(os.getenv("GAME_ARCHIVE_AFTER_DAYS", 30))
+GAME_ARCHIVE_BATCH = int(os.getenv("GAME_ARCHIVE_BATCH", 1000))
+GAME_ARCHIVE_ROOT = os.getenv("GAME_ARCHIVE_ROOT", os.path.join(BASE_DIR, "archive"))
+GAME_ARCHIVE_LOCATION = os.getenv("GAME_ARCHIVE_LOCATION", "archive")
+
 # Общий клиент Redis (можно импортировать где угодно)
 REDIS_CLIENT = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
 
+# Асинхронный клиент Redis для websocket-консьюмеров (свой пул соединений, без потоков)
+ASYNC_REDIS_CLIENT = aioredis.Redis(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    decode_responses=True,
+    max_connections=int(os.getenv("ASYNC_REDIS_MAX_CONNECTIONS", 200)),
+)
+
 
 # Брокер сообщений (Redis)
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/1")
@@ -267,6 +333,10 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'transactions.tasks.cleanup_old_transactions',
         'schedule': 86400.0,  # раз в день
     },
+    'archive-games': {
+        'task': 'games.tasks.archive_games_task',
+        'schedule': 86400.0,  # раз в день
+    },
     # 'process-daily-raffle': {
     #     'task': 'raffle.tasks.process_daily_raffle',
     #     'schedule': 60.0,  # раз в сутки
@@ -309,16 +379,86 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'games.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'games.consumers': {
             'handlers': ['console'],
             'level': 'INFO',
             'propagate': False,
         },
+        'games.send_queue': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'games.services.game': {
             'handlers': ['console'],
             'level': 'INFO',
             'propagate': False,
         },
+        'games.services.live_round': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'games.services.round_timer': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'games.services.admission': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'games.services.rate_limit': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'games.services.matchmaking': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'games.services.bet_batcher': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'games.services.presence': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'games.services.leaderboard': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.response_cache': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.events': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'games.services.archive': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'games.event_handlers': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'user.services': {
             'handlers': ['console'],
             'level': 'INFO',
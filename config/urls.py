@@ -17,6 +17,7 @@ urlpatterns = [
     path("Inventory/", include("gifts.urls")),
     path("api/transactions/", include("transactions.urls")),
     path("", include("raffle.urls")),
+    path("", include("core.urls")),
 
     # Схема и Swagger/Redoc
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
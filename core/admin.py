@@ -1,6 +1,6 @@
 # admin.py
 from django.contrib import admin
-from .models import Config
+from .models import Config, OutboxEvent
 
 
 @admin.register(Config)
@@ -12,3 +12,12 @@ class ConfigAdmin(admin.ModelAdmin):
     list_editable = ("value",)                       # прямо из списка можно менять value
     save_as = True                                   # "сохранить как новый"
     save_on_top = True                               # кнопки "сохранить" сверху тоже
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    # неопубликованные события: если список растёт — релей не запущен или не успевает
+    list_display = ("id", "event_type", "created_at")
+    list_filter = ("event_type",)
+    readonly_fields = ("event_type", "payload", "created_at")
+    ordering = ("id",)
@@ -13,3 +13,8 @@ ROLLS_WEIGHT_GAMMA = "rolls_weight_gamma"       # кривизна зависи
 
 # Блокированные сектора (список индексов)
 ROLLS_BLOCKED_SECTORS = "rolls_blocked_sectors"
+
+# Допуск ставок PvP (games/services/admission.py)
+PVP_MAX_INFLIGHT_BETS = "pvp_max_inflight_bets"          # ставок в обработке на процесс
+PVP_MAX_DB_LATENCY_MS = "pvp_max_db_latency_ms"          # порог средней задержки запросов к БД
+PVP_SHED_RETRY_AFTER_MS = "pvp_shed_retry_after_ms"      # через сколько клиенту повторить ставку
@@ -0,0 +1,9 @@
+from collections import Counter
+from core.events import subscribe, ROUND_SETTLED, SPIN_PLAYED, RAFFLE_FINISHED, DEPOSIT_RECEIVED
+from core.metrics import Metrics
+
+
+@subscribe("analytics", ROUND_SETTLED, SPIN_PLAYED, RAFFLE_FINISHED, DEPOSIT_RECEIVED)
+def count_events(events):
+    for event_type, count in Counter(event["type"] for event in events).items():
+        Metrics.inc("domain_events_total", count, type=event_type)
@@ -0,0 +1,236 @@
+import json
+import time
+import logging
+from collections import defaultdict
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from redis.exceptions import ResponseError
+
+
+r = settings.REDIS_CLIENT
+logger = logging.getLogger('core.events')
+
+# Типы доменных событий
+ROUND_SETTLED = "pvp.round_settled"      # рассчитан PvP-раунд (GameService.finish_game / finish_games)
+SPIN_PLAYED = "spin.played"              # сыгран спин (SpinService.play)
+RAFFLE_FINISHED = "raffle.finished"      # завершён розыгрыш (raffle.tasks.finalize_raffle)
+DEPOSIT_RECEIVED = "deposit.received"    # зачислен депозит (TONService.process_incoming_transaction)
+
+# один stream на тип: группа читает только те типы, на которые подписана
+STREAM_KEY = "events:{event_type}"
+# событие уже обработано группой — защита от повторной доставки (at-least-once)
+DONE_KEY = "events:done:{group}:{event_id}"
+DONE_TTL = 24 * 3600
+# события, которые группа не смогла обработать за EVENTS_MAX_DELIVERIES доставок
+DLQ_KEY = "events:dlq:{group}"
+
+
+def stream_key(event_type):
+    return STREAM_KEY.format(event_type=event_type)
+
+
+def to_payload(instance):
+    """Несохранённая строка модели -> dict для payload события (attname -> значение)."""
+    return {field.attname: field.value_from_object(instance) for field in instance._meta.concrete_fields}
+
+
+def from_payload(model, data):
+    """Обратно в экземпляр модели: значения из JSON приводятся полями (Decimal, datetime)."""
+    return model(**{name: model._meta.get_field(name).to_python(value) for name, value in data.items()})
+
+
+class Outbox:
+    """
+    Transactional outbox: события пишутся строкой OutboxEvent в транзакции вызывающего кода,
+    поэтому публикуются тогда и только тогда, когда закоммичено само изменение.
+    """
+
+    @staticmethod
+    def emit(event_type, payload):
+        Outbox.emit_many([(event_type, payload)])
+
+    @staticmethod
+    def emit_many(events):
+        """events — список (event_type, payload); один INSERT на любое число событий."""
+        from core.models import OutboxEvent
+
+        if events:
+            OutboxEvent.objects.bulk_create([
+                OutboxEvent(event_type=event_type, payload=payload) for event_type, payload in events
+            ])
+
+    @staticmethod
+    def relay(batch_size=500):
+        """
+        Публикует пачку событий в streams и удаляет их из outbox. Возвращает число событий.
+        Падение между XADD и коммитом даст повтор — группы отсеивают его по id события.
+        """
+        from core.models import OutboxEvent
+
+        with transaction.atomic():
+            events = list(OutboxEvent.objects.select_for_update(skip_locked=True).order_by("id")[:batch_size])
+            if not events:
+                return 0
+
+            pipe = r.pipeline(transaction=False)
+            for event in events:
+                pipe.xadd(
+                    stream_key(event.event_type),
+                    {
+                        "id": event.id,
+                        "type": event.event_type,
+                        "payload": json.dumps(event.payload, cls=DjangoJSONEncoder),
+                        "created_at": event.created_at.isoformat(),
+                    },
+                    maxlen=settings.EVENTS_STREAM_MAXLEN,
+                    approximate=True,
+                )
+            pipe.execute()
+            OutboxEvent.objects.filter(id__in=[event.id for event in events]).delete()
+        return len(events)
+
+
+# группа -> {тип события -> обработчик}
+_subscribers = defaultdict(dict)
+
+
+def subscribe(group, *event_types):
+    """
+    Регистрирует обработчик группы потребителей. Обработчик получает список событий одного типа
+    ({"id", "type", "payload", "created_at"}) и должен быть идемпотентным.
+    Модули с обработчиками — <app>/event_handlers.py, их подхватывает run_event_consumers.
+    """
+    def decorator(handler):
+        for event_type in event_types:
+            _subscribers[group][event_type] = handler
+        return handler
+    return decorator
+
+
+def groups():
+    return dict(_subscribers)
+
+
+class EventConsumer:
+    """
+    Потребитель одной группы: XREADGROUP по stream'ам своих типов, обработка пачкой, XACK.
+    Если пачка упала, события обрабатываются по одному: удачные подтверждаются,
+    упавшие остаются в pending и перечитываются раз в EVENTS_RETRY_SECONDS,
+    а после EVENTS_MAX_DELIVERIES доставок уходят в DLQ_KEY группы.
+    Сообщения упавшего потребителя забираются XAUTOCLAIM.
+    """
+
+    def __init__(self, group, name):
+        self.group = group
+        self.name = name
+        self.handlers = _subscribers[group]
+        self.streams = {stream_key(event_type): event_type for event_type in self.handlers}
+
+    def ensure_groups(self):
+        for stream in self.streams:
+            try:
+                r.xgroup_create(stream, self.group, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    def read(self, start, block=None):
+        return r.xreadgroup(
+            self.group, self.name, {stream: start for stream in self.streams},
+            count=settings.EVENTS_READ_COUNT, block=block,
+        ) or []
+
+    def claim_stale(self):
+        idle_ms = settings.EVENTS_RETRY_SECONDS * 1000
+        for stream in self.streams:
+            r.xautoclaim(stream, self.group, self.name, min_idle_time=idle_ms, start_id="0-0", count=settings.EVENTS_READ_COUNT)
+
+    def ack(self, stream, message_ids, event_ids):
+        pipe = r.pipeline()
+        for event_id in event_ids:
+            pipe.set(DONE_KEY.format(group=self.group, event_id=event_id), 1, ex=DONE_TTL)
+        pipe.xack(stream, self.group, *message_ids)
+        pipe.execute()
+
+    def deliveries(self, stream, message_id):
+        pending = r.xpending_range(stream, self.group, min=message_id, max=message_id, count=1)
+        return pending[0]["times_delivered"] if pending else 1
+
+    def dead_letter(self, stream, message_id, fields, error):
+        pipe = r.pipeline()
+        pipe.xadd(
+            DLQ_KEY.format(group=self.group),
+            {**fields, "stream": stream, "message_id": message_id, "error": error},
+            maxlen=settings.EVENTS_STREAM_MAXLEN,
+            approximate=True,
+        )
+        pipe.xack(stream, self.group, message_id)
+        pipe.execute()
+
+    def handle_one(self, stream, message_id, fields, event):
+        try:
+            self.handlers[event["type"]]([event])
+        except Exception as e:
+            attempts = self.deliveries(stream, message_id)
+            if attempts < settings.EVENTS_MAX_DELIVERIES:
+                logger.exception(f"Группа {self.group}: событие {event['id']} {event['type']} не обработано (попытка {attempts})")
+                return
+            logger.exception(f"Группа {self.group}: событие {event['id']} {event['type']} не обработано за {attempts} попыток, переносим в DLQ")
+            self.dead_letter(stream, message_id, fields, repr(e))
+            return
+        self.ack(stream, [message_id], [event["id"]])
+
+    def process(self, response):
+        for stream, messages in response:
+            # запись, вытесненная из stream по MAXLEN, приходит из pending без полей — её только подтверждаем
+            gone = [message_id for message_id, fields in messages if not fields]
+            if gone:
+                r.xack(stream, self.group, *gone)
+            messages = [(message_id, fields) for message_id, fields in messages if fields]
+            if not messages:
+                continue
+            event_type = self.streams[stream]
+            events = [
+                {
+                    "id": fields["id"],
+                    "type": fields["type"],
+                    "payload": json.loads(fields["payload"]),
+                    "created_at": fields["created_at"],
+                }
+                for _, fields in messages
+            ]
+
+            done = r.mget([DONE_KEY.format(group=self.group, event_id=event["id"]) for event in events])
+            fresh = [(message, event) for message, event, seen in zip(messages, events, done) if seen is None]
+            seen_ids = [message_id for (message_id, _), seen in zip(messages, done) if seen is not None]
+            if seen_ids:
+                r.xack(stream, self.group, *seen_ids)
+            if not fresh:
+                continue
+
+            try:
+                self.handlers[event_type]([event for _, event in fresh])
+            except Exception:
+                logger.warning(f"Группа {self.group}: пачка из {len(fresh)} событий {event_type} упала, обрабатываем по одному")
+                for (message_id, fields), event in fresh:
+                    self.handle_one(stream, message_id, fields, event)
+                continue
+            self.ack(stream, [message_id for (message_id, _), _ in fresh], [event["id"] for _, event in fresh])
+
+    def run(self, stop):
+        """Цикл до stop.is_set(); stop — threading.Event."""
+        self.ensure_groups()
+        logger.info(f"Группа {self.group} ({self.name}) читает {', '.join(self.streams.values())}")
+        retry_at = 0
+        while not stop.is_set():
+            try:
+                if time.monotonic() >= retry_at:
+                    self.claim_stale()
+                    # "0" — свои доставленные, но не подтверждённые сообщения
+                    self.process(self.read("0"))
+                    retry_at = time.monotonic() + settings.EVENTS_RETRY_SECONDS
+                self.process(self.read(">", block=1000))
+            except Exception:
+                logger.exception(f"Группа {self.group}: ошибка чтения событий")
+                stop.wait(1)
@@ -0,0 +1,145 @@
+import time
+import statistics
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from games.models import Game, PvpGameSummary
+from games.views import PvPGameHistoryAPIView, PvpGameHistoryPagination
+from gifts.models import Gift
+from gifts.views import UserInventoryView, InventoryPagination
+from spin.models import SpinGame
+from spin.views import SpinGameHistoryView, SpinGameHistoryPagination
+from transactions.models import TONWallet, TONTransaction
+from transactions.views import WalletViewSet, TransactionPagination
+from user.models import User
+
+# пользователь бенчмарка — отрицательный telegram_id, реальные такими не бывают
+BENCH_TELEGRAM_ID = -7_000_000_000
+BENCH_PREFIX = "bench-pagination"
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает задержку первой и глубокой страницы списков с курсорной пагинацией '
+        '(pvp-history, spin/history, инвентарь, транзакции) и того же OFFSET-запроса'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=1000, help='Номер глубокой страницы')
+        parser.add_argument('--limit', type=int, default=10, help='Размер страницы')
+        parser.add_argument('--repeat', type=int, default=20, help='Повторов на замер (берётся медиана)')
+
+    def handle(self, *args, **options):
+        page, limit, repeat = options['page'], options['limit'], options['repeat']
+        rows = page * limit
+        factory = APIRequestFactory()
+
+        user, _ = User.objects.get_or_create(telegram_id=BENCH_TELEGRAM_ID, defaults={"username": BENCH_PREFIX})
+        self.stdout.write(f"Готовим по {rows} строк на каждый список...")
+        try:
+            self.create_rows(user, rows)
+            endpoints = [
+                (
+                    "/games/pvp-history",
+                    PvPGameHistoryAPIView.as_view(),
+                    PvpGameHistoryPagination,
+                    PvpGameSummary.objects.filter(hash__startswith=BENCH_PREFIX),
+                ),
+                (
+                    "/spin/history/",
+                    SpinGameHistoryView.as_view(),
+                    SpinGameHistoryPagination,
+                    SpinGame.objects.filter(player=user),
+                ),
+                (
+                    "/Inventory/inventory/",
+                    UserInventoryView.as_view(),
+                    InventoryPagination,
+                    Gift.objects.filter(user=user),
+                ),
+                (
+                    "/api/transactions/wallets/me/transactions/",
+                    WalletViewSet.as_view({"get": "transactions"}),
+                    TransactionPagination,
+                    TONTransaction.objects.filter(user=user),
+                ),
+            ]
+
+            self.stdout.write(f"Страница 1 против страницы {page} (по {limit}), медиана из {repeat}, мс:")
+            for path, view, pagination, queryset in endpoints:
+                ordering = pagination.ordering
+                # курсор глубокой страницы — по последней строке предыдущей (считается один раз, вне замера)
+                last = queryset.order_by(*ordering)[(page - 1) * limit - 1]
+                cursor = pagination().encode_cursor(last)
+
+                def request(params):
+                    req = factory.get(path, {"limit": limit, **params})
+                    force_authenticate(req, user=user)
+                    response = view(req)
+                    assert response.status_code == 200, response.data
+
+                def offset_page(offset):
+                    list(queryset.order_by(*ordering)[offset:offset + limit])
+
+                first = median_ms(lambda: request({}), repeat)
+                deep = median_ms(lambda: request({"cursor": cursor}), repeat)
+                offset_first = median_ms(lambda: offset_page(0), repeat)
+                offset_deep = median_ms(lambda: offset_page((page - 1) * limit), repeat)
+                self.stdout.write(self.style.SUCCESS(
+                    f"{path}: курсор {first} -> {deep}; OFFSET-запрос {offset_first} -> {offset_deep}"
+                ))
+        finally:
+            self.cleanup(user)
+
+    def create_rows(self, user, rows):
+        now = timezone.now()
+
+        games = Game.objects.bulk_create([
+            Game(mode="pvp", status="finished", hash=f"{BENCH_PREFIX}-{i}") for i in range(rows)
+        ], batch_size=1000)
+        PvpGameSummary.objects.bulk_create([
+            PvpGameSummary(
+                game=game,
+                hash=game.hash,
+                started_at=now - timedelta(seconds=i),
+                ended_at=now - timedelta(seconds=i),
+            )
+            for i, game in enumerate(games)
+        ], batch_size=1000)
+
+        SpinGame.objects.bulk_create([SpinGame(player=user) for _ in range(rows)], batch_size=1000)
+
+        Gift.objects.bulk_create([
+            Gift(
+                user=user,
+                name=f"Bench #{i}",
+                image_url="https://example.com/bench.png",
+                ton_contract_address=f"{BENCH_PREFIX}-{user.id}-{i}",
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+
+        wallet, _ = TONWallet.objects.get_or_create(
+            user=user, defaults={"address": f"{BENCH_PREFIX}-{user.id}", "subwallet_id": 0}
+        )
+        TONTransaction.objects.bulk_create([
+            TONTransaction(user=user, wallet=wallet, tx_hash=f"{BENCH_PREFIX}-{user.id}-{i}", amount=1)
+            for i in range(rows)
+        ], batch_size=1000)
+
+    def cleanup(self, user):
+        Game.objects.filter(hash__startswith=BENCH_PREFIX).delete()
+        SpinGame.objects.filter(player=user).delete()
+        Gift.objects.filter(user=user).delete()
+        TONTransaction.objects.filter(user=user).delete()
+        TONWallet.objects.filter(user=user).delete()
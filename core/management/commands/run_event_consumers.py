@@ -0,0 +1,41 @@
+import os
+import socket
+import threading
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import autodiscover_modules
+from core.events import EventConsumer, groups
+
+
+class Command(BaseCommand):
+    help = 'Запускает группы потребителей доменных событий (read-модели, уведомления, аналитика)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--group',
+            action='append',
+            help='Запустить только эту группу (можно несколько раз); по умолчанию — все',
+        )
+
+    def handle(self, *args, **options):
+        autodiscover_modules('event_handlers')
+        available = groups()
+        names = options['group'] or sorted(available)
+        unknown = set(names) - set(available)
+        if unknown:
+            raise CommandError(f"Неизвестные группы: {', '.join(sorted(unknown))}")
+
+        # имя потребителя уникально в пределах группы: несколько процессов делят stream
+        consumer_name = f"{socket.gethostname()}-{os.getpid()}"
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=EventConsumer(name, consumer_name).run, args=(stop,), name=f"events-{name}", daemon=True)
+            for name in names
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Потребители событий запущены: {', '.join(names)}")
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            stop.set()
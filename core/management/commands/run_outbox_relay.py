@@ -0,0 +1,26 @@
+import time
+import logging
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core.events import Outbox
+
+
+logger = logging.getLogger('core.events')
+
+
+class Command(BaseCommand):
+    help = 'Публикует доменные события из outbox в Redis Streams'
+
+    def handle(self, *args, **options):
+        self.stdout.write("Релей outbox запущен")
+        while True:
+            try:
+                published = Outbox.relay(settings.OUTBOX_RELAY_BATCH)
+            except Exception:
+                logger.exception("Не удалось опубликовать события outbox")
+                close_old_connections()
+                published = 0
+            # полная пачка — в outbox, скорее всего, есть ещё; забираем без паузы
+            if published < settings.OUTBOX_RELAY_BATCH:
+                time.sleep(settings.OUTBOX_RELAY_INTERVAL)
@@ -0,0 +1,41 @@
+# core/metrics.py
+from collections import defaultdict
+from django.conf import settings
+
+
+r = settings.REDIS_CLIENT
+ar = settings.ASYNC_REDIS_CLIENT
+
+# hash: серия в формате Prometheus (name{label="value"}) -> значение счётчика.
+# Общий для всех процессов, поэтому /metrics показывает сумму по воркерам.
+COUNTERS_KEY = "metrics:counters"
+
+
+def series(name, labels):
+    if not labels:
+        return name
+    inner = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return f"{name}{{{inner}}}"
+
+
+class Metrics:
+    @staticmethod
+    def inc(name, amount=1, **labels):
+        r.hincrby(COUNTERS_KEY, series(name, labels), amount)
+
+    @staticmethod
+    async def ainc(name, amount=1, **labels):
+        await ar.hincrby(COUNTERS_KEY, series(name, labels), amount)
+
+    @staticmethod
+    def render():
+        """Все счётчики в текстовом формате Prometheus."""
+        grouped = defaultdict(list)
+        for key, value in r.hgetall(COUNTERS_KEY).items():
+            grouped[key.split("{", 1)[0]].append((key, value))
+
+        lines = []
+        for name in sorted(grouped):
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{key} {value}" for key, value in sorted(grouped[name]))
+        return "\n".join(lines) + "\n"
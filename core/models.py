@@ -1,5 +1,6 @@
 from django.db import models
 from decimal import Decimal
+from django.core.serializers.json import DjangoJSONEncoder
 
 
 class Config(models.Model):
@@ -40,3 +41,32 @@ class Config(models.Model):
         obj, _ = Config.objects.get_or_create(key=key)
         obj.value = str(value)
         obj.save()
+
+
+class OutboxEvent(models.Model):
+    """
+    Доменное событие, записанное в той же транзакции, что и изменение, которое его породило.
+    Релей (manage.py run_outbox_relay) публикует события в Redis Streams и удаляет строки.
+    """
+
+    event_type = models.CharField(
+        max_length=64,
+        verbose_name="Тип события"
+    )
+
+    payload = models.JSONField(
+        encoder=DjangoJSONEncoder,
+        verbose_name="Данные"
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Создано"
+    )
+
+    class Meta:
+        verbose_name = "Событие outbox"
+        verbose_name_plural = "События outbox"
+
+    def __str__(self):
+        return f"{self.event_type} #{self.id}"
@@ -0,0 +1,152 @@
+import hashlib
+import logging
+from functools import wraps
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+
+
+r = settings.REDIS_CLIENT
+logger = logging.getLogger('core.response_cache')
+
+# Кэш готовых JSON-ответов публичных эндпоинтов. Записи лежат под версией пространства:
+# доменное событие (расчёт раунда, смена колеса, розыгрыш) увеличивает версию,
+# и следующий запрос собирает ответ заново; старые записи истекают по TTL.
+VERSION_KEY = "resp_cache:{namespace}:version"
+ENTRY_KEY = "resp_cache:{namespace}:{version}:{variant}"   # hash: status, etag, body
+
+LAST_WINNER = "last_winner"
+TOP = "top"
+PVP_HISTORY = "pvp_history"
+SPIN_WHEEL = "spin_wheel"
+RAFFLE = "raffle"
+
+# что меняет расчёт PvP-раунда
+SETTLEMENT_NAMESPACES = (LAST_WINNER, TOP, PVP_HISTORY)
+
+# 404 тоже ответ из БД («нет игр», «нет розыгрыша») — кэшируем, но без ETag
+CACHED_STATUSES = (200, 404)
+
+# публичные ответы, не зависящие от пользователя, — прогреваются при старте
+WARM_PATHS = (
+    "/games/last-winner/",
+    "/games/top/",
+    "/games/pvp-history",
+    "/games/spin/wheel/",
+)
+
+
+def make_etag(body):
+    return '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(header, etag):
+    """If-None-Match: список тегов через запятую или *; W/ при сравнении не важен."""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+class ResponseCache:
+    """
+    Кэш ответов с ETag: попадание и 304 по If-None-Match отдаются из Redis без запросов в БД.
+    Вешается декоратором cached_response на get() view; сброс — ResponseCache.invalidate(namespace).
+    """
+
+    @staticmethod
+    def variant(request, per_user=False):
+        # полный URL: query-параметры (курсор, limit) и ссылки next в теле зависят от него
+        raw = request.build_absolute_uri()
+        if per_user:
+            raw = f"{request.user.id}:{raw}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    @staticmethod
+    def version(namespace):
+        return r.get(VERSION_KEY.format(namespace=namespace)) or "0"
+
+    @staticmethod
+    def invalidate(*namespaces):
+        pipe = r.pipeline()
+        for namespace in namespaces:
+            pipe.incr(VERSION_KEY.format(namespace=namespace))
+        try:
+            pipe.execute()
+        except Exception as e:
+            # без сброса клиенты увидят изменения не позже RESPONSE_CACHE_TTL
+            logger.error(f"Не удалось сбросить кэш ответов {namespaces}: {e}")
+
+    @staticmethod
+    def http_response(request, status, etag, body):
+        if status == 200 and etag_matches(request.headers.get("If-None-Match"), etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, status=status, content_type="application/json")
+        if status == 200:
+            response["ETag"] = etag
+        # клиент может хранить ответ, но обязан перепроверять его по ETag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    @staticmethod
+    def respond(namespace, request, build, per_user=False):
+        from rest_framework.renderers import JSONRenderer
+
+        # версию читаем до сборки: если событие случится во время сборки,
+        # ответ ляжет под старую версию и сразу устареет
+        key = ENTRY_KEY.format(
+            namespace=namespace,
+            version=ResponseCache.version(namespace),
+            variant=ResponseCache.variant(request, per_user),
+        )
+        status, etag, body = r.hmget(key, "status", "etag", "body")
+        if body is not None:
+            return ResponseCache.http_response(request, int(status), etag, body)
+
+        response = build()
+        if response.status_code not in CACHED_STATUSES or getattr(response, "data", None) is None:
+            return response
+
+        body = JSONRenderer().render(response.data).decode()
+        etag = make_etag(body)
+        pipe = r.pipeline()
+        pipe.hset(key, mapping={"status": response.status_code, "etag": etag, "body": body})
+        pipe.expire(key, settings.RESPONSE_CACHE_TTL)
+        pipe.execute()
+        return ResponseCache.http_response(request, response.status_code, etag, body)
+
+    @staticmethod
+    def warm():
+        """Собирает ответы WARM_PATHS так, как их запросит клиент через SITE_URL."""
+        from urllib.parse import urlsplit
+        from django.urls import resolve
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from user.services.principal import UserPrincipal
+
+        site = urlsplit(settings.SITE_URL)
+        factory = APIRequestFactory()
+        # эти ответы от пользователя не зависят — достаточно служебного принципала
+        principal = UserPrincipal(
+            id=0, username="cache-warmup", avatar_url=None,
+            is_active=True, is_staff=False, has_free_test=False,
+        )
+        for path in WARM_PATHS:
+            request = factory.get(path, HTTP_HOST=site.netloc, secure=site.scheme == "https")
+            force_authenticate(request, user=principal)
+            try:
+                response = resolve(path).func(request)
+                logger.info(f"Кэш ответа {path} прогрет: {response.status_code}")
+            except Exception as e:
+                logger.error(f"Не удалось прогреть кэш ответа {path}: {e}")
+
+
+def cached_response(namespace, per_user=False):
+    """Декоратор get() APIView: ответ берётся из ResponseCache, промах — вызов самого get()."""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            return ResponseCache.respond(
+                namespace, request, lambda: method(view, request, *args, **kwargs), per_user,
+            )
+        return wrapper
+    return decorator
@@ -1,3 +1,47 @@
-from django.test import TestCase
+import json
+from base64 import b64decode
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from django.db.models import Q
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from core.metrics import series
+from core.pagination import KeysetPagination
+from core.response_cache import make_etag, etag_matches
+
+
+class MetricsSeriesTest(SimpleTestCase):
+    def test_series_name_with_sorted_labels(self):
+        """Метки серии сортируются, чтобы один счётчик не расползался на несколько ключей"""
+        self.assertEqual(series("pvp_ws_rate_limited_total", {}), "pvp_ws_rate_limited_total")
+        self.assertEqual(
+            series("x_total", {"b": "2", "a": "1"}),
+            'x_total{a="1",b="2"}',
+        )
+
+
+class KeysetPaginationTest(SimpleTestCase):
+    def test_seek_filter_continues_after_last_row(self):
+        """Следующая страница — строго после (ended_at, id) последней строки, с учётом равных ended_at"""
+        pagination = KeysetPagination()
+        pagination.ordering = ("-ended_at", "-id")
+        ended_at = datetime(2025, 1, 28, 10, 0, 40, tzinfo=timezone.utc)
+
+        self.assertEqual(
+            pagination.seek_filter([ended_at, 12]),
+            Q(ended_at__lt=ended_at) | Q(ended_at=ended_at, id__lt=12),
+        )
+        cursor = pagination.encode_cursor(SimpleNamespace(ended_at=ended_at, id=12))
+        self.assertEqual(json.loads(b64decode(cursor)), ["2025-01-28T10:00:40+00:00", 12])
+
+
+class ResponseCacheEtagTest(SimpleTestCase):
+    def test_if_none_match(self):
+        """304 отдаётся на свой тег, в том числе слабый и из списка, но не на чужой"""
+        etag = make_etag('{"id": 1}')
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+        self.assertTrue(etag_matches(etag, etag))
+        self.assertTrue(etag_matches(f'"other", W/{etag}', etag))
+        self.assertTrue(etag_matches("*", etag))
+        self.assertFalse(etag_matches(make_etag('{"id": 2}'), etag))
+        self.assertFalse(etag_matches(None, etag))
@@ -1,3 +1,11 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from .metrics import Metrics
 
-# Create your views here.
+
+def metrics_view(request):
+    """Счётчики для Prometheus. Доступ по токену METRICS_TOKEN (Authorization: Bearer ...)."""
+    token = settings.METRICS_TOKEN
+    if not token or request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponseForbidden()
+    return HttpResponse(Metrics.render(), content_type="text/plain; version=0.0.4")
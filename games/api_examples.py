@@ -3,30 +3,27 @@
 
 # GameHistoryView
 GAME_HISTORY_EXAMPLE = {
-    "count": 2,
-    "next": None,
-    "previous": None,
+    "next": "https://example.com/games/history/?cursor=WyIyMDI1LTAxLTI4VDEwOjAwOjQwWiIsIDEyXQ%3D%3D",
     "results": [
         {
             "id": 4,
             "mode": "pvp",
-            "status": "finished",
+            "result": "win",
             "pot_amount_ton": "15.00",
+            "bet_ton": "5.00",
+            "stake_ton": "15.00",
+            "chance_percent": "100.00",
+            "payout_ton": "12.75",
+            "gifts": [
+                {
+                    "id": 123,
+                    "name": "Rare Cat NFT",
+                    "image_url": "https://example.com/cat.png",
+                    "price_ton": "10.00"
+                }
+            ],
             "started_at": "2025-01-28T10:00:00Z",
-            "ended_at": "2025-01-28T10:00:40Z",
-            "winner_id": 3,
-            "is_winner": True,
-            "player_data": {
-                "bet_ton": "15.00",
-                "chance_percent": "100.0",
-                "gifts": [
-                    {
-                        "id": 123,
-                        "name": "Rare Cat NFT",
-                        "image_url": "https://example.com/cat.png"
-                    }
-                ]
-            }
+            "ended_at": "2025-01-28T10:00:40Z"
         }
     ]
 }
@@ -42,9 +39,7 @@ TOP_PLAYER_EXAMPLE = {
 
 # PvPGameHistoryAPIView
 PVP_GAME_HISTORY_EXAMPLE = {
-    "count": 1,
-    "next": None,
-    "previous": None,
+    "next": "https://example.com/games/pvp-history?cursor=WyIyMDI1LTAxLTI4VDEwOjAwOjAwWiIsIDRd",
     "results": [
         {
             "id": 4,
@@ -165,3 +160,41 @@ LAST_WINNER_EXAMPLE = {
     "win_amount": "12.75",
     "game_id": 4
 }
+
+# LobbyView
+LOBBY_EXAMPLE = [
+    {
+        "game_id": 12,
+        "status": "running",
+        "players_count": 7,
+        "capacity": 10,
+        "pot_amount_ton": "42.50"
+    },
+    {
+        "game_id": 15,
+        "status": "waiting",
+        "players_count": 1,
+        "capacity": 10,
+        "pot_amount_ton": "0.00"
+    }
+]
+
+# LeaderboardView
+LEADERBOARD_EXAMPLE = [
+    {
+        "rank": 1,
+        "id": 3,
+        "username": "GameGaKuSeI",
+        "avatar_url": "https://example.com/avatar.png",
+        "wins_count": 5,
+        "total_wins_ton": "150.00"
+    },
+    {
+        "rank": 2,
+        "id": 8,
+        "username": "lucky_one",
+        "avatar_url": "https://example.com/avatar2.png",
+        "wins_count": 2,
+        "total_wins_ton": "61.20"
+    }
+]
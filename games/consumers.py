@@ -1,154 +1,386 @@
 # consumers.py
-import json
+import math
 import time
+import asyncio
 import logging
 from decimal import Decimal
-from asgiref.sync import sync_to_async
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from .services.auth import AuthService
-from .services.game import GameService
+from .services.game import GameService, ROUND_DURATION
+from .services.round_timer import RoundTimer
+from .services.snapshot_cache import SnapshotCache
+from .protocol import JsonCodec, MsgpackCodec, negotiate
+from .send_queue import SendQueue
+from .services.rate_limit import RateLimiter
+from .services.admission import admission
+from .services.presence import Presence, ONLINE_GROUP, USER_GROUP, HEARTBEAT_SECONDS
+from django.conf import settings
+from core.metrics import Metrics
 from django.core.exceptions import ValidationError
 # from games.services.bet_service import BetService
 
 logger = logging.getLogger('games.consumers')
 
+TIMER_MODES = ("ticks", "deadline")
+STATE_MODES = ("full", "delta")
+
+# закрытие медленного сокета: клиент переподключается и берёт свежий снапшот
+CLOSE_SLOW_CONSUMER = 4008
+# слишком частые попытки подключения одного пользователя
+CLOSE_RATE_LIMITED = 4029
+
+# действие сокета -> bucket лимита (settings.PVP_RATE_LIMITS)
+RATE_LIMITED_ACTIONS = {
+    "authenticate": "auth",
+    "bet": "bet",
+    "bet_gift": "bet_gift",
+    "timer_sync": "sync",
+    "get_state": "sync",
+}
+
 class PvpGameConsumer(AsyncWebsocketConsumer):
-    RATE_LIMIT_SECONDS = 0.5
+    # сколько сообщений может ждать отправки и как долго очередь может быть выше порога
+    SEND_BACKLOG = 32
+    SEND_BACKLOG_GRACE = 5.0
 
     async def connect(self):
         from django.contrib.auth.models import AnonymousUser
-        self.scope["user"] = AnonymousUser()
-        await self.accept()
+        user = self.scope.get("user") or AnonymousUser()
+        self.scope["user"] = user
+        # формат кадров (msgpack / json) выбирается по Sec-WebSocket-Protocol
+        self.codec, subprotocol = negotiate(self.scope.get("subprotocols"))
+        await self.accept(subprotocol=subprotocol or self.scope.get("auth_subprotocol"))
+        self.outbox = SendQueue(
+            self.deliver, self.on_send_overflow, self.SEND_BACKLOG, self.SEND_BACKLOG_GRACE,
+            on_closed=self.on_send_closed,
+        )
+        if self.codec is MsgpackCodec:
+            await self.send_message(MsgpackCodec.schema())
         self.authenticated = False
         self.game_id = None
+        self.heartbeat_task = None
         self.room_group_name = None
-        self.last_action_time = 0
+        self.timer_mode = "ticks"
+        self.state_mode = "full"
         logger.info("WebSocket подключение установлено")
 
+        # токен пришёл на рукопожатии (TokenAuthMiddleware) — сообщение authenticate не нужно
+        if user.is_authenticated:
+            if not await self.check_rate("auth", user.id):
+                await self.close(code=CLOSE_RATE_LIMITED)
+                return
+            query = parse_qs(self.scope.get("query_string", b"").decode())
+            await self.start_session(user, {k: v[0] for k, v in query.items()})
+
     async def disconnect(self, close_code):
+        if getattr(self, "outbox", None):
+            await self.outbox.close()
+        if getattr(self, "heartbeat_task", None):
+            self.heartbeat_task.cancel()
         if self.authenticated and self.room_group_name:
-            await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+            for group in self.room_groups():
+                await self.channel_layer.group_discard(group, self.channel_name)
+            await Presence.aleave(self.user.id, self.channel_name, self.game_id)
             logger.info(f"Пользователь {getattr(self, 'user', 'Unknown')} отключился от игры {self.game_id}, код: {close_code}")
         else:
             logger.info(f"Неаутентифицированный пользователь отключился, код: {close_code}")
 
-    async def receive(self, text_data):
-        from games.services.bet_service import BetService
-
-        now = time.time()
-        if now - getattr(self, "last_action_time", 0) < self.RATE_LIMIT_SECONDS:
-            logger.warning("Слишком много запросов от пользователя")
-            await self.send(json.dumps({"error": "Too many requests"}))
-            return
-        self.last_action_time = now
-
-        data = json.loads(text_data)
+    async def receive(self, text_data=None, bytes_data=None):
+        data = self.codec.loads(bytes_data) if bytes_data is not None else JsonCodec.loads(text_data)
         action = data.get("action")
         logger.info(f"Получено сообщение: action={action}")
 
+        # лимит общий для всех вкладок и воркеров: до BetService лишние запросы не доходят
+        if action in RATE_LIMITED_ACTIONS:
+            if not await self.check_rate(RATE_LIMITED_ACTIONS[action], self.rate_subject(data)):
+                return
+
         # ещё не авторизован
         if not getattr(self, "authenticated", False):
             if action == "authenticate":
                 token = data.get("token")
                 if not token:
                     logger.warning("Попытка аутентификации без токена")
-                    await self.send(json.dumps({"error": "No token provided"}))
+                    await self.send_message({"error": "No token provided"})
                     await self.close()
                     return
 
                 logger.info("Попытка аутентификации пользователя")
-                user = await AuthService.get_user_from_token(token)
+                user = await AuthService.get_principal_from_token(token)
                 if not user or not user.is_authenticated:
                     logger.warning(f"Аутентификация не удалась для токена: {token[:20]}...")
-                    await self.send(json.dumps({"error": "Authentication failed"}))
+                    await self.send_message({"error": "Authentication failed"})
                     await self.close()
                     return
 
-                logger.info(f"Пользователь {user.username} (ID: {user.id}) успешно аутентифицирован")
+                await self.start_session(user, data)
+            else:
+                logger.warning(f"Неавторизованный пользователь пытается выполнить действие: {action}")
+                await self.send_message({"error": "Authentication required"})
+                await self.close()
+            return
+
+        # уже авторизован
+        if action == "timer_sync":
+            await self.send_timer_sync()
+            return
 
-                # сохраняем авторизацию
-                self.scope["user"] = user
-                self.user = user
-                self.authenticated = True
+        # клиент увидел пропуск в seq — отдаём полный снапшот только ему
+        if action == "get_state":
+            await self.send_own_state()
+            return
 
-                # ищем или создаём игру
-                game_id = await sync_to_async(GameService.find_user_game)(user)
-                if not game_id:
-                    logger.info(f"Создание новой игры для пользователя {user.username}")
-                    game_id, room_group_name = await sync_to_async(
-                        GameService.get_or_create_game_and_player
-                    )(user)
+        if action in ("bet", "bet_gift"):
+            # БД тормозит или ставок в обработке слишком много — сразу отказ с retry_after
+            admitted, retry_after_ms = await admission.admit()
+            if not admitted:
+                await self.send_message({"error": "Server busy", "retry_after_ms": retry_after_ms})
+                return
+            try:
+                if action == "bet":
+                    await self.place_bet_ton(data)
                 else:
-                    logger.info(f"Пользователь {user.username} присоединяется к существующей игре {game_id}")
-                    room_group_name = f"pvp_{game_id}"
-                    await sync_to_async(GameService.ensure_player_in_game)(user, game_id)
+                    await self.place_bet_gifts(data)
+            finally:
+                admission.release()
 
-                self.game_id = game_id
-                self.room_group_name = room_group_name
-                await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+    async def place_bet_ton(self, data):
+        from games.services.bet_service import BetService
+        from games.services.bet_batcher import BetBatcher
+
+        amount = Decimal(str(data.get("amount", "0")))
+        logger.info(f"Пользователь {self.user.username} делает ставку TON: {amount}")
+        try:
+            if settings.PVP_BET_BATCH_WINDOW_MS > 0:
+                delta = await BetBatcher.place_bet_ton(self.user, self.game_id, amount)
+            else:
+                delta = await BetService.aplace_bet_ton(self.user, self.game_id, amount)
+            logger.info(f"Ставка TON {amount} от {self.user.username} принята")
+            # при пачках дельту рассылает только один сокет из пачки
+            if delta:
+                await self.after_bet(delta)
+        except ValidationError as e:
+            msg = e.messages[0] if hasattr(e, "messages") else str(e)
+            logger.warning(f"Ошибка ставки TON от {self.user.username}: {msg}")
+            await self.send_message({"error": msg})
 
-                # регаем игрока
-                await sync_to_async(GameService.add_player_to_game)(self.game_id, user)
+    async def place_bet_gifts(self, data):
+        from games.services.bet_service import BetService
+        from games.services.bet_batcher import BetBatcher
 
-                logger.info(f"Пользователь {user.username} добавлен в игру {game_id}")
-                await self.send_game_state()
+        gift_ids = data.get("gift_ids", [])  # список ID подарков
+        logger.info(f"Пользователь {self.user.username} делает ставку подарками: {gift_ids}")
+        try:
+            if settings.PVP_BET_BATCH_WINDOW_MS > 0:
+                delta = await BetBatcher.place_bet_gifts(self.user, self.game_id, gift_ids)
             else:
-                logger.warning(f"Неавторизованный пользователь пытается выполнить действие: {action}")
-                await self.send(json.dumps({"error": "Authentication required"}))
-                await self.close()
-            return
+                delta = await BetService.aplace_bet_gifts(self.user, self.game_id, gift_ids)
+            logger.info(f"Ставка подарками {gift_ids} от {self.user.username} принята")
+            if delta:
+                await self.after_bet(delta)
+        except ValidationError as e:
+            msg = e.messages[0] if hasattr(e, "messages") else str(e)
+            logger.warning(f"Ошибка ставки подарками от {self.user.username}: {msg}")
+            await self.send_message({"error": msg})
 
-        # уже авторизован
-        if action == "bet":
-            amount = Decimal(str(data.get("amount", "0")))
-            logger.info(f"Пользователь {self.user.username} делает ставку TON: {amount}")
-            try:
-                await sync_to_async(BetService.place_bet_ton)(self.user, self.game_id, amount)
-                await sync_to_async(GameService.calc_and_save_pot_chances)(self.game_id)
-                logger.info(f"Ставка TON {amount} от {self.user.username} принята")
-                await self.send_game_state()
-            except ValidationError as e:
-                msg = e.messages[0] if hasattr(e, "messages") else str(e)
-                logger.warning(f"Ошибка ставки TON от {self.user.username}: {msg}")
-                await self.send(json.dumps({"error": msg}))
-
-        if action == "bet_gift":
-            gift_ids = data.get("gift_ids", [])  # список ID подарков
-            logger.info(f"Пользователь {self.user.username} делает ставку подарками: {gift_ids}")
+    def rate_subject(self, data):
+        """Чей лимит расходуется: пользователь, а до авторизации — user_id из токена или IP."""
+        if self.authenticated:
+            return self.user.id
+        token = data.get("token")
+        user_id = AuthService.decode_user_id(token) if token else None
+        if user_id:
+            return user_id
+        client = self.scope.get("client") or ("unknown",)
+        return f"ip:{client[0]}"
+
+    async def check_rate(self, bucket, subject):
+        allowed, retry_after_ms = await RateLimiter.aallow(bucket, subject)
+        if not allowed:
+            await Metrics.ainc("pvp_ws_rate_limited_total", action=bucket)
+            await self.send_message({"error": "Too many requests", "retry_after_ms": retry_after_ms})
+        return allowed
+
+    async def start_session(self, user, options):
+        logger.info(f"Пользователь {user.username} (ID: {user.id}) успешно аутентифицирован")
+
+        # сохраняем авторизацию
+        self.scope["user"] = user
+        self.user = user
+        self.authenticated = True
+
+        # deadline — клиент сам считает отсчёт по дедлайну, ticks — старые timer_update раз в секунду
+        if options.get("timer_mode") in TIMER_MODES:
+            self.timer_mode = options["timer_mode"]
+        # delta — после ставок приходят только изменения с seq, full — старые полные game_state
+        if options.get("state_mode") in STATE_MODES:
+            self.state_mode = options["state_mode"]
+
+        # ищем или создаём игру
+        game_id = await GameService.afind_user_game(user)
+        if not game_id:
+            logger.info(f"Создание новой игры для пользователя {user.username}")
+            game_id, room_group_name, joined = await GameService.aget_or_create_game_and_player(user)
+        else:
+            logger.info(f"Пользователь {user.username} присоединяется к существующей игре {game_id}")
+            room_group_name = f"pvp_{game_id}"
+            joined = await GameService.aensure_player_in_game(user, game_id)
+
+        self.game_id = game_id
+        self.room_group_name = room_group_name
+        for group in self.room_groups():
+            await self.channel_layer.group_add(group, self.channel_name)
+
+        logger.info(f"Пользователь {user.username} добавлен в игру {game_id}")
+        await Presence.atouch(user.id, self.channel_name, game_id)
+        self.heartbeat_task = asyncio.create_task(self.heartbeat())
+        await self.send_message({"type": "online_count", "online_count": await Presence.acount()})
+        if joined:
+            # новый игрок: остальным — дельта или снапшот, себе — снапшот как точка отсчёта seq
+            await self.broadcast_delta(joined)
+            await self.send_game_state()
+            if self.state_mode == "delta":
+                await self.send_own_state()
+        else:
+            await self.send_own_state()
+        # переподключение в идущий раунд — отдаём текущий дедлайн
+        await self.send_timer_sync()
+
+    def room_groups(self):
+        groups = [self.room_group_name, ONLINE_GROUP, USER_GROUP.format(user_id=self.user.id)]
+        if self.timer_mode == "ticks":
+            groups.append(f"{self.room_group_name}_ticks")
+        groups.append(f"{self.room_group_name}_{self.state_mode}")
+        return groups
+
+    async def after_bet(self, delta):
+        started = await GameService.astart_round_if_ready(self.game_id)
+        await self.broadcast_delta(delta)
+        if started:
+            await self.broadcast_delta(started["delta"])
+        await self.send_game_state()
+        if started:
+            # Сообщаем, что пошёл таймер
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {"type": "timer_started", "duration": ROUND_DURATION, "deadline": started["deadline"]}
+            )
+
+    async def heartbeat(self):
+        """Продлевает присутствие, пока сокет открыт."""
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
             try:
-                await sync_to_async(BetService.place_bet_gifts)(self.user, self.game_id, gift_ids)
-                await sync_to_async(GameService.calc_and_save_pot_chances)(self.game_id)
-                logger.info(f"Ставка подарками {gift_ids} от {self.user.username} принята")
-                await self.send_game_state()
-            except ValidationError as e:
-                msg = e.messages[0] if hasattr(e, "messages") else str(e)
-                logger.warning(f"Ошибка ставки подарками от {self.user.username}: {msg}")
-                await self.send(json.dumps({"error": msg}))
-                
-    async def send_game_state(self):
-        game_data = await sync_to_async(GameService.get_game_state)(self.game_id)
+                await Presence.atouch(self.user.id, self.channel_name, self.game_id)
+            except Exception as e:
+                logger.warning(f"Не удалось продлить онлайн пользователя {self.user.id}: {e}")
+
+    async def broadcast_delta(self, delta):
         await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                "type": "game_state",
-                **game_data
-            }
+            f"{self.room_group_name}_delta",
+            {"type": "game_delta", **delta}
         )
 
+    async def send_timer_sync(self):
+        """Повторная отправка дедлайна только этому сокету (ресинк/переподключение)."""
+        deadline = await RoundTimer.aget_deadline(self.game_id)
+        if deadline is None:
+            return
+        remaining = max(0, math.ceil(deadline - time.time()))
+        await self.timer_started({"type": "timer_started", "duration": remaining, "deadline": deadline})
+
+    async def send_game_state(self):
+        """
+        Полный снапшот сокетам в режиме full.
+        Снапшот сериализуется один раз, в группу уходит только его версия.
+        """
+        version, state, _ = await SnapshotCache.apublish(self.game_id, self.codec)
+        event = {"type": "game_state", "game_id": self.game_id, "version": version}
+        if version is None:
+            # комнаты нет в Redis — шлём состояние целиком, каждый сокет кодирует сам
+            event["state"] = state
+        await self.channel_layer.group_send(f"{self.room_group_name}_full", event)
+
+    async def send_own_state(self):
+        """Полный снапшот (с version) только этому сокету."""
+        _, _, payload = await SnapshotCache.apublish(self.game_id, self.codec)
+        await self.send_payload(payload)
+
+    async def send_message(self, message):
+        await self.send_payload(self.codec.dumps(message))
+
+    async def send_payload(self, payload):
+        if self.codec.binary:
+            await self.send(bytes_data=payload)
+        else:
+            await self.send(text_data=payload)
+
+    # Сообщения группы не шлются сразу, а встают в исходящую очередь сокета:
+    # снапшоты и таймеры в ней схлопываются до последнего значения.
     async def game_state(self, event):
-        await self.send(text_data=json.dumps(event))
+        self.outbox.put(event, key="game_state")
+
+    async def game_delta(self, event):
+        self.outbox.put(event)
 
     async def game_finished(self, event):
-        await self.send(text_data=json.dumps(event))
+        self.outbox.put(event)
 
     async def timer_started(self, event):
-        await self.send(json.dumps({
-            "type": "timer_started",
-            "duration": event["duration"]
-        }))
+        self.outbox.put(event, key="timer_started")
 
     async def timer_update(self, event):
-        await self.send(json.dumps({
-            "type": "timer_update",
-            "remaining": event["remaining"]
-        }))
\ No newline at end of file
+        self.outbox.put(event, key="timer_update")
+
+    async def online_count(self, event):
+        self.outbox.put(event, key="online_count")
+
+    async def notification(self, event):
+        self.outbox.put(event)
+
+    async def deliver(self, event):
+        """Отправка сообщения из очереди; кодирование — только здесь."""
+        kind = event["type"]
+        if kind == "game_state":
+            if event.get("state") is not None:
+                await self.send_message(SnapshotCache.message(event["state"]))
+                return
+            payload = SnapshotCache.get_local(event["game_id"], event["version"], self.codec)
+            if payload is None:
+                payload = await SnapshotCache.aget(event["game_id"], event["version"], self.codec)
+            await self.send_payload(payload)
+        elif kind == "timer_started":
+            # deadline и server_time в мс: клиент берёт смещение часов = server_time - своё время
+            # и дальше считает отсчёт сам, без timer_update
+            await self.send_message({
+                "type": "timer_started",
+                "duration": event["duration"],
+                "deadline": int(event["deadline"] * 1000),
+                "server_time": int(time.time() * 1000),
+            })
+        elif kind == "timer_update":
+            await self.send_message({
+                "type": "timer_update",
+                "remaining": event["remaining"]
+            })
+        else:
+            await self.send_message(event)
+
+    def on_send_overflow(self, backlog):
+        logger.warning(
+            f"Пользователь {getattr(self, 'user', 'Unknown')} не успевает принимать сообщения "
+            f"(в очереди {backlog}), отключаем"
+        )
+        asyncio.create_task(self.evict())
+
+    def on_send_closed(self, error):
+        logger.warning(f"Пользователь {getattr(self, 'user', 'Unknown')}: ошибка отправки в сокет ({error!r}), закрываем")
+        asyncio.create_task(self.close())
+
+    async def evict(self):
+        await self.outbox.close()
+        try:
+            await self.send_message({"type": "resync", "reason": "slow_consumer"})
+        finally:
+            await self.close(code=CLOSE_SLOW_CONSUMER)
\ No newline at end of file
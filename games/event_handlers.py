@@ -0,0 +1,71 @@
+import logging
+from decimal import Decimal
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.utils.dateparse import parse_datetime
+from core.events import subscribe, ROUND_SETTLED, RAFFLE_FINISHED, DEPOSIT_RECEIVED
+from core.response_cache import ResponseCache, LAST_WINNER, PVP_HISTORY, TOP
+from games.services.game import GameService
+from games.services.leaderboard import Leaderboard
+from games.services.presence import USER_GROUP
+
+
+logger = logging.getLogger('games.event_handlers')
+
+
+@subscribe("projections", ROUND_SETTLED)
+def write_projections(events):
+    GameService.write_projections([event["payload"] for event in events])
+    # кэш — после записи итогов, иначе last-winner и pvp-history закэшируют старое
+    ResponseCache.invalidate(LAST_WINNER, PVP_HISTORY)
+
+
+@subscribe("leaderboard", ROUND_SETTLED)
+def record_wins(events):
+    # период окна — по времени раунда, а не обработки события
+    wins = [
+        (
+            payload["game_id"],
+            payload["winner_id"],
+            Decimal(payload["pot_amount_ton"]),
+            parse_datetime(payload["ended_at"]),
+        )
+        for payload in (event["payload"] for event in events)
+        if payload["winner_id"] is not None
+    ]
+    if wins:
+        Leaderboard.record_wins(wins)
+    ResponseCache.invalidate(TOP)
+
+
+def notify(user_id, message):
+    """Личное сообщение во все открытые сокеты ws/pvp игрока."""
+    async_to_sync(get_channel_layer().group_send)(
+        USER_GROUP.format(user_id=user_id),
+        {"type": "notification", **message},
+    )
+
+
+@subscribe("notifications", DEPOSIT_RECEIVED)
+def notify_deposit(events):
+    for event in events:
+        payload = event["payload"]
+        notify(payload["user_id"], {
+            "event": "deposit",
+            "amount": payload["amount"],
+            "currency": payload["currency"],
+            "tx_hash": payload["tx_hash"],
+        })
+
+
+@subscribe("notifications", RAFFLE_FINISHED)
+def notify_raffle_winner(events):
+    for event in events:
+        payload = event["payload"]
+        if payload["winner_id"] is None:
+            continue
+        notify(payload["winner_id"], {
+            "event": "raffle_won",
+            "raffle_id": payload["raffle_id"],
+            "prize_id": payload["prize_id"],
+        })
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from games.services.archive import GameArchive
+
+
+class Command(BaseCommand):
+    help = 'Выносит завершённые игры и спины старше N дней в архив (gzip JSONL) и удаляет их из горячих таблиц'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.GAME_ARCHIVE_AFTER_DAYS,
+            help='Архивировать то, что закончилось раньше стольких дней назад',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.GAME_ARCHIVE_BATCH,
+            help='Строк в одном файле архива',
+        )
+
+    def handle(self, *args, **options):
+        games = GameArchive.archive_games(options['days'], options['batch_size'])
+        spins = GameArchive.archive_spins(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"В архиве: игр {games}, спинов {spins}"))
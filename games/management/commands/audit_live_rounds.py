@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from games.services.live_round import LiveRoundStore
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает банк и ставки живых PvP-раундов с нуля и сверяет с инкрементальными счётчиками'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--game-id',
+            type=int,
+            help='Проверить только один раунд',
+        )
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Записать пересчитанные значения вместо расходящихся',
+        )
+
+    def handle(self, *args, **options):
+        game_ids = [options['game_id']] if options['game_id'] else LiveRoundStore.active_rooms()
+        self.stdout.write(f"Проверяем {len(game_ids)} живых раундов")
+
+        broken = 0
+        for game_id in game_ids:
+            report = LiveRoundStore.audit(game_id, repair=options['repair'])
+            if report['consistent']:
+                continue
+
+            broken += 1
+            self.stdout.write(self.style.WARNING(
+                f"Раунд {game_id}: хранится {report['stored']}, пересчитано {report['actual']}, "
+                f"игроков с расхождением по подаркам: {report['players_with_gift_mismatch']}"
+            ))
+
+        if broken and options['repair']:
+            self.stdout.write(self.style.SUCCESS(f"Исправлено раундов: {broken}"))
+        elif broken:
+            self.stdout.write(self.style.ERROR(f"Раундов с расхождениями: {broken}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Расхождений не найдено"))
@@ -0,0 +1,76 @@
+import time
+import asyncio
+from decimal import Decimal
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from games.models import Game
+from games.services.bet_service import BetService
+from games.services.bet_batcher import BetBatcher
+from games.services.live_round import LiveRoundStore
+from user.models import User
+
+# тестовые пользователи бенчмарка — отрицательные telegram_id, реальные такими не бывают
+BENCH_TELEGRAM_ID_BASE = -9_000_000_000
+BET_AMOUNT = Decimal("0.01")
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет ставок в секунду на процесс: старый путь через sync_to_async '
+        '(thread_sensitive), async-путь консьюмера и async-путь с пачками ставок по комнате'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sockets', type=int, default=100, help='Сколько игроков ставят одновременно')
+        parser.add_argument('--bets', type=int, default=20, help='Ставок на одного игрока')
+
+    def handle(self, *args, **options):
+        sockets, bets = options['sockets'], options['bets']
+
+        users = User.objects.bulk_create([
+            User(
+                telegram_id=BENCH_TELEGRAM_ID_BASE - i,
+                username=f"bench_{i}",
+                balance_ton=Decimal("1000"),
+            )
+            for i in range(sockets)
+        ])
+        games = []
+
+        try:
+            # оба прогона в одном event loop: async-клиент Redis привязан к циклу
+            results = asyncio.run(self.run_all(users, bets, games))
+        finally:
+            for game in games:
+                LiveRoundStore.release(game.id, [u.id for u in users], [])
+            Game.objects.filter(id__in=[g.id for g in games]).delete()
+            User.objects.filter(id__in=[u.id for u in users]).delete()
+
+        total = sockets * bets
+        self.stdout.write(f"Игроков: {sockets}, ставок: {total}")
+        for name, elapsed in results:
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {elapsed:.2f} сек, {total / elapsed:.0f} ставок/сек"
+            ))
+
+    async def run_all(self, users, bets, games):
+        sync_bet = sync_to_async(BetService.place_bet_ton)
+        return [
+            ("sync_to_async (до)", await self.run_one(users, bets, games, sync_bet)),
+            ("async (после)", await self.run_one(users, bets, games, BetService.aplace_bet_ton)),
+            ("async + пачки", await self.run_one(users, bets, games, BetBatcher.place_bet_ton)),
+        ]
+
+    async def run_one(self, users, bets, games, place_bet):
+        # в каждом прогоне своя комната, чтобы суммы ставок не упирались в баланс
+        game = await sync_to_async(Game.objects.create)(mode="pvp", status="waiting")
+        await sync_to_async(LiveRoundStore.ensure_room)(game)
+        games.append(game)
+
+        async def player(user):
+            for _ in range(bets):
+                await place_bet(user, game.id, BET_AMOUNT)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(player(user) for user in users))
+        return time.perf_counter() - started
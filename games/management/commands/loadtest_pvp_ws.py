@@ -0,0 +1,214 @@
+import json
+import time
+import random
+import asyncio
+import platform
+from decimal import Decimal
+from datetime import datetime, timezone
+import websockets
+from django.core.management.base import BaseCommand
+from user.models import User
+from user.services.auth import AuthService
+
+# пользователи нагрузочного теста — отрицательные telegram_id, реальные такими не бывают.
+# Между прогонами не удаляются: их раунды ещё рассчитываются после теста
+LOADTEST_TELEGRAM_ID_BASE = -8_000_000_000
+LOADTEST_BALANCE = Decimal("1000000")
+BET_AMOUNT = "0.01"
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    i = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return round(values[i], 2)
+
+
+def summary_ms(values):
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": round(max(values), 2) if values else None,
+    }
+
+
+def read_rss_kb(pid):
+    """RSS процесса из /proc (Linux); None, если pid не задан или недоступен."""
+    if not pid:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+class Client:
+    """Один игрок: сокет, замер подключения и входящих сообщений."""
+
+    def __init__(self, user_id, token, stats):
+        self.user_id = user_id
+        self.token = token
+        self.stats = stats
+        self.ws = None
+        self.ready = asyncio.Event()
+
+    async def connect(self, url):
+        started = time.perf_counter()
+        self.ws = await websockets.connect(
+            f"{url}?timer_mode=deadline&state_mode=delta",
+            subprotocols=["access_token", self.token],
+            open_timeout=30,
+            max_queue=None,
+        )
+        asyncio.create_task(self.read())
+        # подключение считаем завершённым, когда пришёл первый снапшот комнаты
+        await asyncio.wait_for(self.ready.wait(), timeout=30)
+        self.stats["connect_ms"].append((time.perf_counter() - started) * 1000)
+
+    async def read(self):
+        try:
+            async for raw in self.ws:
+                now = time.perf_counter()
+                self.stats["messages"] += 1
+                message = json.loads(raw)
+                kind = message.get("type")
+                if kind == "game_state":
+                    self.ready.set()
+                elif kind == "game_delta" and message.get("players"):
+                    # при пачках ставок в одной дельте несколько игроков
+                    for player in message["players"]:
+                        sent_at = self.stats["bets_sent_at"].get(player["id"])
+                        if sent_at is not None:
+                            self.stats["broadcast_ms"].append((now - sent_at) * 1000)
+                elif message.get("error"):
+                    self.stats["errors"][message["error"]] = self.stats["errors"].get(message["error"], 0) + 1
+        except websockets.ConnectionClosed:
+            self.stats["closed"] += 1
+
+    async def bet(self):
+        self.stats["bets_sent_at"][self.user_id] = time.perf_counter()
+        self.stats["bets"] += 1
+        await self.ws.send(json.dumps({"action": "bet", "amount": BET_AMOUNT}))
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест ws/pvp: открывает много авторизованных сокетов, ставит по расписанию '
+        'и пишет задержки подключения и рассылки, RSS на соединение и пропускную способность channel layer'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='ws://localhost:8000/ws/pvp/', help='Адрес ws/pvp')
+        parser.add_argument('--sockets', type=int, default=1000, help='Сколько сокетов открыть')
+        parser.add_argument('--connect-concurrency', type=int, default=100, help='Одновременных подключений')
+        parser.add_argument('--duration', type=int, default=60, help='Сколько секунд ставить')
+        parser.add_argument('--bet-interval', type=float, default=5.0, help='Пауза между ставками одного игрока, сек')
+        parser.add_argument('--server-pid', type=int, help='PID процесса uvicorn для замера RSS')
+        parser.add_argument('--output', default='loadtest_pvp_ws.json', help='Куда записать результат (JSON)')
+
+    def handle(self, *args, **options):
+        users = self.prepare_users(options['sockets'])
+        tokens = [(u.id, AuthService.create_access_token(u.id)) for u in users]
+
+        result = asyncio.run(self.run(tokens, options))
+        result["params"] = {
+            k: options[k] for k in ('url', 'sockets', 'connect_concurrency', 'duration', 'bet_interval')
+        }
+        result["started_at"] = datetime.now(timezone.utc).isoformat()
+        result["host"] = platform.node()
+
+        with open(options['output'], 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+        self.stdout.write(f"Подключено: {result['connected']} из {options['sockets']}")
+        self.stdout.write(f"Подключение, мс: {result['connect_ms']}")
+        self.stdout.write(f"Ставка -> рассылка, мс: {result['bet_to_broadcast_ms']}")
+        self.stdout.write(f"RSS на соединение, КБ: {result['rss_per_connection_kb']}")
+        self.stdout.write(f"Сообщений в секунду: {result['messages_per_sec']}")
+        self.stdout.write(self.style.SUCCESS(f"Результат записан в {options['output']}"))
+
+    def prepare_users(self, count):
+        telegram_ids = [LOADTEST_TELEGRAM_ID_BASE - i for i in range(count)]
+        existing = set(User.objects.filter(telegram_id__in=telegram_ids).values_list("telegram_id", flat=True))
+        User.objects.bulk_create([
+            User(telegram_id=tid, username=f"loadtest_{LOADTEST_TELEGRAM_ID_BASE - tid}")
+            for tid in telegram_ids if tid not in existing
+        ])
+        # баланс пополняем, чтобы ставки не упирались в проверку средств
+        User.objects.filter(telegram_id__in=telegram_ids).update(balance_ton=LOADTEST_BALANCE)
+        return list(User.objects.filter(telegram_id__in=telegram_ids).order_by("id"))
+
+    async def run(self, tokens, options):
+        stats = {
+            "connect_ms": [],
+            "broadcast_ms": [],
+            "bets_sent_at": {},
+            "messages": 0,
+            "bets": 0,
+            "closed": 0,
+            "errors": {},
+        }
+        clients = [Client(user_id, token, stats) for user_id, token in tokens]
+        rss_before = read_rss_kb(options['server_pid'])
+
+        semaphore = asyncio.Semaphore(options['connect_concurrency'])
+        failed = 0
+
+        async def connect(client):
+            nonlocal failed
+            async with semaphore:
+                try:
+                    await client.connect(options['url'])
+                except Exception:
+                    failed += 1
+
+        await asyncio.gather(*(connect(c) for c in clients))
+        connected = [c for c in clients if c.ready.is_set()]
+        rss_after = read_rss_kb(options['server_pid'])
+
+        # фаза ставок: каждый игрок ставит раз в bet_interval со случайным сдвигом старта
+        stats["messages"] = 0
+        started = time.perf_counter()
+        deadline = started + options['duration']
+
+        async def player(client):
+            await asyncio.sleep(random.uniform(0, options['bet_interval']))
+            while time.perf_counter() < deadline:
+                try:
+                    await client.bet()
+                except websockets.ConnectionClosed:
+                    return
+                await asyncio.sleep(options['bet_interval'])
+
+        await asyncio.gather(*(player(c) for c in connected))
+        elapsed = time.perf_counter() - started
+        closed_by_server = stats["closed"]
+
+        for client in clients:
+            if client.ws is not None:
+                await client.ws.close()
+
+        rss_per_connection = None
+        if rss_before is not None and rss_after is not None and connected:
+            rss_per_connection = round((rss_after - rss_before) / len(connected), 2)
+
+        return {
+            "connected": len(connected),
+            "connect_failed": failed,
+            "closed_by_server": closed_by_server,
+            "connect_ms": summary_ms(stats["connect_ms"]),
+            "bets": stats["bets"],
+            "bet_to_broadcast_ms": summary_ms(stats["broadcast_ms"]),
+            "messages_received": stats["messages"],
+            "messages_per_sec": round(stats["messages"] / elapsed, 1) if elapsed else None,
+            "server_rss_kb": {"before": rss_before, "after_connect": rss_after},
+            "rss_per_connection_kb": rss_per_connection,
+            "errors": stats["errors"],
+        }
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from games.services.leaderboard import Leaderboard, WINDOWS
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает лидерборды PvP (день, неделя, всё время) из истории игр'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window',
+            choices=WINDOWS,
+            help='Пересобрать только одно окно',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько игроков писать в Redis за один pipeline',
+        )
+
+    def handle(self, *args, **options):
+        windows = [options['window']] if options['window'] else WINDOWS
+        for window in windows:
+            count = Leaderboard.rebuild(window, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Лидерборд {window}: {count} игроков"))
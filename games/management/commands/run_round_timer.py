@@ -0,0 +1,11 @@
+import asyncio
+from django.core.management.base import BaseCommand
+from games.services.round_timer import RoundTimerService
+
+
+class Command(BaseCommand):
+    help = 'Запускает таймер PvP-раундов: тики для всех комнат и отправку раундов на расчёт'
+
+    def handle(self, *args, **options):
+        self.stdout.write("Таймер раундов запущен")
+        asyncio.run(RoundTimerService().run())
@@ -0,0 +1,49 @@
+# games/middleware.py
+import logging
+from urllib.parse import parse_qs
+from channels.middleware import BaseMiddleware
+from .services.auth import AuthService
+
+logger = logging.getLogger('games.middleware')
+
+# Sec-WebSocket-Protocol: access_token, <jwt>
+TOKEN_SUBPROTOCOL = "access_token"
+
+
+def get_token(scope):
+    """Токен из subprotocol (access_token, <jwt>) или из query string (?token=<jwt>)."""
+    subprotocols = scope.get("subprotocols") or []
+    if TOKEN_SUBPROTOCOL in subprotocols:
+        i = subprotocols.index(TOKEN_SUBPROTOCOL)
+        if i + 1 < len(subprotocols):
+            return subprotocols[i + 1], TOKEN_SUBPROTOCOL
+
+    query = parse_qs(scope.get("query_string", b"").decode())
+    token = query.get("token", [None])[0]
+    return token, None
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """
+    Аутентификация websocket на рукопожатии по JWT.
+    В scope["user"] кладётся UserPrincipal из кэша Redis — без сессий и без запроса в БД.
+    Без токена пользователь остаётся анонимным и может авторизоваться сообщением authenticate.
+    """
+
+    async def __call__(self, scope, receive, send):
+        from django.contrib.auth.models import AnonymousUser
+
+        scope = dict(scope)
+        scope["user"] = AnonymousUser()
+
+        token, subprotocol = get_token(scope)
+        if token:
+            principal = await AuthService.get_principal_from_token(token)
+            if principal:
+                scope["user"] = principal
+                # сервер обязан ответить выбранным subprotocol, иначе браузер закроет соединение
+                scope["auth_subprotocol"] = subprotocol
+            else:
+                logger.warning("Аутентификация на рукопожатии не удалась")
+
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:00
+
+from decimal import Decimal
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+DEFAULT_AVATAR_URL = "https://teststudiaorbita.ru/media/avatars/diamond.png"
+
+
+def backfill_summaries(apps, schema_editor):
+    """Итоги для уже завершённых PVP игр — по 500 игр за проход."""
+    Game = apps.get_model('games', 'Game')
+    PvpGameSummary = apps.get_model('games', 'PvpGameSummary')
+    avatar_default = getattr(settings, 'DEFAULT_AVATAR_URL', DEFAULT_AVATAR_URL)
+
+    games = (
+        Game.objects
+        .filter(mode='pvp', status='finished')
+        .select_related('winner')
+        .prefetch_related('players__gifts')
+        .order_by('id')
+    )
+    batch = []
+    for game in games.iterator(chunk_size=500):
+        summary = PvpGameSummary(
+            game_id=game.id,
+            hash=game.hash,
+            started_at=game.started_at,
+            # у старых игр ended_at не заполнялся
+            ended_at=game.ended_at or game.started_at,
+        )
+        winner_gp = next((p for p in game.players.all() if p.user_id == game.winner_id), None)
+        if game.winner_id and winner_gp is not None:
+            summary.winner_id = game.winner_id
+            summary.winner_username = game.winner.username
+            summary.winner_avatar_url = game.winner.avatar_url or avatar_default
+            summary.winner_total_bet_ton = winner_gp.total_bet_ton
+            summary.winner_chance_percent = winner_gp.chance_percent
+            summary.win_amount_ton = (
+                game.pot_amount_ton * (1 - game.commission_percent / Decimal('100'))
+            ).quantize(Decimal('0.01'))
+            summary.winner_gifts = [
+                {'id': g.id, 'name': g.name, 'image_url': g.image_url, 'price_ton': str(g.price_ton)}
+                for g in winner_gp.gifts.all()
+            ]
+        batch.append(summary)
+        if len(batch) >= 500:
+            PvpGameSummary.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    PvpGameSummary.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0002_initial'),
+        ('gifts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PvpGameSummary',
+            fields=[
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='games.game', verbose_name='Игра')),
+                ('hash', models.CharField(blank=True, max_length=64, null=True, verbose_name='Hash игры')),
+                ('started_at', models.DateTimeField(verbose_name='Начало')),
+                ('ended_at', models.DateTimeField(blank=True, null=True, verbose_name='Конец')),
+                ('winner_username', models.CharField(blank=True, max_length=32, null=True, verbose_name='Имя победителя')),
+                ('winner_avatar_url', models.URLField(blank=True, null=True, verbose_name='Аватар победителя')),
+                ('winner_total_bet_ton', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Ставка победителя в TON')),
+                ('winner_chance_percent', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=5, verbose_name='Шанс победителя')),
+                ('win_amount_ton', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Выигрыш за вычетом комиссии')),
+                ('winner_gifts', models.JSONField(blank=True, default=list, verbose_name='Подарки победителя')),
+                ('winner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Победитель')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-started_at'], name='pvp_summary_started_idx'), models.Index(fields=['-ended_at'], name='pvp_summary_ended_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:30
+
+from decimal import Decimal
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_history(apps, schema_editor):
+    """История игроков для уже завершённых игр — по 500 игр за проход."""
+    Game = apps.get_model('games', 'Game')
+    PlayerGameHistory = apps.get_model('games', 'PlayerGameHistory')
+
+    games = (
+        Game.objects
+        .filter(status='finished')
+        .prefetch_related('players__gifts')
+        .order_by('id')
+    )
+    batch = []
+    for game in games.iterator(chunk_size=500):
+        payout = (game.pot_amount_ton * (1 - game.commission_percent / Decimal('100'))).quantize(Decimal('0.01'))
+        for p in game.players.all():
+            won = p.user_id == game.winner_id
+            batch.append(PlayerGameHistory(
+                user_id=p.user_id,
+                game_id=game.id,
+                mode=game.mode,
+                result='win' if won else 'loss',
+                bet_ton=p.bet_ton,
+                stake_ton=p.total_bet_ton,
+                chance_percent=p.chance_percent,
+                pot_amount_ton=game.pot_amount_ton,
+                payout_ton=payout if won else Decimal('0.00'),
+                gifts=[
+                    {'id': g.id, 'name': g.name, 'image_url': g.image_url, 'price_ton': str(g.price_ton)}
+                    for g in p.gifts.all()
+                ],
+                started_at=game.started_at,
+                # у старых игр ended_at не заполнялся
+                ended_at=game.ended_at or game.started_at,
+            ))
+        if len(batch) >= 1000:
+            PlayerGameHistory.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    PlayerGameHistory.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0003_pvpgamesummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerGameHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('pvp', 'PVP рулетка'), ('spin', 'Рекламный спин'), ('daily', 'Ежедневный розыгрыш')], max_length=20, verbose_name='Режим')),
+                ('result', models.CharField(choices=[('win', 'Победа'), ('loss', 'Поражение')], max_length=10, verbose_name='Результат')),
+                ('bet_ton', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Ставка в TON напрямую')),
+                ('stake_ton', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Итоговая ставка в TON')),
+                ('chance_percent', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=5, verbose_name='Шанс победы')),
+                ('pot_amount_ton', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Банк игры')),
+                ('payout_ton', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Выигрыш за вычетом комиссии')),
+                ('gifts', models.JSONField(blank=True, default=list, verbose_name='Подарки в ставке')),
+                ('started_at', models.DateTimeField(verbose_name='Начало')),
+                ('ended_at', models.DateTimeField(verbose_name='Конец')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='games.game', verbose_name='Игра')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='game_history', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-ended_at', '-id'], name='player_history_page_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'game'), name='player_history_user_game_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_history, migrations.RunPython.noop),
+    ]
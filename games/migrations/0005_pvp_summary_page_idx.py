@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0004_playergamehistory'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pvpgamesummary',
+            name='pvp_summary_started_idx',
+        ),
+        migrations.AddIndex(
+            model_name='pvpgamesummary',
+            index=models.Index(fields=['-started_at', '-game'], name='pvp_summary_page_idx'),
+        ),
+    ]
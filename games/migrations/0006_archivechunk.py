@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0005_pvp_summary_page_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='playergamehistory',
+            name='game',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='games.game', verbose_name='Игра'),
+        ),
+        migrations.CreateModel(
+            name='ArchiveChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('game', 'Игры'), ('spin', 'Спины')], max_length=10, verbose_name='Что в файле')),
+                ('path', models.CharField(max_length=255, verbose_name='Путь в хранилище')),
+                ('first_id', models.BigIntegerField(verbose_name='Первый id')),
+                ('last_id', models.BigIntegerField(verbose_name='Последний id')),
+                ('rows', models.PositiveIntegerField(verbose_name='Строк')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'first_id', 'last_id'], name='archive_chunk_range_idx')],
+            },
+        ),
+    ]
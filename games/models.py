@@ -97,4 +97,136 @@ class GamePlayer(models.Model):
         super().save(update_fields=["total_bet_ton"])  # второй раз, только total
 
     def __str__(self):
-        return f"{self.user} в игре {self.game_id}"
\ No newline at end of file
+        return f"{self.user} в игре {self.game_id}"
+
+class PvpGameSummary(models.Model):
+    """
+    Итог завершённой PVP игры одной строкой: пишется при расчёте раунда
+    и обслуживает историю, детали игры и последнего победителя без JOIN-ов.
+    """
+    game = models.OneToOneField(
+        Game, on_delete=models.CASCADE, primary_key=True,
+        related_name="summary", verbose_name="Игра"
+    )
+    hash = models.CharField(max_length=64, blank=True, null=True, verbose_name="Hash игры")
+    started_at = models.DateTimeField(verbose_name="Начало")
+    ended_at = models.DateTimeField(blank=True, null=True, verbose_name="Конец")
+
+    winner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL,
+        related_name="+", verbose_name="Победитель"
+    )
+    winner_username = models.CharField(max_length=32, blank=True, null=True, verbose_name="Имя победителя")
+    winner_avatar_url = models.URLField(blank=True, null=True, verbose_name="Аватар победителя")
+    winner_total_bet_ton = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00"),
+        verbose_name="Ставка победителя в TON"
+    )
+    winner_chance_percent = models.DecimalField(
+        max_digits=5, decimal_places=2, default=Decimal("0.00"),
+        verbose_name="Шанс победителя"
+    )
+    win_amount_ton = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00"),
+        verbose_name="Выигрыш за вычетом комиссии"
+    )
+    # [{"id", "name", "image_url", "price_ton"}] — подарки из ставки победителя
+    winner_gifts = models.JSONField(default=list, blank=True, verbose_name="Подарки победителя")
+
+    class Meta:
+        indexes = [
+            # /games/pvp-history: keyset по (started_at, game_id)
+            models.Index(fields=["-started_at", "-game"], name="pvp_summary_page_idx"),
+            models.Index(fields=["-ended_at"], name="pvp_summary_ended_idx"),
+        ]
+
+    def __str__(self):
+        return f"Итог PVP игры {self.game_id}"
+
+
+class PlayerGameHistory(models.Model):
+    """
+    История игр пользователя: строка на каждого участника, пишется при расчёте раунда.
+    Читается страницами по индексу (user, ended_at, id) — см. GameHistoryView.
+    """
+    RESULT_CHOICES = [
+        ("win", "Победа"),
+        ("loss", "Поражение"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name="game_history", verbose_name="Пользователь"
+    )
+    # без FK-ограничения: история игрока остаётся, когда сама игра уходит в архив (GameArchive)
+    game = models.ForeignKey(
+        Game, on_delete=models.DO_NOTHING, db_constraint=False,
+        related_name="+", verbose_name="Игра"
+    )
+    mode = models.CharField(max_length=20, choices=Game.MODE_CHOICES, verbose_name="Режим")
+    result = models.CharField(max_length=10, choices=RESULT_CHOICES, verbose_name="Результат")
+
+    bet_ton = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00"),
+        verbose_name="Ставка в TON напрямую"
+    )
+    stake_ton = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00"),
+        verbose_name="Итоговая ставка в TON"
+    )
+    chance_percent = models.DecimalField(
+        max_digits=5, decimal_places=2, default=Decimal("0.00"),
+        verbose_name="Шанс победы"
+    )
+    pot_amount_ton = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00"),
+        verbose_name="Банк игры"
+    )
+    payout_ton = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00"),
+        verbose_name="Выигрыш за вычетом комиссии"
+    )
+    # [{"id", "name", "image_url", "price_ton"}] — подарки из ставки пользователя
+    gifts = models.JSONField(default=list, blank=True, verbose_name="Подарки в ставке")
+
+    started_at = models.DateTimeField(verbose_name="Начало")
+    ended_at = models.DateTimeField(verbose_name="Конец")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "game"], name="player_history_user_game_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-ended_at", "-id"], name="player_history_page_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} в игре {self.game_id}: {self.result}"
+
+
+class ArchiveChunk(models.Model):
+    """
+    Файл холодного архива — gzip JSONL в приватном archive_storage() (GAME_ARCHIVE_ROOT на диске
+    или приватный префикс S3), не в медиа: path читается только через него.
+    Завершённые игры и спины старше GAME_ARCHIVE_AFTER_DAYS выносятся туда из горячих таблиц;
+    по диапазону id детали игры читаются из файла (GameArchive.find_summary).
+    """
+    KIND_CHOICES = [
+        ("game", "Игры"),
+        ("spin", "Спины"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Что в файле")
+    path = models.CharField(max_length=255, verbose_name="Путь в хранилище")
+    first_id = models.BigIntegerField(verbose_name="Первый id")
+    last_id = models.BigIntegerField(verbose_name="Последний id")
+    rows = models.PositiveIntegerField(verbose_name="Строк")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создан")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["kind", "first_id", "last_id"], name="archive_chunk_range_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.first_id}–{self.last_id} ({self.rows})"
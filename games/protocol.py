@@ -0,0 +1,128 @@
+# games/protocol.py
+"""
+Формат кадров ws/pvp. Клиент выбирает его через Sec-WebSocket-Protocol:
+
+    pvp.msgpack.v1 — бинарные кадры msgpack, игроки и подарки записаны
+                     позиционными массивами (порядок полей — PLAYER_FIELDS / GIFT_FIELDS,
+                     клиент получает их первым сообщением type=schema)
+    pvp.json.v1    — текстовый JSON (как раньше), кодируется через orjson
+
+Без subprotocol — тот же JSON, что и раньше.
+"""
+import json
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+PLAYER_FIELDS = ("id", "username", "avatar_url", "bet_ton", "chance_percent", "gifts")
+
+GIFT_FIELDS = (
+    "id",
+    "user_username",
+    "ton_contract_address",
+    "name",
+    "image_url",
+    "price_ton",
+    "backdrop",
+    "symbol",
+    "model_name",
+    "pattern_name",
+    "model_rarity_permille",
+    "pattern_rarity_permille",
+    "backdrop_rarity_permille",
+    "model_original_details",
+    "pattern_original_details",
+    "backdrop_original_details",
+    "rarity_level",
+)
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Тип {type(obj).__name__} не сериализуется")
+
+
+def gift_row(gift):
+    return [gift.get(f) for f in GIFT_FIELDS]
+
+
+def player_row(player):
+    row = [player.get(f) for f in PLAYER_FIELDS]
+    if player.get("gifts") is not None:
+        row[-1] = [gift_row(g) for g in player["gifts"]]
+    return row
+
+
+def compact(message):
+    """Заменяет словари игроков и подарков на позиционные массивы."""
+    message = dict(message)
+    if "players" in message:
+        message["players"] = [player_row(p) for p in message["players"]]
+    if message.get("player_joined"):
+        message["player_joined"] = player_row(message["player_joined"])
+    for key in ("gifts_added", "winner_gifts"):
+        if message.get(key):
+            message[key] = [gift_row(g) for g in message[key]]
+    return message
+
+
+class JsonCodec:
+    name = "json"
+    subprotocol = "pvp.json.v1"
+    binary = False
+
+    @staticmethod
+    def dumps(message):
+        if orjson is not None:
+            return orjson.dumps(message, default=_default).decode()
+        return json.dumps(message, default=_default)
+
+    @staticmethod
+    def loads(data):
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+
+class MsgpackCodec:
+    name = "msgpack"
+    subprotocol = "pvp.msgpack.v1"
+    binary = True
+
+    @staticmethod
+    def dumps(message):
+        return msgpack.packb(compact(message), default=_default)
+
+    @staticmethod
+    def loads(data):
+        return msgpack.unpackb(data)
+
+    @staticmethod
+    def schema():
+        return {"type": "schema", "player": list(PLAYER_FIELDS), "gift": list(GIFT_FIELDS)}
+
+
+# в порядке предпочтения сервера
+CODECS = [JsonCodec]
+if msgpack is not None:
+    CODECS.insert(0, MsgpackCodec)
+CODECS_BY_NAME = {c.name: c for c in CODECS}
+
+
+def negotiate(subprotocols):
+    """Возвращает (codec, subprotocol для ответа или None)."""
+    offered = set(subprotocols or [])
+    for codec in CODECS:
+        if codec.subprotocol in offered:
+            return codec, codec.subprotocol
+    return JsonCodec, None
@@ -0,0 +1,103 @@
+# games/send_queue.py
+import time
+import asyncio
+import logging
+from collections import deque
+
+
+logger = logging.getLogger('games.send_queue')
+
+# сокет уже закрыт или транспорт оборвался — дальше слать некуда
+TRANSPORT_ERRORS = (OSError, RuntimeError)
+
+
+class SendQueue:
+    """
+    Исходящая очередь одного сокета.
+    Сообщения с ключом схлопываются: новый game_state заменяет ещё не отправленный старый,
+    новый timer_update — старый. Остальные (дельты, game_finished) идут по порядку.
+    Кодирование происходит в момент отправки, поэтому вытесненные снапшоты не сериализуются вовсе.
+
+    Если очередь дольше grace секунд держится выше max_backlog (или вырастает вдвое),
+    вызывается on_overflow — сокет отключаем, клиент переподключится и получит свежий снапшот.
+
+    Ошибка отправки одного сообщения (например, кодирования) логируется, очередь идёт дальше.
+    На ошибке транспорта очередь останавливается и вызывает on_closed — сокет закрываем.
+    """
+
+    def __init__(self, deliver, on_overflow, max_backlog, grace, on_closed=None):
+        self._deliver = deliver
+        self._on_overflow = on_overflow
+        self._on_closed = on_closed
+        self.max_backlog = max_backlog
+        self.grace = grace
+
+        self._items = deque()     # [key, message]
+        self._keyed = {}          # key -> элемент очереди
+        self._over_since = None
+        self._event = asyncio.Event()
+        self.overflowed = False
+        self._task = asyncio.create_task(self._run())
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, message, key=None):
+        if self.overflowed:
+            return
+
+        if key is not None and key in self._keyed:
+            # более свежее состояние на месте старого
+            self._keyed[key][1] = message
+            return
+
+        item = [key, message]
+        self._items.append(item)
+        if key is not None:
+            self._keyed[key] = item
+        self._event.set()
+        self._check_backlog()
+
+    def _check_backlog(self):
+        backlog = len(self._items)
+        if backlog <= self.max_backlog:
+            self._over_since = None
+            return
+
+        now = time.monotonic()
+        if self._over_since is None:
+            self._over_since = now
+        if backlog > self.max_backlog * 2 or now - self._over_since > self.grace:
+            self.overflowed = True
+            self._items.clear()
+            self._keyed.clear()
+            self._on_overflow(backlog)
+
+    async def _run(self):
+        while True:
+            await self._event.wait()
+            while self._items:
+                key, message = self._items.popleft()
+                if key is not None:
+                    self._keyed.pop(key, None)
+                try:
+                    await self._deliver(message)
+                except TRANSPORT_ERRORS as e:
+                    logger.warning(f"Сокет недоступен, очередь остановлена: {e!r}")
+                    self._items.clear()
+                    self._keyed.clear()
+                    if self._on_closed is not None:
+                        self._on_closed(e)
+                    return
+                except Exception:
+                    logger.exception(f"Не удалось отправить сообщение {message.get('type')!r}")
+            self._over_since = None
+            self._event.clear()
+
+    async def close(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, Exception):
+            # ошибка отправки в уже закрытый сокет — дальше слать некуда
+            pass
@@ -0,0 +1,98 @@
+import time
+import asyncio
+import logging
+from core import constants
+from core.metrics import Metrics
+from games.services.db import db_async, db_latency
+
+
+logger = logging.getLogger('games.services.admission')
+
+# как часто перечитывать пороги из core.Config
+LIMITS_TTL = 30.0
+
+DEFAULT_LIMITS = {
+    "max_inflight": 200,
+    "max_db_latency_ms": 250,
+    "retry_after_ms": 1000,
+}
+
+
+class AdmissionController:
+    """
+    Допуск ставок в процессе: сколько ставок сейчас в обработке и какова свежая задержка БД.
+    Выше порога новые ставки сразу отклоняются с retry_after, а не копятся в очереди к БД.
+    Пороги — core.Config (pvp_max_inflight_bets, pvp_max_db_latency_ms, pvp_shed_retry_after_ms).
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.limits = dict(DEFAULT_LIMITS)
+        self._limits_at = 0.0
+        self._refreshing = False
+
+    @staticmethod
+    def _load_limits():
+        from core.models import Config
+
+        return {
+            "max_inflight": Config.get(constants.PVP_MAX_INFLIGHT_BETS, DEFAULT_LIMITS["max_inflight"], int),
+            "max_db_latency_ms": Config.get(constants.PVP_MAX_DB_LATENCY_MS, DEFAULT_LIMITS["max_db_latency_ms"], float),
+            "retry_after_ms": Config.get(constants.PVP_SHED_RETRY_AFTER_MS, DEFAULT_LIMITS["retry_after_ms"], int),
+        }
+
+    async def _refresh(self):
+        try:
+            self.limits = await db_async(self._load_limits)()
+        except Exception as e:
+            logger.error(f"Не удалось прочитать пороги допуска ставок: {e}")
+        finally:
+            self._limits_at = time.monotonic()
+            self._refreshing = False
+
+    def _maybe_refresh(self):
+        # пороги обновляем в фоне, ставка не ждёт запроса к Config
+        if not self._refreshing and time.monotonic() - self._limits_at > LIMITS_TTL:
+            self._refreshing = True
+            asyncio.create_task(self._refresh())
+
+    async def admit(self):
+        """
+        Возвращает (True, 0), если ставку можно обрабатывать (не забыть release()),
+        иначе (False, retry_after_ms).
+        """
+        self._maybe_refresh()
+        limits = self.limits
+
+        reason = None
+        if self.in_flight >= limits["max_inflight"]:
+            reason = "inflight"
+        elif db_latency.current_ms() > limits["max_db_latency_ms"]:
+            reason = "db_latency"
+
+        if reason:
+            logger.warning(
+                f"Ставка отклонена ({reason}): в обработке {self.in_flight}, "
+                f"задержка БД {db_latency.current_ms():.0f} мс"
+            )
+            await self._count("shed", reason)
+            return False, limits["retry_after_ms"]
+
+        await self._count("admit", "ok")
+        # слот занимаем последним: после этой строки вызывающий гарантированно получит (True, 0)
+        self.in_flight += 1
+        return True, 0
+
+    @staticmethod
+    async def _count(decision, reason):
+        # без Redis ставки всё равно принимаются и отклоняются — теряется только счётчик
+        try:
+            await Metrics.ainc("pvp_bet_admission_total", decision=decision, reason=reason)
+        except Exception as e:
+            logger.warning(f"Не удалось записать метрику допуска ставки: {e}")
+
+    def release(self):
+        self.in_flight -= 1
+
+
+admission = AdmissionController()
@@ -0,0 +1,141 @@
+import gzip
+import json
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from core.events import to_payload, from_payload
+
+
+logger = logging.getLogger('games.services.archive')
+
+# один файл — одна пачка: {kind}/{месяц окончания первой строки}/{kind}-{first_id}-{last_id}.jsonl.gz
+ARCHIVE_PATH = "{kind}/{month}/{kind}-{first_id}-{last_id}.jsonl.gz"
+
+
+def archive_storage():
+    """
+    Отдельное приватное хранилище: в архиве ставки и id игроков,
+    а медиа (MEDIA_ROOT / S3 с public-read) раздаётся наружу.
+    """
+    if settings.USE_S3:
+        from storages.backends.s3boto3 import S3Boto3Storage
+
+        return S3Boto3Storage(location=settings.GAME_ARCHIVE_LOCATION, default_acl="private", querystring_auth=True)
+    return FileSystemStorage(location=settings.GAME_ARCHIVE_ROOT)
+
+
+class GameArchive:
+    """
+    Холодный архив завершённых игр и спинов: строки старше GAME_ARCHIVE_AFTER_DAYS пачками
+    пишутся в gzip JSONL и удаляются из games_game / games_gameplayer (+ подарки ставок,
+    PvpGameSummary) и spin_spingame. История игроков (PlayerGameHistory) и лидерборды
+    от этих таблиц не зависят и остаются горячими.
+    """
+
+    @staticmethod
+    def _write(storage, kind, records, first_id, last_id, moment):
+        lines = "".join(json.dumps(record, cls=DjangoJSONEncoder) + "\n" for record in records)
+        path = ARCHIVE_PATH.format(kind=kind, month=moment.strftime("%Y-%m"), first_id=first_id, last_id=last_id)
+        return storage.save(path, ContentFile(gzip.compress(lines.encode())))
+
+    @staticmethod
+    def _read(path):
+        with archive_storage().open(path, "rb") as f:
+            with gzip.open(f, "rt") as lines:
+                for line in lines:
+                    yield json.loads(line)
+
+    @staticmethod
+    def _game_records(games):
+        """Игра, её игроки с id подарков ставки и итог PvpGameSummary — одной записью."""
+        from games.models import GamePlayer, PvpGameSummary
+
+        game_ids = [game.id for game in games]
+        players = list(GamePlayer.objects.filter(game_id__in=game_ids).order_by("id"))
+        gift_ids = {}
+        rows = GamePlayer.gifts.through.objects.filter(gameplayer_id__in=[p.id for p in players])
+        for player_id, gift_id in rows.values_list("gameplayer_id", "gift_id"):
+            gift_ids.setdefault(player_id, []).append(gift_id)
+        summaries = {s.game_id: s for s in PvpGameSummary.objects.filter(game_id__in=game_ids)}
+
+        players_by_game = {}
+        for player in players:
+            players_by_game.setdefault(player.game_id, []).append(
+                {**to_payload(player), "gift_ids": gift_ids.get(player.id, [])}
+            )
+        return [
+            {
+                "game": to_payload(game),
+                "players": players_by_game.get(game.id, []),
+                "summary": to_payload(summaries[game.id]) if game.id in summaries else None,
+            }
+            for game in games
+        ]
+
+    @staticmethod
+    def _archive(kind, queryset, moment_field, records, batch_size):
+        """Выносит queryset пачками по id; файл пишется до удаления строк, поэтому сбой не теряет данных."""
+        from games.models import ArchiveChunk
+
+        storage = archive_storage()
+        total = 0
+        while True:
+            batch = list(queryset.order_by("id")[:batch_size])
+            if not batch:
+                return total
+
+            first_id, last_id = batch[0].id, batch[-1].id
+            path = GameArchive._write(
+                storage, kind, records(batch), first_id, last_id, getattr(batch[0], moment_field),
+            )
+            with transaction.atomic():
+                ArchiveChunk.objects.create(kind=kind, path=path, first_id=first_id, last_id=last_id, rows=len(batch))
+                queryset.model.objects.filter(id__in=[row.id for row in batch]).delete()
+            total += len(batch)
+            logger.info(f"Архив {kind}: {len(batch)} строк ({first_id}–{last_id}) -> {path}")
+
+    @staticmethod
+    def archive_games(days=None, batch_size=None):
+        """Завершённые игры, закончившиеся раньше, чем days дней назад. Возвращает число игр."""
+        from games.models import Game
+
+        cutoff = timezone.now() - timedelta(days=days or settings.GAME_ARCHIVE_AFTER_DAYS)
+        # у старых игр ended_at не заполнен — берём время начала
+        games = (
+            Game.objects.annotate(finished_at=Coalesce("ended_at", "started_at"))
+            .filter(status="finished", finished_at__lt=cutoff)
+        )
+        return GameArchive._archive(
+            "game", games, "finished_at", GameArchive._game_records, batch_size or settings.GAME_ARCHIVE_BATCH,
+        )
+
+    @staticmethod
+    def archive_spins(days=None, batch_size=None):
+        from spin.models import SpinGame
+
+        cutoff = timezone.now() - timedelta(days=days or settings.GAME_ARCHIVE_AFTER_DAYS)
+        spins = SpinGame.objects.filter(played_at__lt=cutoff)
+        return GameArchive._archive(
+            "spin", spins, "played_at", lambda batch: [to_payload(spin) for spin in batch],
+            batch_size or settings.GAME_ARCHIVE_BATCH,
+        )
+
+    @staticmethod
+    def find_summary(game_id):
+        """PvpGameSummary архивной игры (не сохранён) или None."""
+        from games.models import ArchiveChunk, PvpGameSummary
+
+        chunks = ArchiveChunk.objects.filter(kind="game", first_id__lte=game_id, last_id__gte=game_id).order_by("-id")
+        for chunk in chunks:
+            for record in GameArchive._read(chunk.path):
+                if record["game"]["id"] == game_id:
+                    if record["summary"] is None:
+                        return None
+                    return from_payload(PvpGameSummary, record["summary"])
+        return None
@@ -90,4 +90,38 @@ class AuthService:
             return None
         except Exception as e:
             logger.error(f"Неожиданная ошибка при аутентификации: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def decode_user_id(token):
+        """user_id из access-токена или None. Без обращений к БД."""
+        import jwt
+        from django.conf import settings
+
+        try:
+            payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        except jwt.ExpiredSignatureError:
+            logger.warning("Токен истек")
+            return None
+        except jwt.InvalidTokenError as e:
+            logger.warning(f"Невалидный токен: {str(e)}")
+            return None
+        return payload.get("user_id")
+
+    @staticmethod
+    async def get_principal_from_token(token):
+        """
+        Лёгкий пользователь (UserPrincipal) по токену из кэша в Redis.
+        В БД идём только при промахе кэша.
+        """
+        from user.services.principal import PrincipalCache
+
+        user_id = AuthService.decode_user_id(token)
+        if not user_id:
+            return None
+
+        principal = await sync_to_async(PrincipalCache.get, thread_sensitive=False)(user_id)
+        if not principal or not principal.is_active:
+            logger.warning(f"Пользователь {user_id} не найден или деактивирован")
+            return None
+        return principal
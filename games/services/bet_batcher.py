@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from games.services.db import db_async
+from games.services.bet_service import BetService, BET_ERRORS
+from games.services.live_round import LiveRoundStore, LiveRoundError, to_cents
+from gifts.models import Gift
+
+
+logger = logging.getLogger('games.services.bet_batcher')
+
+
+def _resolve(future, result=None, error=None):
+    # сокет мог отключиться, пока пачка ждала окна
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class PendingBet:
+    __slots__ = ("user", "ton_cents", "gift_ids", "future")
+
+    def __init__(self, user, ton_cents, gift_ids, future):
+        self.user = user
+        self.ton_cents = ton_cents
+        self.gift_ids = gift_ids
+        self.future = future
+
+
+class RoomBetBatcher:
+    """
+    Копит ставки одной комнаты в течение окна (PVP_BET_BATCH_WINDOW_MS) и применяет их пачкой:
+    балансы и подарки всей пачки читаются одним запросом к БД, ставки пишутся
+    в живой раунд одним вызовом BET_LUA, и на пачку уходит одна дельта.
+    """
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.pending = []
+        self.task = None
+
+    def submit(self, user, ton_cents=0, gift_ids=()):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(PendingBet(user, ton_cents, gift_ids, future))
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+        return future
+
+    async def run(self):
+        try:
+            await asyncio.sleep(settings.PVP_BET_BATCH_WINDOW_MS / 1000)
+            # ставки, пришедшие пока применялась пачка, уже отстояли своё — берём сразу
+            while self.pending:
+                batch = self.pending[:settings.PVP_BET_BATCH_MAX]
+                del self.pending[:len(batch)]
+                await self.apply(batch)
+        finally:
+            self.task = None
+            if _batchers.get(self.game_id) is self and not self.pending:
+                del _batchers[self.game_id]
+
+    async def apply(self, batch):
+        try:
+            balances, gifts = await db_async(BetBatcher.load)(batch)
+        except Exception as e:
+            logger.exception(f"Не удалось загрузить данные пачки ставок комнаты {self.game_id}")
+            for item in batch:
+                _resolve(item.future, error=e)
+            return
+
+        bets, items = [], []
+        for item in batch:
+            if item.gift_ids:
+                owned = [gifts.get(gift_id) for gift_id in set(item.gift_ids)]
+                if not all(g is not None and g.user_id == item.user.id for g in owned):
+                    _resolve(item.future, error=ValidationError("Некоторые подарки недоступны для ставки"))
+                    continue
+                bets.append((item.user, 0, owned, -1))
+            else:
+                bets.append((item.user, item.ton_cents, (), balances.get(item.user.id, 0)))
+            items.append(item)
+
+        if not bets:
+            return
+        try:
+            delta, codes = await LiveRoundStore.aplace_bets(self.game_id, bets)
+        except LiveRoundError as e:
+            for item in items:
+                _resolve(item.future, error=ValidationError(BET_ERRORS[e.code]))
+            return
+        except Exception as e:
+            for item in items:
+                _resolve(item.future, error=e)
+            return
+
+        logger.debug(f"Комната {self.game_id}: пачка из {len(bets)} ставок, принято {codes.count(1)}")
+        # дельту пачки рассылает один сокет — первый, чья ставка принята; остальные получают None
+        leader = True
+        for item, code in zip(items, codes):
+            if code < 0:
+                _resolve(item.future, error=ValidationError(BET_ERRORS[code]))
+            else:
+                _resolve(item.future, delta if leader else None)
+                leader = False
+
+
+_batchers = {}
+
+
+class BetBatcher:
+    """
+    Ставки websocket-консьюмера через пачки комнаты (в пределах процесса).
+    Возвращают дельту пачки, если этот сокет должен её разослать, иначе None;
+    ошибки ставки — ValidationError, как у BetService.
+    """
+
+    @staticmethod
+    def load(batch):
+        """Балансы и подарки всей пачки — по одному запросу."""
+        user_ids = {item.user.id for item in batch if not item.gift_ids}
+        gift_ids = {gift_id for item in batch for gift_id in item.gift_ids}
+
+        balances = {}
+        if user_ids:
+            rows = get_user_model().objects.filter(id__in=user_ids).values_list("id", "balance_ton")
+            balances = {user_id: to_cents(balance) for user_id, balance in rows}
+        gifts = {}
+        if gift_ids:
+            gifts = {g.id: g for g in Gift.objects.filter(id__in=gift_ids)}
+        return balances, gifts
+
+    @staticmethod
+    def room(game_id):
+        batcher = _batchers.get(game_id)
+        if batcher is None:
+            batcher = _batchers[game_id] = RoomBetBatcher(game_id)
+        return batcher
+
+    @staticmethod
+    async def place_bet_ton(user, game_id, amount):
+        amount_cents = BetService._amount_cents(amount)
+        return await BetBatcher.room(game_id).submit(user, ton_cents=amount_cents)
+
+    @staticmethod
+    async def place_bet_gifts(user, game_id, gift_ids):
+        try:
+            gift_ids = list({int(gift_id) for gift_id in gift_ids})
+        except (TypeError, ValueError):
+            raise ValidationError("Некоторые подарки недоступны для ставки")
+        if not gift_ids:
+            raise ValidationError("Не выбраны подарки для ставки")
+        return await BetBatcher.room(game_id).submit(user, gift_ids=gift_ids)
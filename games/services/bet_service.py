@@ -1,82 +1,109 @@
+from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import transaction
-from games.models import Game, GamePlayer
+from games.services.db import db_async
+from games.services.live_round import (
+    LiveRoundStore,
+    LiveRoundError,
+    ERR_NO_ROOM,
+    ERR_CLOSED,
+    ERR_GIFT_LOCKED,
+    ERR_NO_FUNDS,
+    to_cents,
+)
 from gifts.models import Gift
 from decimal import Decimal
 
 
-class BetService:
-
-    @staticmethod
-    @transaction.atomic
-    def place_bet_gifts(user, game_id, gift_ids: list[int]):
-        """
-        gift_ids = список Gift.id, которые юзер ставит (каждый Gift уникален)
-        """
-        try:
-            game = (
-                Game.objects
-                .select_for_update()
-                .get(id=game_id)
-            )
-        except Game.DoesNotExist:
-            raise ValidationError("Игра недоступна")
+BET_ERRORS = {
+    ERR_NO_ROOM: "Игра недоступна",
+    ERR_CLOSED: "Игра уже завершена, ставки не принимаются",
+    ERR_GIFT_LOCKED: "Некоторые подарки уже участвуют в игре",
+    ERR_NO_FUNDS: "Недостаточно средств на балансе",
+}
 
-        if game.status == "finished":
-            raise ValidationError("Игра уже завершена, ставки не принимаются")
 
-        gp, _ = GamePlayer.objects.get_or_create(game=game, user=user)
+class BetService:
+    """
+    Ставки пишутся в живой раунд в Redis (LiveRoundStore) без блокировки строки Game.
+    В БД ставки попадают один раз — при расчёте раунда.
+    Все методы возвращают дельту состояния комнаты для рассылки клиентам;
+    aplace_* — async-варианты для websocket-консьюмера.
+    """
 
-        total_added = Decimal("0.00")
+    @staticmethod
+    def _owned_gifts(user, gift_ids):
+        gift_ids = list(set(gift_ids))
+        if not gift_ids:
+            raise ValidationError("Не выбраны подарки для ставки")
 
         # достаём подарки, которые реально у юзера
-        gifts = Gift.objects.select_for_update().filter(id__in=gift_ids, user=user)
+        gifts = list(Gift.objects.filter(id__in=gift_ids, user_id=user.id))
 
-        if gifts.count() != len(gift_ids):
+        if len(gifts) != len(gift_ids):
             raise ValidationError("Некоторые подарки недоступны для ставки")
-
-        # просто привязываем подарки к игроку в игре
-        for gift in gifts:
-            gp.gifts.add(gift)
-            total_added += gift.price_ton
-
-        # пересчёт общей ставки игрока
-        gp.recalc_total()
-        gp.save(update_fields=["total_bet_ton"])
-
-        return gp
+        return gifts
 
     @staticmethod
-    @transaction.atomic
-    def place_bet_ton(user, game_id, amount: Decimal):
-        try:
-            game = (
-                Game.objects
-                .select_for_update()
-                .get(id=game_id)
-            )
-        except Game.DoesNotExist:
-            raise ValidationError("Игра недоступна")
+    def _balance_cents(user):
+        # user в сокете — UserPrincipal без баланса, актуальный баланс читаем из БД
+        balance = (
+            get_user_model().objects
+            .filter(id=user.id)
+            .values_list("balance_ton", flat=True)
+            .first()
+        )
+        return to_cents(balance)
 
-        if game.status == "finished":
-            raise ValidationError("Игра уже завершена, ставки не принимаются")
-
-        if amount <= 0:
+    @staticmethod
+    def _amount_cents(amount):
+        amount_cents = to_cents(amount)
+        if amount_cents <= 0:
             raise ValidationError("Ставка должна быть больше нуля")
+        return amount_cents
 
-        gp, _ = GamePlayer.objects.get_or_create(game=game, user=user)
+    @staticmethod
+    def place_bet_gifts(user, game_id, gift_ids: list[int]):
+        """
+        gift_ids = список Gift.id, которые юзер ставит (каждый Gift уникален)
+        """
+        gifts = BetService._owned_gifts(user, gift_ids)
+        try:
+            return LiveRoundStore.place_bet(game_id, user, gifts=gifts)
+        except LiveRoundError as e:
+            raise ValidationError(BET_ERRORS[e.code])
 
-        # проверка баланса
-        if user.balance_ton < amount:
-            raise ValidationError("Недостаточно средств на балансе")
+    @staticmethod
+    async def aplace_bet_gifts(user, game_id, gift_ids: list[int]):
+        gifts = await db_async(BetService._owned_gifts)(user, gift_ids)
+        try:
+            return await LiveRoundStore.aplace_bet(game_id, user, gifts=gifts)
+        except LiveRoundError as e:
+            raise ValidationError(BET_ERRORS[e.code])
 
-        # списываем баланс
-        # user.balance_ton -= amount
-        # user.save(update_fields=["balance_ton"])
+    @staticmethod
+    def place_bet_ton(user, game_id, amount: Decimal):
+        amount_cents = BetService._amount_cents(amount)
 
-        # добавляем к ставке
-        gp.bet_ton += amount
-        gp.recalc_total()
-        gp.save(update_fields=["bet_ton", "total_bet_ton"])
+        # проверка баланса: ставки списываются при расчёте,
+        # поэтому сумма всех TON-ставок игрока в раунде не должна превышать баланс
+        try:
+            return LiveRoundStore.place_bet(
+                game_id, user,
+                ton_cents=amount_cents,
+                balance_cents=BetService._balance_cents(user),
+            )
+        except LiveRoundError as e:
+            raise ValidationError(BET_ERRORS[e.code])
 
-        return gp
+    @staticmethod
+    async def aplace_bet_ton(user, game_id, amount: Decimal):
+        amount_cents = BetService._amount_cents(amount)
+        balance_cents = await db_async(BetService._balance_cents)(user)
+        try:
+            return await LiveRoundStore.aplace_bet(
+                game_id, user,
+                ton_cents=amount_cents,
+                balance_cents=balance_cents,
+            )
+        except LiveRoundError as e:
+            raise ValidationError(BET_ERRORS[e.code])
@@ -0,0 +1,48 @@
+import time
+from channels.db import database_sync_to_async
+
+
+class DbLatency:
+    """
+    Скользящая средняя задержки ORM-вызовов горячего пути в этом процессе.
+    Старые замеры не учитываются: без свежих запросов считаем, что БД в порядке.
+    """
+
+    ALPHA = 0.2
+    WINDOW_SECONDS = 10.0
+
+    def __init__(self):
+        self.avg_ms = 0.0
+        self.observed_at = 0.0
+
+    def observe(self, seconds):
+        self.avg_ms = self.ALPHA * seconds * 1000 + (1 - self.ALPHA) * self.avg_ms
+        self.observed_at = time.monotonic()
+
+    def current_ms(self):
+        if time.monotonic() - self.observed_at > self.WINDOW_SECONDS:
+            return 0.0
+        return self.avg_ms
+
+
+db_latency = DbLatency()
+
+
+def db_async(func):
+    """
+    ORM-вызов из async-кода в общем пуле потоков.
+    С thread_sensitive=True (по умолчанию) все сокеты процесса ждут один поток,
+    здесь запросы разных сокетов идут параллельно, у каждого потока своё соединение с БД.
+    database_sync_to_async закрывает устаревшие соединения вокруг вызова.
+    Время каждого вызова попадает в db_latency (для допуска ставок).
+    """
+    call = database_sync_to_async(func, thread_sensitive=False)
+
+    async def timed(*args, **kwargs):
+        started = time.monotonic()
+        try:
+            return await call(*args, **kwargs)
+        finally:
+            db_latency.observe(time.monotonic() - started)
+
+    return timed
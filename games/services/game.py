@@ -2,74 +2,87 @@ import random
 import logging
 from decimal import Decimal
 from django.db import transaction
+from django.db.models import F, Case, When, Value, DecimalField
 from django.conf import settings
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext as _
+from games.services.live_round import LiveRoundStore, LiveRoundError, from_cents
+from games.services.round_timer import RoundTimer
+from games.services.db import db_async
+from games.services.presence import Presence
+from core.events import Outbox, ROUND_SETTLED, to_payload, from_payload
 
 
 r = settings.REDIS_CLIENT
 logger = logging.getLogger('games.services.game')
 
+ROUND_DURATION = 40
+
+
 class GameService:
     @staticmethod
     def find_user_game(user):
-        from games.models import GamePlayer
-        gp = (
-            GamePlayer.objects
-            .filter(user=user, game__status__in=["waiting", "running"])
-            .first()
-        )
-        if gp:
-            logger.info(f"Найдена активная игра {gp.game.id} для пользователя {user.username}")
+        game_id = LiveRoundStore.get_user_room(user.id)
+        if game_id:
+            logger.info(f"Найдена активная игра {game_id} для пользователя {user.username}")
         else:
             logger.info(f"Активных игр не найдено для пользователя {user.username}")
-        return gp.game.id if gp else None
+        return game_id
 
     @staticmethod
-    def ensure_player_in_game(user, game_id):
-        from games.models import Game, GamePlayer
-        game = Game.objects.get(id=game_id)
+    async def afind_user_game(user):
+        game_id = await LiveRoundStore.aget_user_room(user.id)
+        if game_id:
+            logger.info(f"Найдена активная игра {game_id} для пользователя {user.username}")
+        else:
+            logger.info(f"Активных игр не найдено для пользователя {user.username}")
+        return game_id
 
+    @staticmethod
+    def ensure_player_in_game(user, game_id):
+        """Возвращает дельту player_joined, если игрок только что добавлен."""
         # Не добавляем игрока в завершённую игру
-        if game.status == "finished":
+        try:
+            joined = LiveRoundStore.join(game_id, user)
+        except LiveRoundError:
             logger.warning(f"Попытка добавить пользователя {user.username} в завершенную игру {game_id}")
-            return
+            return None
 
-        if not GamePlayer.objects.filter(game=game, user=user).exists():
-            GamePlayer.objects.create(
-                game=game,
-                user=user,
-                bet_ton=Decimal("0.00")
-            )
+        if joined:
+            logger.info(f"Пользователь {user.username} добавлен в игру {game_id}")
+        else:
+            logger.info(f"Пользователь {user.username} уже в игре {game_id}")
+        return joined
+
+    @staticmethod
+    async def aensure_player_in_game(user, game_id):
+        try:
+            joined = await LiveRoundStore.ajoin(game_id, user)
+        except LiveRoundError:
+            logger.warning(f"Попытка добавить пользователя {user.username} в завершенную игру {game_id}")
+            return None
+
+        if joined:
             logger.info(f"Пользователь {user.username} добавлен в игру {game_id}")
         else:
             logger.info(f"Пользователь {user.username} уже в игре {game_id}")
+        return joined
 
     @staticmethod
     def get_or_create_game_and_player(user):
-        from games.models import Game, GamePlayer
-        with transaction.atomic():
-            game = (
-                Game.objects
-                .filter(status="waiting", mode="pvp")
-                .select_for_update()
-                .first()
-            )
-            if not game:
-                game = Game.objects.create(mode="pvp", status="waiting")
-                logger.info(f"Создана новая игра {game.id} для пользователя {user.username}")
-            else:
-                logger.info(f"Найдена ожидающая игра {game.id} для пользователя {user.username}")
-
-            if not GamePlayer.objects.filter(game=game, user=user).exists():
-                GamePlayer.objects.create(
-                    game=game,
-                    user=user,
-                    bet_ton=Decimal("0.00"),
-                )
-                logger.info(f"Пользователь {user.username} добавлен в игру {game.id}")
+        """Подбор комнаты через лобби в Redis — без select_for_update на ожидающей игре."""
+        from games.services.matchmaking import MatchmakingService
+
+        game_id, joined = MatchmakingService.assign(user)
+        return game_id, f"pvp_{game_id}", joined
+
+    @staticmethod
+    async def aget_or_create_game_and_player(user):
+        from games.services.matchmaking import MatchmakingService
 
-        return game.id, f"pvp_{game.id}"
+        game_id, joined = await MatchmakingService.aassign(user)
+        return game_id, f"pvp_{game_id}", joined
 
     @staticmethod
     def update_bet(user, amount, game_id):
@@ -91,52 +104,64 @@ class GameService:
         GamePlayer.objects.filter(game_id=game_id, user=user).update(bet_ton=amount)
 
     @staticmethod
-    def calc_and_save_pot_chances(game_id):
-        from games.models import Game, GamePlayer
-        from games.tasks import start_timer_task, send_timer_task, finish_game_task
-
-        game = Game.objects.prefetch_related("players__gifts").get(id=game_id)
+    def start_round_if_ready(game_id):
+        """
+        Запускает таймер раунда, когда ставки сделали хотя бы два игрока.
+        Возвращает дедлайн раунда и дельту смены статуса или None, если таймер не стартовал.
+        """
+        from games.models import Game
 
-        # Пересчитываем total_bet_ton для каждого игрока
-        total_bet = Decimal("0.00")
-        for p in game.players.all():
-            p.recalc_total()
-            p.save(update_fields=["total_bet_ton"])  # сохраняем пересчитанное значение
-            total_bet += p.total_bet_ton
+        # === Проверка условий старта таймера ===
+        if LiveRoundStore.count_staked_players(game_id) < 2:
+            return None
 
-        # Считаем шансы
-        for p in game.players.all():
-            chance = (p.total_bet_ton / total_bet * 100) if total_bet > 0 else 0
-            GamePlayer.objects.filter(id=p.id).update(chance_percent=chance)
+        # переход waiting -> running атомарный, таймер стартует ровно один раз
+        version = LiveRoundStore.transition(game_id, "waiting", "running")
+        if not version:
+            return None
 
-        # Обновляем банк игры
-        game.pot_amount_ton = total_bet
-        game.save(update_fields=["pot_amount_ton"])
+        Game.objects.filter(id=game_id).update(status="running")
 
-        # === Проверка условий старта таймера ===
-        active_players_count = GamePlayer.objects.filter(
-            game_id=game_id,
-            total_bet_ton__gt=0
-        ).count()
+        # отсчёт и завершение игры ведёт RoundTimerService
+        return {
+            "deadline": RoundTimer.schedule(game_id, ROUND_DURATION),
+            "delta": {"game_id": int(game_id), "seq": version, "status": "running"},
+        }
 
-        if active_players_count >= 2 and game.status != "finished":
-            timer_key = f"game_timer:{game_id}"
-            if not r.exists(timer_key):
-                r.set(timer_key, "running", ex=40)
+    @staticmethod
+    async def astart_round_if_ready(game_id):
+        from games.models import Game
 
-                Game.objects.filter(id=game_id).update(status="running")
+        if await LiveRoundStore.acount_staked_players(game_id) < 2:
+            return None
 
-                # Сообщаем, что пошёл таймер
-                start_timer_task.apply_async(args=[game_id, 40])
+        version = await LiveRoundStore.atransition(game_id, "waiting", "running")
+        if not version:
+            return None
 
-                # Запуск секундомера
-                send_timer_task.apply_async(args=[game_id, 40])
+        await db_async(Game.objects.filter(id=game_id).update)(status="running")
 
-                # Завершение игры
-                finish_game_task.apply_async(args=[game_id], countdown=40)
+        return {
+            "deadline": await RoundTimer.aschedule(game_id, ROUND_DURATION),
+            "delta": {"game_id": int(game_id), "seq": version, "status": "running"},
+        }
 
     @staticmethod
     def get_game_state(game_id):
+        snapshot = LiveRoundStore.load(game_id)
+        if snapshot is not None:
+            return LiveRoundStore.build_state(game_id, snapshot)
+        return GameService.get_game_state_from_db(game_id)
+
+    @staticmethod
+    async def aget_game_state(game_id):
+        snapshot = await LiveRoundStore.aload(game_id)
+        if snapshot is not None:
+            return LiveRoundStore.build_state(game_id, snapshot)
+        return await db_async(GameService.get_game_state_from_db)(game_id)
+
+    @staticmethod
+    def get_game_state_from_db(game_id):
         from games.models import Game
         game = Game.objects.prefetch_related("players__user", "players__gifts").get(id=game_id)
         players_data = [
@@ -183,52 +208,102 @@ class GameService:
 
     @staticmethod
     def add_player_to_game(game_id, user):
-        from games.tasks import finish_game_task
-        from games.models import Game, GamePlayer, Game as GameModel
-
-        GamePlayer.objects.get_or_create(game_id=game_id, user=user)
-
-        count = GamePlayer.objects.filter(game_id=game_id).count()
+        return GameService.ensure_player_in_game(user, game_id)
 
     @staticmethod
     def get_online_players_count():
         """
-        Возвращает количество уникальных онлайн игроков в PVP рулетке.
-        Подсчитывает уникальных пользователей в активных играх (waiting/running).
+        Возвращает количество уникальных онлайн игроков в PVP рулетке:
+        пользователей с открытым ws/pvp-соединением (Presence в Redis).
+        """
+        return Presence.count()
+
+    @staticmethod
+    def _persist_live_round(game, snapshot):
+        """
+        Переносит снимок живого раунда в БД: строки GamePlayer и подарки ставок.
+        Подарки, которые за время раунда сменили владельца, в ставку не попадают.
+        Возвращает (players, gifts_by_player_id).
         """
         from games.models import GamePlayer
-        
-        # Подсчитываем уникальных пользователей в активных PVP играх
-        online_count = (
-            GamePlayer.objects
-            .filter(game__mode="pvp", game__status__in=["waiting", "running"])
-            .values("user")
-            .distinct()
-            .count()
-        )
-        
-        return online_count
+        from gifts.models import Gift
+        from user.models import User
+
+        _, players_data, gifts_data = snapshot
+
+        users = User.objects.in_bulk([p["id"] for p in players_data])
+        staker_by_gift = {g["id"]: g["user_id"] for g in gifts_data}
+        gifts_by_user = {}
+        for gift in Gift.objects.filter(id__in=staker_by_gift.keys()):
+            if gift.user_id == staker_by_gift[gift.id]:
+                gifts_by_user.setdefault(gift.user_id, []).append(gift)
+
+        players = []
+        for p in players_data:
+            user = users.get(p["id"])
+            if not user:
+                continue
+            bet_ton = from_cents(p["bet_ton"])
+            gifts_total = sum((g.price_ton or Decimal("0.00") for g in gifts_by_user.get(user.id, [])), Decimal("0.00"))
+            players.append(GamePlayer(
+                game=game,
+                user=user,
+                bet_ton=bet_ton,
+                total_bet_ton=bet_ton + gifts_total,
+            ))
+
+        total_bet = sum((p.total_bet_ton for p in players), Decimal("0.00"))
+        for p in players:
+            chance = (p.total_bet_ton / total_bet * 100) if total_bet > 0 else Decimal("0")
+            p.chance_percent = chance.quantize(Decimal("0.01"))
+
+        # bulk_create не вызывает GamePlayer.save(), поэтому без лишних пересчётов
+        GamePlayer.objects.bulk_create(players)
+
+        Through = GamePlayer.gifts.through
+        Through.objects.bulk_create([
+            Through(gameplayer_id=p.id, gift_id=gift.id)
+            for p in players
+            for gift in gifts_by_user.get(p.user_id, [])
+        ])
+
+        return players, {p.id: gifts_by_user.get(p.user_id, []) for p in players}
 
     @staticmethod
-    def finish_game(game_id):
-        from games.models import Game, GamePlayer
-
-        game = Game.objects.get(id=game_id)
-        players = list(
-            GamePlayer.objects
-            .filter(game_id=game_id)
-            .select_related("user")
-            .prefetch_related("gifts")
-        )
+    def _draw_round(game):
+        """
+        Закрывает раунд под блокировкой строки Game: переносит ставки в БД, выбирает победителя
+        и помечает игру завершённой. Балансы и подарки не трогает — это делает _apply_settlement.
+        Возвращает итог раунда (dict) или None, если ставок не было.
+        """
+        from games.models import GamePlayer
+
+        game_id = game.id
+        snapshot = LiveRoundStore.begin_settlement(game_id)
+        if snapshot is not None:
+            players, player_gifts = GameService._persist_live_round(game, snapshot)
+            staked_gift_ids = [g["id"] for g in snapshot[2]]
+        else:
+            # раунд начат до перехода на Redis — ставки уже лежат в БД
+            players = list(
+                GamePlayer.objects
+                .filter(game_id=game_id)
+                .select_related("user")
+                .prefetch_related("gifts")
+            )
+            for p in players:
+                p.recalc_total()
+            player_gifts = {p.id: list(p.gifts.all()) for p in players}
+            staked_gift_ids = []
+
+        user_ids = [p.user_id for p in players]
+        transaction.on_commit(lambda: LiveRoundStore.release(game_id, user_ids, staked_gift_ids))
 
         if not players:
             game.status = "finished"
-            game.save(update_fields=["status"])
-            return {"status": "finished", "winner": None}
-
-        # Пересчитываем total для корректного розыгрыша (TON + подарки)
-        for p in players:
-            p.recalc_total()
+            game.ended_at = timezone.now()
+            game.save(update_fields=["status", "ended_at"])
+            return None
 
         # Общая сумма ставок: эквивалент (TON + подарки) — для определения победителя
         total_equiv_decimal = sum((p.total_bet_ton for p in players), Decimal("0.00"))
@@ -244,39 +319,161 @@ class GameService:
             weights = [float(p.total_bet_ton) / total_equiv for p in players]
             winner = random.choices(players, weights=weights, k=1)[0]
 
-        # --- Финансовая логика ---
-        from django.db import transaction
-        with transaction.atomic():
-            # списываем ставки у всех
-            for p in players:
+        # обновляем игру
+        game.status = "finished"
+        # сохраняем финальный банк в игре как эквивалент (TON + gifts)
+        game.pot_amount_ton = total_equiv_decimal
+        game.winner = winner.user
+        game.ended_at = timezone.now()
+        game.save(update_fields=["status", "pot_amount_ton", "winner", "ended_at"])
+
+        return {
+            "game": game,
+            "players": players,
+            "player_gifts": player_gifts,
+            "winner": winner,
+            "total_ton": total_ton_decimal,
+            "total_equiv": total_equiv_decimal,
+        }
+
+    @staticmethod
+    def _apply_settlement(outcomes):
+        """
+        Деньги и подарки одного или нескольких раундов двумя запросами, независимо от числа
+        игроков и подарков: один UPDATE балансов (списание ставок + банк победителям)
+        и один UPDATE владельца подарков.
+        """
+        from django.contrib.auth import get_user_model
+        from gifts.models import Gift
+
+        # итоговое изменение баланса по каждому пользователю (пользователь может быть в нескольких раундах)
+        deltas = {}
+        # подарки каждого раунда переходят победителю этого раунда
+        gifts_by_winner = {}
+        for outcome in outcomes:
+            winner = outcome["winner"]
+            for p in outcome["players"]:
                 if p.bet_ton > 0:
-                    p.user.balance_ton -= p.bet_ton
-                    p.user.save(update_fields=["balance_ton"])
+                    deltas[p.user_id] = deltas.get(p.user_id, Decimal("0")) - p.bet_ton
+            if outcome["total_ton"] > 0:
+                deltas[winner.user_id] = deltas.get(winner.user_id, Decimal("0")) + outcome["total_ton"]
+
+            for gifts in outcome["player_gifts"].values():
+                for gift in gifts:
+                    gifts_by_winner.setdefault(winner.user_id, []).append(gift.id)
+                    gift.user_id = winner.user_id
+
+        deltas = {user_id: delta for user_id, delta in deltas.items() if delta != 0}
+        if deltas:
+            get_user_model().objects.filter(id__in=deltas).update(
+                balance_ton=F("balance_ton") + Case(
+                    *[When(id=user_id, then=Value(delta)) for user_id, delta in deltas.items()],
+                    output_field=DecimalField(max_digits=18, decimal_places=6),
+                )
+            )
 
-            # передаём все поставленные подарки победителю
-            for p in players:
-                player_gifts = list(p.gifts.all())
-                if not player_gifts:
-                    continue
-                for gift in player_gifts:
-                    # меняем владельца подарка на победителя
-                    gift.user = winner.user
-                    gift.save(update_fields=["user"])
-                # очищаем привязку подарков к ставке игрока в этой игре
-                p.gifts.clear()
-
-            # начисляем победителю банк (только TON)
-            if total_ton_decimal > 0:
-                winner.user.balance_ton += total_ton_decimal
-                winner.user.save(update_fields=["balance_ton"])
-
-            # обновляем игру
-            game.status = "finished"
-            # сохраняем финальный банк в игре как эквивалент (TON + gifts)
-            game.pot_amount_ton = total_equiv_decimal
-            game.winner = winner.user
-            game.save(update_fields=["status", "pot_amount_ton", "winner"])
+        if gifts_by_winner:
+            gift_ids = [gift_id for ids in gifts_by_winner.values() for gift_id in ids]
+            Gift.objects.filter(id__in=gift_ids).update(user_id=Case(
+                *[When(id__in=ids, then=Value(user_id)) for user_id, ids in gifts_by_winner.items()]
+            ))
 
+    @staticmethod
+    def _summary(game, outcome=None):
+        """Строка PvpGameSummary для истории и деталей игры (не сохранена)."""
+        from games.models import PvpGameSummary
+
+        summary = PvpGameSummary(
+            game=game,
+            hash=game.hash,
+            started_at=game.started_at,
+            ended_at=game.ended_at,
+        )
+        if outcome is None:
+            return summary
+
+        winner = outcome["winner"]
+        summary.winner_id = winner.user_id
+        summary.winner_username = winner.user.username
+        summary.winner_avatar_url = winner.user.get_avatar_url()
+        summary.winner_total_bet_ton = winner.total_bet_ton
+        summary.winner_chance_percent = winner.chance_percent or Decimal("0.00")
+        summary.win_amount_ton = (
+            outcome["total_equiv"] * (1 - game.commission_percent / Decimal("100"))
+        ).quantize(Decimal("0.01"))
+        summary.winner_gifts = [GameService._gift_brief(gift) for gift in outcome["player_gifts"][winner.id]]
+        return summary
+
+    @staticmethod
+    def _gift_brief(gift):
+        return {"id": gift.id, "name": gift.name, "image_url": gift.image_url, "price_ton": str(gift.price_ton)}
+
+    @staticmethod
+    def _history_rows(game, outcome, summary):
+        """Строки PlayerGameHistory всех участников раунда (не сохранены)."""
+        from games.models import PlayerGameHistory
+
+        if outcome is None:
+            return []
+        winner = outcome["winner"]
+        return [
+            PlayerGameHistory(
+                user_id=p.user_id,
+                game=game,
+                mode=game.mode,
+                result="win" if p.id == winner.id else "loss",
+                bet_ton=p.bet_ton,
+                stake_ton=p.total_bet_ton,
+                chance_percent=p.chance_percent or Decimal("0.00"),
+                pot_amount_ton=game.pot_amount_ton,
+                payout_ton=summary.win_amount_ton if p.id == winner.id else Decimal("0.00"),
+                gifts=[GameService._gift_brief(gift) for gift in outcome["player_gifts"][p.id]],
+                started_at=game.started_at,
+                ended_at=game.ended_at,
+            )
+            for p in outcome["players"]
+        ]
+
+    @staticmethod
+    def _settled_event(game, outcome):
+        """Payload ROUND_SETTLED: готовые строки итогов раунда, чтобы read-модели не ходили в Game."""
+        summary = GameService._summary(game, outcome)
+        return {
+            "game_id": game.id,
+            "winner_id": summary.winner_id,
+            "pot_amount_ton": game.pot_amount_ton,
+            "ended_at": game.ended_at,
+            "summary": to_payload(summary),
+            "history": [to_payload(row) for row in GameService._history_rows(game, outcome, summary)],
+        }
+
+    @staticmethod
+    def _emit_settled(rounds):
+        """
+        События ROUND_SETTLED по списку (game, outcome) — в транзакции расчёта, одним INSERT.
+        Итоги, история, лидерборды и кэш ответов обновляются потребителями (games/event_handlers.py).
+        """
+        Outbox.emit_many([(ROUND_SETTLED, GameService._settled_event(game, outcome)) for game, outcome in rounds])
+
+    @staticmethod
+    def write_projections(payloads):
+        """
+        PvpGameSummary и история игроков из payload'ов ROUND_SETTLED: два INSERT на пачку.
+        Повторная доставка события ничего не дублирует (ключи game и user+game).
+        """
+        from games.models import PvpGameSummary, PlayerGameHistory
+
+        PvpGameSummary.objects.bulk_create(
+            [from_payload(PvpGameSummary, p["summary"]) for p in payloads], ignore_conflicts=True,
+        )
+        PlayerGameHistory.objects.bulk_create(
+            [from_payload(PlayerGameHistory, row) for p in payloads for row in p["history"]], ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def _round_result(outcome):
+        game = outcome["game"]
+        winner = outcome["winner"]
         return {
             "id": game.id,
             "hash": game.hash,
@@ -309,8 +506,94 @@ class GameService:
                     "backdrop_original_details": gift.backdrop_original_details,
                     "rarity_level": gift.rarity_level,
                 }
-                for gift in winner.gifts.all()
+                for gift in outcome["player_gifts"][winner.id]
             ],
-            "win_amount_ton": f"{(total_equiv_decimal * (1 - game.commission_percent / Decimal('100'))):.2f}",
+            "win_amount_ton": f"{(outcome['total_equiv'] * (1 - game.commission_percent / Decimal('100'))):.2f}",
             "winner_chance_percent": str(winner.chance_percent) if winner.chance_percent else "0",
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def finish_game(game_id):
+        """
+        Расчёт раунда. Ставки берутся из живого раунда в Redis и пишутся в БД одним заходом.
+        Возвращает None, если игра уже рассчитана.
+        """
+        from games.models import Game
+
+        with transaction.atomic():
+            game = Game.objects.select_for_update().get(id=game_id)
+            if game.status == "finished":
+                logger.warning(f"Игра {game_id} уже завершена, повторный расчёт пропущен")
+                return None
+
+            outcome = GameService._draw_round(game)
+            GameService._emit_settled([(game, outcome)])
+            if outcome is None:
+                return {"status": "finished", "winner": None}
+
+            # --- Финансовая логика ---
+            GameService._apply_settlement([outcome])
+
+        return GameService._round_result(outcome)
+
+    @staticmethod
+    def finish_games(game_ids):
+        """
+        Пакетный расчёт раундов с общим дедлайном: одна транзакция, общие UPDATE балансов и подарков.
+        Каждый раунд закрывается в своём savepoint — ошибка в одном не откатывает остальные.
+        Если падает общий расчёт балансов, пачка откатывается целиком и раунды считаются по одному.
+        Возвращает (results, failed): results = {game_id: результат как у finish_game},
+        failed — id раундов, которые нужно рассчитать по одному.
+        """
+        from games.models import Game
+
+        results, outcomes, rounds, failed = {}, [], [], []
+        try:
+            with transaction.atomic():
+                # блокируем строки в порядке id, чтобы параллельные пачки не ловили deadlock
+                games = Game.objects.select_for_update().filter(id__in=game_ids).order_by("id")
+                for game in games:
+                    if game.status == "finished":
+                        logger.warning(f"Игра {game.id} уже завершена, повторный расчёт пропущен")
+                        continue
+                    try:
+                        with transaction.atomic():
+                            outcome = GameService._draw_round(game)
+                    except Exception as e:
+                        logger.error(f"Ошибка расчёта игры {game.id} в пачке: {e}")
+                        failed.append(game.id)
+                        continue
+
+                    rounds.append((game, outcome))
+                    if outcome is None:
+                        results[game.id] = {"status": "finished", "winner": None}
+                    else:
+                        outcomes.append(outcome)
+
+                # --- Финансовая логика всех раундов пачки ---
+                GameService._apply_settlement(outcomes)
+                GameService._emit_settled(rounds)
+        except Exception as e:
+            # откат снял и статусы раундов, и release комнат (on_commit) — снимок в Redis цел
+            logger.error(f"Пакетный расчёт {game_ids} откатился ({e}), считаем раунды по одному")
+            return GameService._finish_each(game_ids)
+
+        for outcome in outcomes:
+            results[outcome["game"].id] = GameService._round_result(outcome)
+        logger.info(f"Пакетный расчёт: {len(results)} игр рассчитано, {len(failed)} с ошибкой")
+        return results, failed
+
+    @staticmethod
+    def _finish_each(game_ids):
+        """Раунды пачки по одному через finish_game: упавший раунд не мешает остальным."""
+        results, failed = {}, []
+        for game_id in game_ids:
+            try:
+                result = GameService.finish_game(game_id)
+            except Exception as e:
+                logger.error(f"Ошибка расчёта игры {game_id}: {e}")
+                failed.append(game_id)
+                continue
+            if result is not None:
+                results[game_id] = result
+        return results, failed
@@ -0,0 +1,191 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from games.services.live_round import to_cents, from_cents
+from core.response_cache import ResponseCache, TOP
+
+
+r = settings.REDIS_CLIENT
+logger = logging.getLogger('games.services.leaderboard')
+
+# Лидерборды PvP по победам. На каждое окно и период — два zset:
+#   ...:ton  user_id -> сумма выигранных банков (сотые TON)
+#   ...:wins user_id -> число побед
+LEADERBOARD_KEY = "pvp_lb:{window}:{period}:{metric}"
+# победа раунда уже засчитана — повторная доставка события не увеличит счёт
+APPLIED_KEY = "pvp_lb:applied:{game_id}"
+APPLIED_TTL = 7 * 24 * 3600
+
+WINDOWS = ("day", "week", "all")
+# сколько хранить прошлые периоды после их окончания
+WINDOW_TTL = {
+    "day": 3 * 24 * 3600,
+    "week": 15 * 24 * 3600,
+    "all": None,
+}
+
+
+# Победа одного раунда во всех окнах — атомарно и не больше одного раза.
+# KEYS: applied, затем пары (ton, wins) по окнам; ARGV: applied_ttl, user_id, ton_cents, затем TTL окон (0 — без TTL)
+RECORD_WIN_LUA = """
+if not redis.call('SET', KEYS[1], 1, 'NX', 'EX', ARGV[1]) then return 0 end
+for i = 2, #KEYS, 2 do
+    redis.call('ZINCRBY', KEYS[i], ARGV[3], ARGV[2])
+    redis.call('ZINCRBY', KEYS[i + 1], 1, ARGV[2])
+    local ttl = tonumber(ARGV[3 + i / 2])
+    if ttl > 0 then
+        redis.call('EXPIRE', KEYS[i], ttl)
+        redis.call('EXPIRE', KEYS[i + 1], ttl)
+    end
+end
+return 1
+"""
+
+_record_win_script = r.register_script(RECORD_WIN_LUA)
+
+
+def period_of(window, moment):
+    """Идентификатор периода окна для момента времени (UTC)."""
+    if window == "day":
+        return moment.strftime("%Y%m%d")
+    if window == "week":
+        year, week, _ = moment.isocalendar()
+        return f"{year}W{week:02d}"
+    return "all"
+
+
+def period_start(window, moment):
+    """Начало текущего периода окна; None для all."""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window == "day":
+        return day
+    if window == "week":
+        return day - timedelta(days=day.weekday())
+    return None
+
+
+class Leaderboard:
+    """
+    Лидерборды обновляются инкрементально группой leaderboard по событиям ROUND_SETTLED
+    из outbox-stream'а (games/event_handlers.record_wins), чтение — только из Redis,
+    без агрегатов по истории игр.
+    Восстановить из БД: manage.py rebuild_leaderboards.
+    """
+
+    @staticmethod
+    def keys(window, period):
+        return (
+            LEADERBOARD_KEY.format(window=window, period=period, metric="ton"),
+            LEADERBOARD_KEY.format(window=window, period=period, metric="wins"),
+        )
+
+    @staticmethod
+    def record_wins(wins):
+        """
+        wins — список (game_id, user_id победителя, банк раунда в TON, время раунда).
+        Период окна — по времени раунда. Ошибки Redis не глушатся: событие перечитается.
+        """
+        pipe = r.pipeline()
+        for game_id, user_id, pot, moment in wins:
+            keys, ttls = [APPLIED_KEY.format(game_id=game_id)], []
+            for window in WINDOWS:
+                keys.extend(Leaderboard.keys(window, period_of(window, moment)))
+                ttls.append(WINDOW_TTL[window] or 0)
+            _record_win_script(keys=keys, args=[APPLIED_TTL, user_id, to_cents(pot), *ttls], client=pipe)
+        pipe.execute()
+
+    @staticmethod
+    def _profiles(user_ids):
+        from django.contrib.auth import get_user_model
+
+        users = get_user_model().objects.filter(id__in=user_ids).only("id", "username", "avatar_url")
+        return {u.id: u for u in users}
+
+    @staticmethod
+    def _entry(rank, user, ton_cents, wins):
+        return {
+            "rank": rank,
+            "id": user.id,
+            "username": user.username,
+            "avatar_url": user.get_avatar_url(),
+            "wins_count": int(wins or 0),
+            "total_wins_ton": from_cents(int(ton_cents)),
+        }
+
+    @staticmethod
+    def top(window="all", limit=10):
+        """Первые limit игроков окна по сумме выигрышей."""
+        ton_key, wins_key = Leaderboard.keys(window, period_of(window, timezone.now()))
+        rows = r.zrevrange(ton_key, 0, limit - 1, withscores=True)
+        if not rows:
+            return []
+
+        wins = r.zmscore(wins_key, [user_id for user_id, _ in rows])
+        profiles = Leaderboard._profiles([int(user_id) for user_id, _ in rows])
+        entries = []
+        for rank, ((user_id, ton_cents), count) in enumerate(zip(rows, wins), start=1):
+            user = profiles.get(int(user_id))
+            if user is not None:
+                entries.append(Leaderboard._entry(rank, user, ton_cents, count))
+        return entries
+
+    @staticmethod
+    def rank_of(user, window="all"):
+        """Место пользователя в окне или None, если побед в этом периоде нет."""
+        ton_key, wins_key = Leaderboard.keys(window, period_of(window, timezone.now()))
+        pipe = r.pipeline()
+        pipe.zrevrank(ton_key, user.id)
+        pipe.zscore(ton_key, user.id)
+        pipe.zscore(wins_key, user.id)
+        rank, ton_cents, wins = pipe.execute()
+        if rank is None:
+            return None
+        return Leaderboard._entry(rank + 1, user, ton_cents, wins)
+
+    @staticmethod
+    def rebuild(window, batch_size=1000):
+        """
+        Пересобирает текущий период окна из истории игроков одним агрегатом
+        и атомарно подменяет ключи. Возвращает число игроков в лидерборде.
+        Читаем PlayerGameHistory, а не Game: старые игры уходят в архив (GameArchive).
+        """
+        from django.db.models import Sum, Count
+        from games.models import PlayerGameHistory
+
+        now = timezone.now()
+        wins = PlayerGameHistory.objects.filter(mode="pvp", result="win")
+        start = period_start(window, now)
+        if start is not None:
+            wins = wins.filter(ended_at__gte=start)
+        rows = wins.values("user_id").annotate(total=Sum("pot_amount_ton"), wins=Count("id")).order_by()
+
+        ton_key, wins_key = Leaderboard.keys(window, period_of(window, now))
+        tmp_ton, tmp_wins = f"{ton_key}:rebuild", f"{wins_key}:rebuild"
+        r.delete(tmp_ton, tmp_wins)
+
+        count = 0
+        pipe = r.pipeline()
+        for row in rows.iterator(chunk_size=batch_size):
+            pipe.zadd(tmp_ton, {row["user_id"]: to_cents(row["total"])})
+            pipe.zadd(tmp_wins, {row["user_id"]: row["wins"]})
+            count += 1
+            if count % batch_size == 0:
+                pipe.execute()
+        pipe.execute()
+
+        pipe = r.pipeline()
+        if count:
+            pipe.rename(tmp_ton, ton_key)
+            pipe.rename(tmp_wins, wins_key)
+            if WINDOW_TTL[window]:
+                pipe.expire(ton_key, WINDOW_TTL[window])
+                pipe.expire(wins_key, WINDOW_TTL[window])
+        else:
+            pipe.delete(ton_key, wins_key)
+        pipe.execute()
+        if window == "all":
+            # /games/top/ читает окно all
+            ResponseCache.invalidate(TOP)
+        logger.info(f"Лидерборд {window} пересобран: {count} игроков")
+        return count
@@ -0,0 +1,546 @@
+import json
+import time
+import logging
+from decimal import Decimal, ROUND_DOWN
+from django.conf import settings
+
+
+r = settings.REDIS_CLIENT
+# асинхронный клиент для горячего пути websocket-консьюмера
+ar = settings.ASYNC_REDIS_CLIENT
+logger = logging.getLogger('games.services.live_round')
+
+# Ключи живого раунда
+ROOM_KEY = "pvp_room:{game_id}"                  # hash: status, version, pot, ton, gifts, staked, created_at
+PLAYERS_KEY = "pvp_room:{game_id}:players"       # hash: user_id -> json игрока
+GIFTS_KEY = "pvp_room:{game_id}:gifts"           # hash: gift_id -> json подарка в ставке
+USER_ROOM_KEY = "pvp_user_room:{user_id}"        # активная комната пользователя
+GIFT_LOCK_KEY = "pvp_gift_lock:{gift_id}"        # подарок уже стоит в каком-то раунде
+ACTIVE_ROOMS_KEY = "pvp_rooms:active"            # set: id всех живых раундов
+LOBBY_KEY = "pvp_lobby"                          # zset: открытые комнаты -> число игроков (MatchmakingService)
+
+# Сколько живёт ключ завершённой комнаты (чтобы поздние ставки получили "игра завершена")
+FINISHED_ROOM_TTL = 300
+
+ACTIVE_STATUSES = ("waiting", "running")
+
+# Коды ошибок Lua-скриптов
+ERR_NO_ROOM = -1
+ERR_CLOSED = -2
+ERR_GIFT_LOCKED = -3
+ERR_NO_FUNDS = -4
+
+
+# Одна ставка или пачка ставок комнаты (BetBatcher) — один вызов скрипта.
+# KEYS: room, players, gifts, затем для каждой ставки: user_room, gift_lock_1..k
+# ARGV: game_id, затем для каждой ставки: user_id, ton_cents, balance_cents (-1 = без проверки),
+#       profile_json, k и k троек (gift_id, gift_json, price_cents)
+# Возвращает {version, pot, codes, players}: codes[i] = 1 (принята) или код ошибки i-й ставки.
+# Версия комнаты растёт один раз на пачку; 0 — не принята ни одна ставка.
+BET_LUA = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if not status then return {-1} end
+if status ~= 'waiting' and status ~= 'running' then return {-2} end
+
+local codes = {}
+local accepted = 0
+local ki = 4
+local ai = 2
+while ai <= #ARGV do
+    local uid = ARGV[ai]
+    local ton = tonumber(ARGV[ai + 1])
+    local balance = tonumber(ARGV[ai + 2])
+    local n = tonumber(ARGV[ai + 4])
+    local code = 1
+
+    for i = 1, n do
+        if redis.call('EXISTS', KEYS[ki + i]) == 1 then code = -3 end
+    end
+
+    local raw = redis.call('HGET', KEYS[2], uid)
+    local p = cjson.decode(raw or ARGV[ai + 3])
+    if code == 1 and balance >= 0 and p['bet_ton'] + ton > balance then code = -4 end
+
+    if code == 1 then
+        local before = p['bet_ton'] + p['gifts_ton']
+        local gifts_added = 0
+        for i = 1, n do
+            local base = ai + 4 + (i - 1) * 3
+            redis.call('SET', KEYS[ki + i], ARGV[1])
+            redis.call('HSET', KEYS[3], ARGV[base + 1], ARGV[base + 2])
+            gifts_added = gifts_added + tonumber(ARGV[base + 3])
+        end
+
+        p['bet_ton'] = p['bet_ton'] + ton
+        p['gifts_ton'] = p['gifts_ton'] + gifts_added
+        redis.call('HSET', KEYS[2], uid, cjson.encode(p))
+        redis.call('SET', KEYS[ki], ARGV[1])
+        redis.call('HINCRBY', KEYS[1], 'pot', ton + gifts_added)
+        redis.call('HINCRBY', KEYS[1], 'ton', ton)
+        redis.call('HINCRBY', KEYS[1], 'gifts', gifts_added)
+        if before == 0 and p['bet_ton'] + p['gifts_ton'] > 0 then
+            redis.call('HINCRBY', KEYS[1], 'staked', 1)
+        end
+        accepted = accepted + 1
+    end
+
+    table.insert(codes, code)
+    ki = ki + 1 + n
+    ai = ai + 5 + n * 3
+end
+
+local version = 0
+if accepted > 0 then version = redis.call('HINCRBY', KEYS[1], 'version', 1) end
+local pot = redis.call('HGET', KEYS[1], 'pot')
+return {version, pot, codes, redis.call('HVALS', KEYS[2])}
+"""
+
+# KEYS: room, players, user_room
+# ARGV: user_id, game_id, profile_json
+JOIN_LUA = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if not status then return -1 end
+if status ~= 'waiting' and status ~= 'running' then return -2 end
+redis.call('SET', KEYS[3], ARGV[2])
+if redis.call('HSETNX', KEYS[2], ARGV[1], ARGV[3]) == 1 then
+    return redis.call('HINCRBY', KEYS[1], 'version', 1)
+end
+return 0
+"""
+
+# KEYS: room
+# ARGV: from_status, to_status
+TRANSITION_LUA = """
+if redis.call('HGET', KEYS[1], 'status') ~= ARGV[1] then return 0 end
+redis.call('HSET', KEYS[1], 'status', ARGV[2])
+return redis.call('HINCRBY', KEYS[1], 'version', 1)
+"""
+
+# Пересчёт счётчиков раунда с нуля по записям игроков и подарков (аудит).
+# KEYS: room, players, gifts
+# ARGV: repair (1 — записать пересчитанные значения)
+# Возвращает {pot, ton, gifts, staked} фактические, затем те же хранимые, затем число
+# игроков с расхождением суммы подарков.
+AUDIT_LUA = """
+local gift_sums = {}
+local gifts_total = 0
+for _, raw in ipairs(redis.call('HVALS', KEYS[3])) do
+    local g = cjson.decode(raw)
+    local uid = tostring(g['user_id'])
+    gift_sums[uid] = (gift_sums[uid] or 0) + g['price_cents']
+    gifts_total = gifts_total + g['price_cents']
+end
+
+local pot, ton, staked, broken = 0, 0, 0, 0
+local players = redis.call('HGETALL', KEYS[2])
+for i = 1, #players, 2 do
+    local uid = players[i]
+    local p = cjson.decode(players[i + 1])
+    local expected = gift_sums[uid] or 0
+    if p['gifts_ton'] ~= expected then
+        broken = broken + 1
+        if ARGV[1] == '1' then
+            p['gifts_ton'] = expected
+            redis.call('HSET', KEYS[2], uid, cjson.encode(p))
+        end
+    end
+    local stake = p['bet_ton'] + expected
+    pot = pot + stake
+    ton = ton + p['bet_ton']
+    if stake > 0 then staked = staked + 1 end
+end
+
+local stored = redis.call('HMGET', KEYS[1], 'pot', 'ton', 'gifts', 'staked')
+if ARGV[1] == '1' then
+    redis.call('HSET', KEYS[1], 'pot', pot, 'ton', ton, 'gifts', gifts_total, 'staked', staked)
+end
+return {pot, ton, gifts_total, staked,
+        tonumber(stored[1]) or 0, tonumber(stored[2]) or 0,
+        tonumber(stored[3]) or 0, tonumber(stored[4]) or 0, broken}
+"""
+
+_bet_script = r.register_script(BET_LUA)
+_join_script = r.register_script(JOIN_LUA)
+_transition_script = r.register_script(TRANSITION_LUA)
+_audit_script = r.register_script(AUDIT_LUA)
+
+_abet_script = ar.register_script(BET_LUA)
+_ajoin_script = ar.register_script(JOIN_LUA)
+_atransition_script = ar.register_script(TRANSITION_LUA)
+
+
+def to_cents(amount) -> int:
+    """Decimal TON -> целые сотые (так суммы в Redis не теряют точность)."""
+    if amount is None:
+        return 0
+    return int((Decimal(str(amount)) * 100).to_integral_value(rounding=ROUND_DOWN))
+
+
+def from_cents(cents) -> Decimal:
+    return (Decimal(int(cents)) / 100).quantize(Decimal("0.01"))
+
+
+def gift_image_url(gift):
+    if gift.symbol:
+        return f"https://nft.fragment.com/gift/{gift.symbol}.medium.jpg"
+    return gift.image_url
+
+
+def gift_payload(gift, username):
+    """Данные подарка для состояния комнаты (тот же формат, что отдавал get_game_state)."""
+    return {
+        "id": gift.id,
+        "user_username": username,
+        "ton_contract_address": gift.ton_contract_address,
+        "name": gift.name,
+        "image_url": gift_image_url(gift),
+        "price_ton": str(gift.price_ton),
+        "backdrop": gift.backdrop,
+        "symbol": gift.symbol,
+        "model_name": gift.model_name,
+        "pattern_name": gift.pattern_name,
+        "model_rarity_permille": gift.model_rarity_permille,
+        "pattern_rarity_permille": gift.pattern_rarity_permille,
+        "backdrop_rarity_permille": gift.backdrop_rarity_permille,
+        "model_original_details": gift.model_original_details,
+        "pattern_original_details": gift.pattern_original_details,
+        "backdrop_original_details": gift.backdrop_original_details,
+        "rarity_level": gift.rarity_level,
+    }
+
+
+def chance_percent(stake_cents, pot_cents):
+    """Шанс игрока выводится при чтении из текущих сумм — хранить его не нужно."""
+    return round(stake_cents / pot_cents * 100, 2) if pot_cents > 0 else 0.0
+
+
+def player_view(p, pot_cents):
+    """Публичные данные игрока в комнате (без подарков)."""
+    return {
+        "id": p["id"],
+        "username": p["username"],
+        "avatar_url": p["avatar_url"],
+        "bet_ton": str(from_cents(p["bet_ton"])),
+        "chance_percent": chance_percent(p["bet_ton"] + p["gifts_ton"], pot_cents),
+    }
+
+
+def public_gift(g):
+    return {k: v for k, v in g.items() if k not in ("user_id", "price_cents")}
+
+
+def player_profile(user):
+    """Начальная запись игрока в комнате (суммы в сотых TON)."""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "avatar_url": user.get_avatar_url(),
+        "bet_ton": 0,
+        "gifts_ton": 0,
+        "joined_at": time.time(),
+    }
+
+
+class LiveRoundError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class LiveRoundStore:
+    """
+    Живое состояние PvP-раунда в Redis.
+    Пока раунд в статусе waiting/running, источник правды — Redis;
+    строки Game/GamePlayer дописываются один раз при расчёте (GameService.finish_game).
+    """
+
+    @staticmethod
+    def keys(game_id):
+        return (
+            ROOM_KEY.format(game_id=game_id),
+            PLAYERS_KEY.format(game_id=game_id),
+            GIFTS_KEY.format(game_id=game_id),
+        )
+
+    @staticmethod
+    def ensure_room(game):
+        room_key = ROOM_KEY.format(game_id=game.id)
+        if r.hsetnx(room_key, "status", game.status):
+            r.hset(room_key, mapping={
+                "version": 0,
+                "pot": 0,
+                "ton": 0,
+                "gifts": 0,
+                "staked": 0,
+                "created_at": time.time(),
+            })
+            r.sadd(ACTIVE_ROOMS_KEY, game.id)
+            logger.info(f"Живой раунд {game.id} создан в Redis")
+
+    @staticmethod
+    def exists(game_id):
+        return bool(r.exists(ROOM_KEY.format(game_id=game_id)))
+
+    @staticmethod
+    def get_status(game_id):
+        return r.hget(ROOM_KEY.format(game_id=game_id), "status")
+
+    @staticmethod
+    def get_user_room(user_id):
+        game_id = r.get(USER_ROOM_KEY.format(user_id=user_id))
+        if not game_id:
+            return None
+        if LiveRoundStore.get_status(game_id) not in ACTIVE_STATUSES:
+            return None
+        return int(game_id)
+
+    @staticmethod
+    async def aget_user_room(user_id):
+        game_id = await ar.get(USER_ROOM_KEY.format(user_id=user_id))
+        if not game_id:
+            return None
+        if await ar.hget(ROOM_KEY.format(game_id=game_id), "status") not in ACTIVE_STATUSES:
+            return None
+        return int(game_id)
+
+    @staticmethod
+    def _join_call(game_id, user):
+        room_key, players_key, _ = LiveRoundStore.keys(game_id)
+        profile = player_profile(user)
+        keys = [room_key, players_key, USER_ROOM_KEY.format(user_id=user.id)]
+        args = [user.id, game_id, json.dumps(profile)]
+        return keys, args, profile
+
+    @staticmethod
+    def _join_result(game_id, result, profile):
+        if result < 0:
+            raise LiveRoundError(result)
+        if not result:
+            return None
+        return {"game_id": int(game_id), "seq": result, "player_joined": player_view(profile, 0)}
+
+    @staticmethod
+    def join(game_id, user):
+        """
+        Добавляет игрока в комнату. Возвращает дельту player_joined
+        или None, если игрок уже был в комнате.
+        """
+        keys, args, profile = LiveRoundStore._join_call(game_id, user)
+        return LiveRoundStore._join_result(game_id, _join_script(keys=keys, args=args), profile)
+
+    @staticmethod
+    async def ajoin(game_id, user):
+        keys, args, profile = LiveRoundStore._join_call(game_id, user)
+        return LiveRoundStore._join_result(game_id, await _ajoin_script(keys=keys, args=args), profile)
+
+    @staticmethod
+    def _bets_call(game_id, bets):
+        """
+        bets — список (user, ton_cents, gifts, balance_cents).
+        Возвращает ключи и аргументы BET_LUA и подарки каждой ставки для дельты.
+        """
+        keys = list(LiveRoundStore.keys(game_id))
+        args = [game_id]
+        gifts_added = []
+        for user, ton_cents, gifts, balance_cents in bets:
+            keys.append(USER_ROOM_KEY.format(user_id=user.id))
+            args.extend([user.id, ton_cents, balance_cents, json.dumps(player_profile(user)), len(gifts)])
+            added = []
+            for gift in gifts:
+                keys.append(GIFT_LOCK_KEY.format(gift_id=gift.id))
+                payload = gift_payload(gift, user.username)
+                added.append(dict(payload))
+                payload["user_id"] = user.id
+                payload["price_cents"] = to_cents(gift.price_ton)
+                args.extend([gift.id, json.dumps(payload), payload["price_cents"]])
+            gifts_added.append(added)
+        return keys, args, gifts_added
+
+    @staticmethod
+    def _bets_result(game_id, bets, result, gifts_added):
+        """
+        Возвращает (delta, codes): одна дельта на все принятые ставки пачки
+        (None, если не принята ни одна) и код результата каждой ставки.
+        """
+        if result[0] < 0:
+            raise LiveRoundError(result[0])
+
+        version, pot = int(result[0]), int(result[1])
+        codes = [int(code) for code in result[2]]
+        accepted = [i for i, code in enumerate(codes) if code > 0]
+        if not accepted:
+            return None, codes
+
+        players = {p["id"]: p for p in map(json.loads, result[3])}
+        # игрок, поставивший в пачке несколько раз, попадает в дельту один раз
+        changed = dict.fromkeys(bets[i][0].id for i in accepted)
+        delta = {
+            "game_id": int(game_id),
+            "seq": version,
+            "pot_amount_ton": str(from_cents(pot)),
+            "players": [player_view(players[uid], pot) for uid in changed],
+            "gifts_added": [g for i in accepted for g in gifts_added[i]],
+            "chances": [[p["id"], chance_percent(p["bet_ton"] + p["gifts_ton"], pot)] for p in players.values()],
+        }
+        return delta, codes
+
+    @staticmethod
+    def _single_bet(delta, codes):
+        if codes[0] < 0:
+            raise LiveRoundError(codes[0])
+        return delta
+
+    @staticmethod
+    def place_bets(game_id, bets):
+        """
+        Применяет пачку ставок одной комнаты одним вызовом скрипта.
+        Ставки проверяются по порядку; отклонённая не мешает остальным.
+        """
+        keys, args, gifts_added = LiveRoundStore._bets_call(game_id, bets)
+        return LiveRoundStore._bets_result(game_id, bets, _bet_script(keys=keys, args=args), gifts_added)
+
+    @staticmethod
+    async def aplace_bets(game_id, bets):
+        keys, args, gifts_added = LiveRoundStore._bets_call(game_id, bets)
+        return LiveRoundStore._bets_result(game_id, bets, await _abet_script(keys=keys, args=args), gifts_added)
+
+    @staticmethod
+    def place_bet(game_id, user, ton_cents=0, gifts=(), balance_cents=-1):
+        """
+        Атомарно добавляет ставку игрока: TON (в сотых) и/или подарки.
+        Возвращает дельту состояния в том же виде, что и у пачки: players (список из одного игрока),
+        новые подарки, банк и вектор шансов.
+        """
+        delta, codes = LiveRoundStore.place_bets(game_id, [(user, ton_cents, gifts, balance_cents)])
+        return LiveRoundStore._single_bet(delta, codes)
+
+    @staticmethod
+    async def aplace_bet(game_id, user, ton_cents=0, gifts=(), balance_cents=-1):
+        delta, codes = await LiveRoundStore.aplace_bets(game_id, [(user, ton_cents, gifts, balance_cents)])
+        return LiveRoundStore._single_bet(delta, codes)
+
+    @staticmethod
+    def transition(game_id, from_status, to_status):
+        """Смена статуса раунда, только если текущий статус совпадает. Возвращает новую версию или 0."""
+        return _transition_script(
+            keys=[ROOM_KEY.format(game_id=game_id)],
+            args=[from_status, to_status],
+        )
+
+    @staticmethod
+    async def atransition(game_id, from_status, to_status):
+        return await _atransition_script(
+            keys=[ROOM_KEY.format(game_id=game_id)],
+            args=[from_status, to_status],
+        )
+
+    @staticmethod
+    def begin_settlement(game_id):
+        """Закрывает приём ставок и возвращает снимок раунда для расчёта (None, если раунда нет)."""
+        for status in ACTIVE_STATUSES:
+            LiveRoundStore.transition(game_id, status, "settling")
+        r.zrem(LOBBY_KEY, game_id)
+        return LiveRoundStore.load(game_id)
+
+    @staticmethod
+    def load(game_id):
+        """Снимок раунда: (room, players, gifts) или None, если раунда нет в Redis."""
+        room_key, players_key, gifts_key = LiveRoundStore.keys(game_id)
+        pipe = r.pipeline(transaction=False)
+        pipe.hgetall(room_key)
+        pipe.hvals(players_key)
+        pipe.hvals(gifts_key)
+        return LiveRoundStore._parse_snapshot(*pipe.execute())
+
+    @staticmethod
+    async def aload(game_id):
+        room_key, players_key, gifts_key = LiveRoundStore.keys(game_id)
+        pipe = ar.pipeline(transaction=False)
+        pipe.hgetall(room_key)
+        pipe.hvals(players_key)
+        pipe.hvals(gifts_key)
+        return LiveRoundStore._parse_snapshot(*await pipe.execute())
+
+    @staticmethod
+    def _parse_snapshot(room, players_raw, gifts_raw):
+        if not room:
+            return None
+
+        players = sorted((json.loads(p) for p in players_raw), key=lambda p: p["joined_at"])
+        gifts = [json.loads(g) for g in gifts_raw]
+        return room, players, gifts
+
+    @staticmethod
+    def count_staked_players(game_id):
+        return int(r.hget(ROOM_KEY.format(game_id=game_id), "staked") or 0)
+
+    @staticmethod
+    async def acount_staked_players(game_id):
+        return int(await ar.hget(ROOM_KEY.format(game_id=game_id), "staked") or 0)
+
+    @staticmethod
+    def active_rooms():
+        return sorted(int(game_id) for game_id in r.smembers(ACTIVE_ROOMS_KEY))
+
+    @staticmethod
+    def audit(game_id, repair=False):
+        """
+        Пересчитывает банк, TON, сумму подарков и число игроков со ставкой с нуля
+        и сравнивает с инкрементальными счётчиками. С repair=True записывает пересчитанное.
+        """
+        result = _audit_script(keys=list(LiveRoundStore.keys(game_id)), args=[1 if repair else 0])
+        fields = ("pot", "ton", "gifts", "staked")
+        actual = dict(zip(fields, result[0:4]))
+        stored = dict(zip(fields, result[4:8]))
+        return {
+            "game_id": int(game_id),
+            "consistent": actual == stored and result[8] == 0,
+            "actual": actual,
+            "stored": stored,
+            "players_with_gift_mismatch": result[8],
+        }
+
+    @staticmethod
+    def build_state(game_id, snapshot):
+        """Состояние комнаты в формате, который ждёт фронт."""
+        room, players, gifts = snapshot
+        pot = int(room.get("pot", 0))
+
+        gifts_by_user = {}
+        for g in gifts:
+            gifts_by_user.setdefault(g["user_id"], []).append(public_gift(g))
+
+        players_data = [
+            {**player_view(p, pot), "gifts": gifts_by_user.get(p["id"], [])}
+            for p in players
+        ]
+
+        return {
+            "game_id": int(game_id),
+            "status": room.get("status"),
+            "version": int(room.get("version", 0)),
+            "pot_amount_ton": str(from_cents(pot)),
+            "players": players_data,
+        }
+
+    @staticmethod
+    def release(game_id, user_ids, gift_ids):
+        """Раунд рассчитан: снимаем блокировки подарков и привязки игроков, комнату помечаем finished."""
+        room_key, players_key, gifts_key = LiveRoundStore.keys(game_id)
+        pipe = r.pipeline()
+        pipe.hset(room_key, "status", "finished")
+        pipe.hincrby(room_key, "version", 1)
+        pipe.expire(room_key, FINISHED_ROOM_TTL)
+        pipe.delete(players_key, gifts_key)
+        pipe.srem(ACTIVE_ROOMS_KEY, game_id)
+        pipe.zrem(LOBBY_KEY, game_id)
+        for gift_id in gift_ids:
+            pipe.delete(GIFT_LOCK_KEY.format(gift_id=gift_id))
+        pipe.execute()
+
+        # привязку игрока снимаем, только если он всё ещё числится в этом раунде
+        for user_id in user_ids:
+            key = USER_ROOM_KEY.format(user_id=user_id)
+            if r.get(key) == str(game_id):
+                r.delete(key)
+        logger.info(f"Живой раунд {game_id} закрыт в Redis")
@@ -0,0 +1,143 @@
+import json
+import logging
+from django.conf import settings
+from games.services.db import db_async
+from games.services.live_round import (
+    LiveRoundStore,
+    LOBBY_KEY,
+    ROOM_KEY,
+    USER_ROOM_KEY,
+    from_cents,
+    player_profile,
+    player_view,
+)
+
+
+r = settings.REDIS_CLIENT
+ar = settings.ASYNC_REDIS_CLIENT
+logger = logging.getLogger('games.services.matchmaking')
+
+# сколько комнат-кандидатов смотрит скрипт за один вызов
+CANDIDATES = 20
+
+
+# Атомарно сажает игрока в самую заполненную открытую комнату, где есть место.
+# Закрытые/пропавшие комнаты по пути вычищаются из лобби.
+# Ключи комнат собираются внутри скрипта (один инстанс Redis, без кластера).
+# KEYS: lobby, user_room
+# ARGV: user_id, capacity, profile_json, candidates
+# Возвращает {game_id, version}: version = 0, если игрок уже был в комнате; {0, 0} — мест нет.
+ASSIGN_LUA = """
+local current = redis.call('GET', KEYS[2])
+if current then
+    local status = redis.call('HGET', 'pvp_room:' .. current, 'status')
+    if status == 'waiting' or status == 'running' then return {tonumber(current), 0} end
+end
+
+local capacity = tonumber(ARGV[2])
+local rooms = redis.call('ZREVRANGEBYSCORE', KEYS[1], '(' .. capacity, '-inf', 'LIMIT', 0, tonumber(ARGV[4]))
+for _, game_id in ipairs(rooms) do
+    local room_key = 'pvp_room:' .. game_id
+    local status = redis.call('HGET', room_key, 'status')
+    if status == 'waiting' or status == 'running' then
+        local players_key = room_key .. ':players'
+        local version = 0
+        if redis.call('HSETNX', players_key, ARGV[1], ARGV[3]) == 1 then
+            version = redis.call('HINCRBY', room_key, 'version', 1)
+        end
+        redis.call('SET', KEYS[2], game_id)
+
+        local size = redis.call('HLEN', players_key)
+        if size >= capacity then
+            redis.call('ZREM', KEYS[1], game_id)
+        else
+            redis.call('ZADD', KEYS[1], size, game_id)
+        end
+        return {tonumber(game_id), version}
+    end
+    redis.call('ZREM', KEYS[1], game_id)
+end
+return {0, 0}
+"""
+
+_assign_script = r.register_script(ASSIGN_LUA)
+_aassign_script = ar.register_script(ASSIGN_LUA)
+
+
+class MatchmakingService:
+    """
+    Подбор PvP-комнаты без блокировок строк в БД.
+    Открытые комнаты лежат в sorted set лобби (score — число игроков), вместимость
+    ограничена PVP_ROOM_CAPACITY; заполненная комната уходит из лобби, и следующие игроки
+    попадают в другую открытую или в новую.
+    """
+
+    @staticmethod
+    def open_room():
+        from games.models import Game
+
+        game = Game.objects.create(mode="pvp", status="waiting")
+        LiveRoundStore.ensure_room(game)
+        r.zadd(LOBBY_KEY, {game.id: 0}, nx=True)
+        logger.info(f"Открыта новая комната {game.id}")
+        return game.id
+
+    @staticmethod
+    def _assign_call(user):
+        profile = player_profile(user)
+        keys = [LOBBY_KEY, USER_ROOM_KEY.format(user_id=user.id)]
+        args = [user.id, settings.PVP_ROOM_CAPACITY, json.dumps(profile), CANDIDATES]
+        return keys, args, profile
+
+    @staticmethod
+    def _assign_result(user, game_id, version, profile):
+        logger.info(f"Пользователь {user.username} направлен в комнату {game_id}")
+        if not version:
+            return game_id, None
+        return game_id, {"game_id": game_id, "seq": version, "player_joined": player_view(profile, 0)}
+
+    @staticmethod
+    def assign(user):
+        """
+        Сажает пользователя в открытую комнату (или открывает новую).
+        Возвращает (game_id, join_delta); join_delta = None, если пользователь уже был в комнате.
+        """
+        keys, args, profile = MatchmakingService._assign_call(user)
+        game_id, version = _assign_script(keys=keys, args=args)
+        if not game_id:
+            # свободных мест нет — открываем комнату; при гонке несколько новых комнат
+            # просто заполнятся следующими игроками
+            MatchmakingService.open_room()
+            game_id, version = _assign_script(keys=keys, args=args)
+        return MatchmakingService._assign_result(user, game_id, version, profile)
+
+    @staticmethod
+    async def aassign(user):
+        keys, args, profile = MatchmakingService._assign_call(user)
+        game_id, version = await _aassign_script(keys=keys, args=args)
+        if not game_id:
+            await db_async(MatchmakingService.open_room)()
+            game_id, version = await _aassign_script(keys=keys, args=args)
+        return MatchmakingService._assign_result(user, game_id, version, profile)
+
+    @staticmethod
+    def lobby(limit=50):
+        """Открытые комнаты с живыми банками — самые заполненные первыми."""
+        rooms = r.zrevrange(LOBBY_KEY, 0, limit - 1, withscores=True)
+        pipe = r.pipeline()
+        for game_id, _ in rooms:
+            pipe.hmget(ROOM_KEY.format(game_id=game_id), "status", "pot")
+        states = pipe.execute()
+
+        result = []
+        for (game_id, players), (status, pot) in zip(rooms, states):
+            if status is None:
+                continue
+            result.append({
+                "game_id": int(game_id),
+                "status": status,
+                "players_count": int(players),
+                "capacity": settings.PVP_ROOM_CAPACITY,
+                "pot_amount_ton": str(from_cents(pot or 0)),
+            })
+        return result
@@ -0,0 +1,98 @@
+import time
+import logging
+from django.conf import settings
+
+
+r = settings.REDIS_CLIENT
+ar = settings.ASYNC_REDIS_CLIENT
+logger = logging.getLogger('games.services.presence')
+
+# Кто сейчас подключён к ws/pvp. Во всех zset score — до какого времени запись жива:
+# сокет продлевает её раз в HEARTBEAT_SECONDS, записи упавших воркеров истекают сами.
+ONLINE_KEY = "pvp_online"                          # zset: user_id -> expires_at
+ROOM_ONLINE_KEY = "pvp_online:room:{game_id}"      # zset: user_id -> expires_at
+USER_CONNS_KEY = "pvp_online:user:{user_id}"       # zset: channel_name -> expires_at (вкладки игрока)
+
+# группа всех авторизованных сокетов — для рассылки online_count
+ONLINE_GROUP = "pvp_online"
+# группа всех сокетов одного игрока — для личных уведомлений (games/event_handlers.py)
+USER_GROUP = "pvp_user_{user_id}"
+
+HEARTBEAT_SECONDS = 30
+PRESENCE_TTL = 90
+
+# KEYS: user_conns, online, room_online
+# ARGV: channel_name, user_id, expires_at, ttl
+TOUCH_LUA = """
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[2])
+redis.call('ZADD', KEYS[3], ARGV[3], ARGV[2])
+redis.call('EXPIRE', KEYS[3], ARGV[4])
+return 1
+"""
+
+# Игрок уходит из онлайна, только когда закрыт последний его сокет.
+# KEYS: user_conns, online, room_online
+# ARGV: channel_name, user_id, now
+LEAVE_LUA = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+if redis.call('ZCARD', KEYS[1]) > 0 then return 0 end
+redis.call('ZREM', KEYS[2], ARGV[2])
+redis.call('ZREM', KEYS[3], ARGV[2])
+return 1
+"""
+
+# KEYS: online
+# ARGV: now
+COUNT_LUA = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+return redis.call('ZCARD', KEYS[1])
+"""
+
+_count_script = r.register_script(COUNT_LUA)
+_atouch_script = ar.register_script(TOUCH_LUA)
+_aleave_script = ar.register_script(LEAVE_LUA)
+_acount_script = ar.register_script(COUNT_LUA)
+
+
+class Presence:
+    """
+    Онлайн игроков PvP по живым websocket-соединениям (а не по строкам GamePlayer).
+    Счётчик — ZCARD, просроченные записи снимаются перед чтением.
+    """
+
+    @staticmethod
+    def _keys(user_id, game_id):
+        return [
+            USER_CONNS_KEY.format(user_id=user_id),
+            ONLINE_KEY,
+            ROOM_ONLINE_KEY.format(game_id=game_id),
+        ]
+
+    @staticmethod
+    async def atouch(user_id, channel_name, game_id):
+        """Подключение и heartbeat сокета."""
+        await _atouch_script(
+            keys=Presence._keys(user_id, game_id),
+            args=[channel_name, user_id, time.time() + PRESENCE_TTL, PRESENCE_TTL],
+        )
+
+    @staticmethod
+    async def aleave(user_id, channel_name, game_id):
+        await _aleave_script(
+            keys=Presence._keys(user_id, game_id),
+            args=[channel_name, user_id, time.time()],
+        )
+
+    @staticmethod
+    def count(game_id=None):
+        """Сколько игроков онлайн — всего или в комнате."""
+        key = ROOM_ONLINE_KEY.format(game_id=game_id) if game_id else ONLINE_KEY
+        return int(_count_script(keys=[key], args=[time.time()]))
+
+    @staticmethod
+    async def acount(game_id=None):
+        key = ROOM_ONLINE_KEY.format(game_id=game_id) if game_id else ONLINE_KEY
+        return int(await _acount_script(keys=[key], args=[time.time()]))
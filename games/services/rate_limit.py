@@ -0,0 +1,68 @@
+import logging
+from django.conf import settings
+
+
+r = settings.REDIS_CLIENT
+ar = settings.ASYNC_REDIS_CLIENT
+logger = logging.getLogger('games.services.rate_limit')
+
+# bucket на пару (действие, пользователь) — общий для всех сокетов и всех воркеров
+BUCKET_KEY = "pvp_rate:{action}:{subject}"
+
+# Token bucket. Время берём у Redis, чтобы часы воркеров не влияли на лимит.
+# KEYS: bucket
+# ARGV: capacity (burst), refill (токенов в секунду)
+# Возвращает {1, 0} — пропустить, {0, ms} — отказ и через сколько мс появится токен.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) / 1000 * refill)
+
+local allowed, wait = 0, 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = math.ceil((1 - tokens) / refill * 1000)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / refill * 1000) + 1000)
+return {allowed, wait}
+"""
+
+_bucket_script = r.register_script(TOKEN_BUCKET_LUA)
+_abucket_script = ar.register_script(TOKEN_BUCKET_LUA)
+
+
+class RateLimiter:
+    """
+    Распределённый лимит действий websocket по пользователю и типу действия.
+    Параметры bucket (burst, пополнение в секунду) — settings.PVP_RATE_LIMITS.
+    """
+
+    @staticmethod
+    def _call(action, subject):
+        burst, refill = settings.PVP_RATE_LIMITS[action]
+        return [BUCKET_KEY.format(action=action, subject=subject)], [burst, refill]
+
+    @staticmethod
+    def allow(action, subject):
+        """Возвращает (allowed, retry_after_ms)."""
+        keys, args = RateLimiter._call(action, subject)
+        allowed, wait = _bucket_script(keys=keys, args=args)
+        return bool(allowed), wait
+
+    @staticmethod
+    async def aallow(action, subject):
+        keys, args = RateLimiter._call(action, subject)
+        allowed, wait = await _abucket_script(keys=keys, args=args)
+        if not allowed:
+            logger.warning(f"Лимит {action} для {subject}: повтор через {wait} мс")
+        return bool(allowed), wait
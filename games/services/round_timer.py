@@ -0,0 +1,187 @@
+import math
+import time
+import uuid
+import asyncio
+import logging
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from games.services.live_round import ROOM_KEY, ACTIVE_ROOMS_KEY
+from games.services.presence import Presence, ONLINE_GROUP
+
+
+r = settings.REDIS_CLIENT
+ar = settings.ASYNC_REDIS_CLIENT
+logger = logging.getLogger('games.services.round_timer')
+
+DEADLINES_KEY = "pvp_round_deadlines"        # zset: game_id -> дедлайн раунда (unix time)
+LEADER_KEY = "pvp_round_timer:leader"        # кто из процессов сейчас ведёт таймеры
+
+TICK_SECONDS = 1.0
+LEADER_TTL_MS = 5000
+# сколько раундов рассчитывать в одной транзакции
+SETTLE_BATCH_SIZE = 100
+
+# продлеваем лидерство, только если ключ всё ещё наш
+RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class RoundTimer:
+    @staticmethod
+    def schedule(game_id, duration):
+        """Ставит дедлайн раунда. Сам отсчёт и расчёт ведёт RoundTimerService."""
+        deadline = time.time() + duration
+        pipe = r.pipeline()
+        pipe.zadd(DEADLINES_KEY, {game_id: deadline})
+        pipe.hset(ROOM_KEY.format(game_id=game_id), "deadline", deadline)
+        pipe.execute()
+        logger.info(f"Раунд {game_id}: дедлайн через {duration} сек")
+        return deadline
+
+    @staticmethod
+    async def aschedule(game_id, duration):
+        deadline = time.time() + duration
+        pipe = ar.pipeline()
+        pipe.zadd(DEADLINES_KEY, {game_id: deadline})
+        pipe.hset(ROOM_KEY.format(game_id=game_id), "deadline", deadline)
+        await pipe.execute()
+        logger.info(f"Раунд {game_id}: дедлайн через {duration} сек")
+        return deadline
+
+    @staticmethod
+    def get_deadline(game_id):
+        deadline = r.zscore(DEADLINES_KEY, game_id)
+        return float(deadline) if deadline is not None else None
+
+    @staticmethod
+    async def aget_deadline(game_id):
+        deadline = await ar.zscore(DEADLINES_KEY, game_id)
+        return float(deadline) if deadline is not None else None
+
+
+class RoundTimerService:
+    """
+    Один asyncio-цикл на все комнаты: раз в секунду рассылает оставшееся время
+    идущим раундам (клиентам в режиме ticks) и отдаёт в Celery расчёт раундов, чей дедлайн прошёл.
+    Раз в PVP_ONLINE_PUSH_SECONDS рассылает всем сокетам online_count, если он изменился.
+    Раунды, дедлайн которых пришёлся на один тик, уходят на расчёт одной пачкой.
+    Раз в PVP_SETTLE_SWEEP_SECONDS возвращает в очередь живые комнаты, чей дедлайн давно прошёл,
+    а в DEADLINES_KEY их нет (упал процесс между отправкой и ZREM, задача потерялась в Celery).
+    Дедлайны лежат в sorted set Redis, поэтому переживают рестарт процесса;
+    при нескольких экземплярах работает только лидер.
+    """
+
+    def __init__(self):
+        self.redis = aioredis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=True)
+        self.channel_layer = get_channel_layer()
+        self.node_id = uuid.uuid4().hex
+        self.renew_script = self.redis.register_script(RENEW_LUA)
+        self.online_count = None
+        self.online_checked_at = 0.0
+        self.swept_at = 0.0
+
+    async def is_leader(self):
+        if await self.redis.set(LEADER_KEY, self.node_id, nx=True, px=LEADER_TTL_MS):
+            logger.info(f"Таймер раундов {self.node_id} стал лидером")
+            return True
+        return bool(await self.renew_script(keys=[LEADER_KEY], args=[self.node_id, LEADER_TTL_MS]))
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            try:
+                if await self.is_leader():
+                    await self.tick()
+            except Exception as e:
+                logger.error(f"Ошибка в цикле таймера раундов: {e}")
+
+            next_tick += TICK_SECONDS
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    async def tick(self):
+        now = time.time()
+        deadlines = await self.redis.zrange(DEADLINES_KEY, 0, -1, withscores=True)
+        due, updates = [], []
+        for game_id, deadline in deadlines:
+            remaining = math.ceil(deadline - now)
+            if remaining <= 0:
+                due.append(game_id)
+            elif settings.PVP_TIMER_TICKS:
+                # ежесекундные timer_update получают только сокеты в режиме ticks
+                updates.append(self.channel_layer.group_send(
+                    f"pvp_{game_id}_ticks",
+                    {"type": "timer_update", "remaining": remaining},
+                ))
+
+        if updates:
+            await asyncio.gather(*updates)
+        if due:
+            await self.settle([int(game_id) for game_id in due])
+        await self.push_online_count(now)
+        await self.sweep(now)
+
+    async def push_online_count(self, now):
+        if now - self.online_checked_at < settings.PVP_ONLINE_PUSH_SECONDS:
+            return
+        self.online_checked_at = now
+        count = await Presence.acount()
+        if count == self.online_count:
+            return
+        self.online_count = count
+        await self.channel_layer.group_send(ONLINE_GROUP, {"type": "online_count", "online_count": count})
+
+    async def sweep(self, now):
+        if now - self.swept_at < settings.PVP_SETTLE_SWEEP_SECONDS:
+            return
+        self.swept_at = now
+
+        game_ids = list(await self.redis.smembers(ACTIVE_ROOMS_KEY))
+        if not game_ids:
+            return
+        pipe = self.redis.pipeline()
+        for game_id in game_ids:
+            pipe.hget(ROOM_KEY.format(game_id=game_id), "deadline")
+            pipe.zscore(DEADLINES_KEY, game_id)
+        values = await pipe.execute()
+
+        lost = {}
+        for game_id, deadline, scheduled in zip(game_ids, values[0::2], values[1::2]):
+            # дедлайн в комнате ставится вместе с записью в DEADLINES_KEY; grace — время на сам расчёт
+            if deadline is not None and scheduled is None and float(deadline) + settings.PVP_SETTLE_SWEEP_GRACE < now:
+                lost[game_id] = float(deadline)
+        if not lost:
+            return
+        # повторный расчёт безопасен: finish_game пропускает уже завершённые раунды
+        logger.warning(f"Раунды {sorted(lost)}: дедлайн прошёл, но расчёта нет — возвращаем в очередь")
+        await self.redis.zadd(DEADLINES_KEY, lost, nx=True)
+
+    async def settle(self, game_ids):
+        from games.tasks import finish_game_task, finish_games_task
+
+        if len(game_ids) == 1 or not settings.PVP_BATCH_SETTLEMENT:
+            batches = [[game_id] for game_id in game_ids]
+        else:
+            # раунды с общим дедлайном рассчитываем пачками в одной транзакции
+            batches = [game_ids[i:i + SETTLE_BATCH_SIZE] for i in range(0, len(game_ids), SETTLE_BATCH_SIZE)]
+
+        logger.info(f"Раунды {game_ids}: дедлайн прошёл, отправляем на расчёт")
+        for batch in batches:
+            try:
+                if len(batch) == 1:
+                    await sync_to_async(finish_game_task.delay, thread_sensitive=False)(batch[0])
+                else:
+                    await sync_to_async(finish_games_task.delay, thread_sensitive=False)(batch)
+            except Exception as e:
+                # дедлайн остаётся в DEADLINES_KEY — следующий тик попробует снова
+                logger.error(f"Раунды {batch}: не удалось отправить на расчёт: {e}")
+                continue
+            # дедлайн снимаем только после отправки: падение между ними даст повтор,
+            # а finish_game пропустит уже рассчитанный раунд
+            await self.redis.zrem(DEADLINES_KEY, *batch)
@@ -0,0 +1,121 @@
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from games.protocol import JsonCodec
+from games.services.game import GameService
+
+
+r = settings.REDIS_CLIENT
+ar = settings.ASYNC_REDIS_CLIENT
+
+# готовый JSON снапшота комнаты для конкретной версии
+SNAPSHOT_KEY = "pvp_room:{game_id}:snapshot:{version}"
+
+# версия меняется на каждой ставке и при расчёте, старые снапшоты просто истекают
+SNAPSHOT_TTL = 60
+LOCAL_CACHE_SIZE = 512
+
+
+class SnapshotCache:
+    """
+    Снапшот комнаты сериализуется один раз на версию: JSON кладётся в Redis по (room, version),
+    в группу рассылается только указатель на версию, а обработчики game_state отдают готовые кадры.
+    В процессе держим небольшой LRU по (room, version, codec), чтобы сокеты одного воркера
+    не ходили в Redis и не перекодировали одну и ту же версию.
+    """
+
+    _local = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def message(state):
+        return {"type": "game_state", **state}
+
+    @staticmethod
+    def _remember(game_id, version, codec_name, payload):
+        key = (game_id, version, codec_name)
+        with SnapshotCache._lock:
+            SnapshotCache._local[key] = payload
+            SnapshotCache._local.move_to_end(key)
+            while len(SnapshotCache._local) > LOCAL_CACHE_SIZE:
+                SnapshotCache._local.popitem(last=False)
+
+    @staticmethod
+    def get_local(game_id, version, codec=JsonCodec):
+        with SnapshotCache._lock:
+            return SnapshotCache._local.get((int(game_id), version, codec.name))
+
+    @staticmethod
+    def _encode(game_id, version, state, codec):
+        text = JsonCodec.dumps(SnapshotCache.message(state))
+        SnapshotCache._remember(game_id, version, JsonCodec.name, text)
+        if codec is JsonCodec:
+            return text, text
+        payload = codec.dumps(SnapshotCache.message(state))
+        SnapshotCache._remember(game_id, version, codec.name, payload)
+        return text, payload
+
+    @staticmethod
+    def _from_json(game_id, version, text, codec):
+        """Кадр в нужном кодеке из JSON, пришедшего из Redis."""
+        SnapshotCache._remember(game_id, version, JsonCodec.name, text)
+        if codec is JsonCodec:
+            return text
+        payload = codec.dumps(JsonCodec.loads(text))
+        SnapshotCache._remember(game_id, version, codec.name, payload)
+        return payload
+
+    @staticmethod
+    def publish(game_id, codec=JsonCodec):
+        """
+        Собирает и сериализует текущий снапшот.
+        Возвращает (version, state, payload); version = None, если комнаты нет в Redis
+        (снапшот из БД не кэшируем — тогда в группу уходит сам state).
+        """
+        game_id = int(game_id)
+        state = GameService.get_game_state(game_id)
+        version = state.get("version")
+        if version is None:
+            return None, state, codec.dumps(SnapshotCache.message(state))
+
+        text, payload = SnapshotCache._encode(game_id, version, state, codec)
+        # nx: если версию уже сериализовал другой воркер — оставляем его строку
+        r.set(SNAPSHOT_KEY.format(game_id=game_id, version=version), text, ex=SNAPSHOT_TTL, nx=True)
+        return version, state, payload
+
+    @staticmethod
+    async def apublish(game_id, codec=JsonCodec):
+        game_id = int(game_id)
+        state = await GameService.aget_game_state(game_id)
+        version = state.get("version")
+        if version is None:
+            return None, state, codec.dumps(SnapshotCache.message(state))
+
+        text, payload = SnapshotCache._encode(game_id, version, state, codec)
+        await ar.set(SNAPSHOT_KEY.format(game_id=game_id, version=version), text, ex=SNAPSHOT_TTL, nx=True)
+        return version, state, payload
+
+    @staticmethod
+    def get(game_id, version, codec=JsonCodec):
+        game_id = int(game_id)
+        payload = SnapshotCache.get_local(game_id, version, codec)
+        if payload is not None:
+            return payload
+
+        text = SnapshotCache.get_local(game_id, version) or r.get(SNAPSHOT_KEY.format(game_id=game_id, version=version))
+        if text is None:
+            # снапшот истёк или ещё не записан — отдаём актуальное состояние
+            return SnapshotCache.publish(game_id, codec)[2]
+        return SnapshotCache._from_json(game_id, version, text, codec)
+
+    @staticmethod
+    async def aget(game_id, version, codec=JsonCodec):
+        game_id = int(game_id)
+        payload = SnapshotCache.get_local(game_id, version, codec)
+        if payload is not None:
+            return payload
+
+        text = SnapshotCache.get_local(game_id, version) or await ar.get(SNAPSHOT_KEY.format(game_id=game_id, version=version))
+        if text is None:
+            return (await SnapshotCache.apublish(game_id, codec))[2]
+        return SnapshotCache._from_json(game_id, version, text, codec)
@@ -1,25 +1,8 @@
 # services/top_players.py
-from django.db.models import Sum, Count, Q
-from django.contrib.auth import get_user_model
-
-User = get_user_model()
+from games.services.leaderboard import Leaderboard
 
 
 def get_top_player():
-    """Возвращает одного лучшего игрока по общему выигрышу в TON"""
-    return (
-        User.objects.annotate(
-            total_wins_ton=Sum(
-                "games_won__pot_amount_ton",
-                filter=Q(games_won__status="finished", games_won__mode="pvp"),
-                default=0,
-            ),
-            wins_count=Count(
-                "games_won",
-                filter=Q(games_won__status="finished", games_won__mode="pvp"),
-            ),
-        )
-        .filter(wins_count__gt=0)
-        .order_by("-total_wins_ton")
-        .first()
-    )
+    """Возвращает одного лучшего игрока по общему выигрышу в TON (лидерборд за всё время)"""
+    top = Leaderboard.top("all", limit=1)
+    return top[0] if top else None
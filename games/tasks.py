@@ -2,52 +2,53 @@
 from celery import shared_task
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-import time
 
-@shared_task
-def start_timer_task(game_id, duration):
-    """
-    Сообщаем клиентам, что стартовал таймер.
-    """
+
+def send_game_finished(game_id, game_data):
     channel_layer = get_channel_layer()
     async_to_sync(channel_layer.group_send)(
         f"pvp_{game_id}",
         {
-            "type": "timer_started",
-            "duration": duration
+            "type": "game_finished",
+            **game_data
         }
     )
 
 
 @shared_task
-def send_timer_task(game_id, duration):
+def finish_game_task(game_id):
     """
-    Каждую секунду шлём оставшееся время.
+    Расчёт раунда. Запускается таймером раундов (RoundTimerService), когда прошёл дедлайн.
     """
-    channel_layer = get_channel_layer()
-    for remaining in range(duration, 0, -1):
-        async_to_sync(channel_layer.group_send)(
-            f"pvp_{game_id}",
-            {
-                "type": "timer_update",
-                "remaining": remaining
-            }
-        )
-        time.sleep(1)
+    from .services.game import GameService
+
+    game_data = GameService.finish_game(game_id)
+    if game_data is None:
+        return
+
+    # Отправляем финальное состояние
+    send_game_finished(game_id, game_data)
 
 
 @shared_task
-def finish_game_task(game_id):
+def finish_games_task(game_ids):
+    """
+    Пакетный расчёт раундов, у которых дедлайн прошёл в одном тике таймера.
+    Раунды, упавшие в пачке, рассчитываются по одному.
+    """
     from .services.game import GameService
 
-    game_data = GameService.finish_game(game_id)
+    results, failed = GameService.finish_games(game_ids)
+    for game_id, game_data in results.items():
+        send_game_finished(game_id, game_data)
+    for game_id in failed:
+        finish_game_task.delay(game_id)
 
-    # Отправляем финальное состояние
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        f"pvp_{game_id}",
-        {
-            "type": "game_finished",
-            **game_data
-        }
-    )
+
+@shared_task
+def archive_games_task():
+    """Ежедневный вынос старых игр и спинов в холодный архив (GameArchive)."""
+    from .services.archive import GameArchive
+
+    GameArchive.archive_games()
+    GameArchive.archive_spins()
@@ -1,3 +1,270 @@
-from django.test import TestCase
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from decimal import Decimal
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from games.services.live_round import LiveRoundStore, to_cents, from_cents
+from games.services.leaderboard import period_of, period_start
+
+
+class LiveRoundAmountsTest(SimpleTestCase):
+    def test_to_cents_round_trip(self):
+        """Суммы хранятся в сотых TON без потери точности"""
+        self.assertEqual(to_cents(Decimal("1.25")), 125)
+        self.assertEqual(to_cents("0.019"), 1)
+        self.assertEqual(to_cents(None), 0)
+        self.assertEqual(from_cents(125), Decimal("1.25"))
+
+    def test_build_state_derives_chances(self):
+        """Шансы считаются из ставок при чтении состояния"""
+        room = {"status": "running", "version": "3", "pot": "400"}
+        players = [
+            {"id": 1, "username": "a", "avatar_url": "", "bet_ton": 100, "gifts_ton": 0, "joined_at": 1.0},
+            {"id": 2, "username": "b", "avatar_url": "", "bet_ton": 0, "gifts_ton": 300, "joined_at": 2.0},
+        ]
+        gifts = [{"id": 7, "user_id": 2, "price_ton": "3.00"}]
+
+        state = LiveRoundStore.build_state(5, (room, players, gifts))
+
+        self.assertEqual(state["version"], 3)
+        self.assertEqual(state["pot_amount_ton"], "4.00")
+        self.assertEqual([p["chance_percent"] for p in state["players"]], [25.0, 75.0])
+        self.assertEqual(state["players"][1]["gifts"], [{"id": 7, "price_ton": "3.00"}])
+
+    def test_batch_result_is_one_delta(self):
+        """Пачка ставок даёт одну дельту; отклонённые ставки в неё не попадают"""
+        a, b = SimpleNamespace(id=1), SimpleNamespace(id=2)
+        bets = [(a, 100, (), 500), (b, 900, (), 500), (a, 100, (), 500)]
+        players = [
+            '{"id": 1, "username": "a", "avatar_url": "", "bet_ton": 200, "gifts_ton": 0}',
+            '{"id": 2, "username": "b", "avatar_url": "", "bet_ton": 0, "gifts_ton": 0}',
+        ]
+
+        delta, codes = LiveRoundStore._bets_result(5, bets, [4, "200", [1, -4, 1], players], [[], [], []])
+
+        self.assertEqual(codes, [1, -4, 1])
+        self.assertEqual(delta["seq"], 4)
+        self.assertEqual([p["id"] for p in delta["players"]], [1])
+        self.assertEqual(delta["chances"], [[1, 100.0], [2, 0.0]])
+
+    def test_single_bet_delta_has_same_shape(self):
+        """Одиночная ставка даёт ту же дельту, что и пачка: players — список из одного игрока"""
+        a = SimpleNamespace(id=1)
+        players = ['{"id": 1, "username": "a", "avatar_url": "", "bet_ton": 100, "gifts_ton": 0}']
+
+        delta, codes = LiveRoundStore._bets_result(5, [(a, 100, (), -1)], [2, "100", [1], players], [[]])
+        delta = LiveRoundStore._single_bet(delta, codes)
+
+        self.assertNotIn("player", delta)
+        self.assertEqual([p["id"] for p in delta["players"]], [1])
+
+
+class SnapshotCacheLocalTest(SimpleTestCase):
+    def test_local_cache_is_bounded_lru(self):
+        """Локальный кэш снапшотов не растёт больше лимита и вытесняет старые версии"""
+        from games.services import snapshot_cache
+        from games.services.snapshot_cache import SnapshotCache
+
+        SnapshotCache._local.clear()
+        for version in range(snapshot_cache.LOCAL_CACHE_SIZE + 1):
+            SnapshotCache._remember(1, version, "json", f"v{version}")
+
+        self.assertEqual(len(SnapshotCache._local), snapshot_cache.LOCAL_CACHE_SIZE)
+        self.assertIsNone(SnapshotCache.get_local(1, 0))
+        self.assertEqual(SnapshotCache.get_local(1, 5), "v5")
+        SnapshotCache._local.clear()
+
+
+class HandshakeTokenTest(SimpleTestCase):
+    def test_token_from_subprotocol_or_query(self):
+        """Токен берётся из subprotocol access_token, иначе из query string"""
+        from games.middleware import get_token
+
+        self.assertEqual(
+            get_token({"subprotocols": ["access_token", "abc.def"], "query_string": b"token=zzz"}),
+            ("abc.def", "access_token"),
+        )
+        self.assertEqual(get_token({"subprotocols": [], "query_string": b"token=zzz"}), ("zzz", None))
+        self.assertEqual(get_token({"query_string": b""}), (None, None))
+
+
+class WireProtocolTest(SimpleTestCase):
+    def test_compact_uses_positional_records(self):
+        """В msgpack-кадрах игроки и подарки идут массивами в порядке схемы"""
+        from games.protocol import compact, PLAYER_FIELDS, GIFT_FIELDS
+
+        gift = {f: None for f in GIFT_FIELDS}
+        gift.update({"id": 7, "price_ton": "3.00"})
+        message = {
+            "type": "game_state",
+            "players": [{"id": 1, "username": "a", "avatar_url": "", "bet_ton": "1.00",
+                         "chance_percent": 100.0, "gifts": [gift]}],
+        }
+
+        row = compact(message)["players"][0]
+
+        self.assertEqual(len(row), len(PLAYER_FIELDS))
+        self.assertEqual(row[:2], [1, "a"])
+        self.assertEqual(row[-1][0][GIFT_FIELDS.index("price_ton")], "3.00")
+
+    def test_negotiate_falls_back_to_json(self):
+        from games.protocol import negotiate, JsonCodec
+
+        self.assertEqual(negotiate(["access_token", "abc"]), (JsonCodec, None))
+        self.assertEqual(negotiate(["pvp.json.v1"]), (JsonCodec, "pvp.json.v1"))
+
+
+class SendQueueTest(SimpleTestCase):
+    def test_newer_state_replaces_queued_one(self):
+        """Неотправленный game_state заменяется новым, дельты идут по порядку"""
+        import asyncio
+        from games.send_queue import SendQueue
+
+        async def scenario():
+            sent = []
+
+            async def deliver(message):
+                sent.append(message)
+
+            queue = SendQueue(deliver, lambda backlog: None, max_backlog=10, grace=1.0)
+            queue.put({"v": 1}, key="game_state")
+            queue.put({"d": 1})
+            queue.put({"v": 2}, key="game_state")
+            await asyncio.sleep(0)
+            await queue.close()
+            return sent
+
+        self.assertEqual(asyncio.run(scenario()), [{"v": 2}, {"d": 1}])
+
+    def test_overflow_evicts(self):
+        import asyncio
+        from games.send_queue import SendQueue
+
+        async def scenario():
+            evicted = []
+
+            async def deliver(message):
+                await asyncio.sleep(10)
+
+            queue = SendQueue(deliver, evicted.append, max_backlog=2, grace=60)
+            for i in range(6):
+                queue.put({"d": i})
+            await queue.close()
+            return evicted, queue.overflowed
+
+        evicted, overflowed = asyncio.run(scenario())
+        self.assertTrue(overflowed)
+        self.assertEqual(evicted, [5])
+
+    def test_send_error_does_not_stop_queue(self):
+        """Ошибка одного сообщения пропускается, ошибка транспорта останавливает очередь и закрывает сокет"""
+        import asyncio
+        from games.send_queue import SendQueue
+
+        async def scenario():
+            sent, closed = [], []
+
+            async def deliver(message):
+                if message["d"] == 1:
+                    raise ValueError("codec")
+                if message["d"] == 3:
+                    raise ConnectionResetError()
+                sent.append(message["d"])
+
+            queue = SendQueue(deliver, lambda backlog: None, max_backlog=10, grace=1.0, on_closed=closed.append)
+            for i in range(5):
+                queue.put({"d": i})
+            await asyncio.sleep(0)
+            await queue.close()
+            return sent, len(closed), len(queue)
+
+        self.assertEqual(asyncio.run(scenario()), ([0, 2], 1, 0))
+
+
+class TimerSyncTest(SimpleTestCase):
+    def test_reconnect_gets_timer_started(self):
+        """Переподключившийся сокет получает timer_started с текущим дедлайном"""
+        import json
+        import time
+        import asyncio
+        from unittest import mock
+        from games.consumers import PvpGameConsumer
+        from games.protocol import JsonCodec
+        from games.send_queue import SendQueue
+
+        deadline = time.time() + 30
+
+        async def scenario():
+            frames = []
+
+            async def send(text_data=None, bytes_data=None):
+                frames.append(json.loads(text_data))
+
+            consumer = PvpGameConsumer()
+            consumer.codec = JsonCodec
+            consumer.game_id = 5
+            consumer.send = send
+            consumer.outbox = SendQueue(consumer.deliver, lambda backlog: None, max_backlog=10, grace=1.0)
+            with mock.patch("games.consumers.RoundTimer.aget_deadline", mock.AsyncMock(return_value=deadline)):
+                await consumer.send_timer_sync()
+            await asyncio.sleep(0)
+            await consumer.outbox.close()
+            return frames
+
+        frames = asyncio.run(scenario())
+        self.assertEqual([frame["type"] for frame in frames], ["timer_started"])
+        self.assertEqual(frames[0]["deadline"], int(deadline * 1000))
+        self.assertIn(frames[0]["duration"], (29, 30))
+
+
+class LeaderboardPeriodTest(SimpleTestCase):
+    def test_periods_roll_over_in_utc(self):
+        """Дневной и недельный лидерборды начинаются заново на границе периода"""
+        moment = datetime(2026, 1, 1, 15, 30, tzinfo=timezone.utc)  # четверг, 1-я ISO-неделя
+
+        self.assertEqual(period_of("day", moment), "20260101")
+        self.assertEqual(period_of("week", moment), "2026W01")
+        self.assertEqual(period_of("all", moment), "all")
+        self.assertEqual(period_start("week", moment), datetime(2025, 12, 29, tzinfo=timezone.utc))
+        self.assertIsNone(period_start("all", moment))
+
+
+class SettledEventPayloadTest(SimpleTestCase):
+    def test_history_row_survives_json(self):
+        """Строка истории из payload ROUND_SETTLED после JSON восстанавливается с Decimal и datetime"""
+        import json
+        from django.core.serializers.json import DjangoJSONEncoder
+        from core.events import to_payload, from_payload
+        from games.models import PlayerGameHistory
+
+        ended_at = datetime(2026, 1, 1, 15, 30, tzinfo=timezone.utc)
+        row = PlayerGameHistory(
+            user_id=7, game_id=12, mode="pvp", result="win",
+            bet_ton=Decimal("1.50"), stake_ton=Decimal("2.00"), chance_percent=Decimal("40.00"),
+            pot_amount_ton=Decimal("5.00"), payout_ton=Decimal("4.75"), gifts=[],
+            started_at=ended_at, ended_at=ended_at,
+        )
+        data = json.loads(json.dumps(to_payload(row), cls=DjangoJSONEncoder))
+        restored = from_payload(PlayerGameHistory, data)
+
+        self.assertIsNone(restored.id)
+        self.assertEqual((restored.user_id, restored.game_id), (7, 12))
+        self.assertEqual(restored.payout_ton, Decimal("4.75"))
+        self.assertEqual(restored.ended_at, ended_at)
+
+
+class GameArchiveFileTest(SimpleTestCase):
+    def test_chunk_round_trip(self):
+        """Пачка архива пишется gzip JSONL в хранилище и читается обратно построчно"""
+        import tempfile
+        from django.test import override_settings
+        from games.services.archive import GameArchive, archive_storage
+
+        records = [{"game": {"id": 5, "pot_amount_ton": Decimal("3.00")}, "players": [], "summary": None}]
+        moment = datetime(2025, 11, 3, tzinfo=timezone.utc)
+        with tempfile.TemporaryDirectory() as root, override_settings(USE_S3=False, GAME_ARCHIVE_ROOT=root):
+            path = GameArchive._write(archive_storage(), "game", records, 5, 5, moment)
+            self.assertEqual(path, "game/2025-11/game-5-5.jsonl.gz")
+            self.assertEqual(list(GameArchive._read(path)), [
+                {"game": {"id": 5, "pot_amount_ton": "3.00"}, "players": [], "summary": None},
+            ])
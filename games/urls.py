@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import GameHistoryView, TopPlayersAPIView, PvPGameHistoryAPIView, PvpGameDetailView, LastPvpWinnerView, OnlinePlayersCountView
+from .views import GameHistoryView, TopPlayersAPIView, PvPGameHistoryAPIView, PvpGameDetailView, LastPvpWinnerView, OnlinePlayersCountView, LobbyView, LeaderboardView, LeaderboardMeView
 
 urlpatterns = [
     # История игр текущего пользователя (PVP, Daily и пр.) → только авторизованный
@@ -29,6 +29,13 @@ urlpatterns = [
     #количество онлайн игроков
     path("online-count/", OnlinePlayersCountView.as_view(), name="online-count"),
 
+    #открытые комнаты с банками
+    path("lobby/", LobbyView.as_view(), name="pvp-lobby"),
+
+    #лидерборды за день / неделю / всё время и место текущего пользователя
+    path("leaderboard/", LeaderboardView.as_view(), name="leaderboard"),
+    path("leaderboard/me/", LeaderboardMeView.as_view(), name="leaderboard-me"),
+
     # path("telegram/webhook/", TelegramStarsWebhookView.as_view(), name="telegram-stars-webhook"),
 
 ]
\ No newline at end of file
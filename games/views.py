@@ -2,7 +2,10 @@ import logging
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from .models import Game, GamePlayer
+from .models import GamePlayer, PvpGameSummary, PlayerGameHistory
+from core.pagination import KeysetPagination
+from core.response_cache import cached_response, LAST_WINNER, TOP, PVP_HISTORY
+from user.authentication import PrincipalJWTAuthentication
 from .serializers import (
     GameHistorySerializer,
     PublicPvpGameSerializer,
@@ -10,6 +13,8 @@ from .serializers import (
     TopPlayerSerializer,
     LastWinnerSerializer,
     OnlinePlayersCountSerializer,
+    LobbyRoomSerializer,
+    LeaderboardEntrySerializer,
 )
 from django.db.models import Sum, Count, Q
 from rest_framework.generics import ListAPIView
@@ -19,15 +24,20 @@ from django.db import transaction
 from .services.top_players import get_top_player 
 from django.core.exceptions import ValidationError
 from decimal import Decimal
-from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample, OpenApiParameter
 from .services.last_winner import get_last_pvp_winner
 from .services.game import GameService
+from .services.matchmaking import MatchmakingService
+from .services.leaderboard import Leaderboard, WINDOWS
+from .services.archive import GameArchive
 from .api_examples import (
     GAME_HISTORY_EXAMPLE,
     TOP_PLAYER_EXAMPLE,
     PVP_GAME_HISTORY_EXAMPLE,
     PVP_GAME_DETAIL_EXAMPLE,
     LAST_WINNER_EXAMPLE,
+    LOBBY_EXAMPLE,
+    LEADERBOARD_EXAMPLE,
 )
 
 
@@ -35,13 +45,22 @@ logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+class GameHistoryPagination(KeysetPagination):
+    # индекс player_history_page_idx (user, -ended_at, -id)
+    ordering = ("-ended_at", "-id")
+
+
 class GameHistoryView(ListAPIView):
     serializer_class = GameHistorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = GameHistoryPagination
     
     @extend_schema(
         summary="История игр пользователя",
-        description="Возвращает последние 20 игр текущего пользователя с деталями ставок и подарков",
+        description=(
+            "Возвращает игры текущего пользователя, новые первыми, с результатом, ставкой, подарками и выигрышем. "
+            "Следующая страница — по ссылке next (курсор), глубина страницы на скорость не влияет"
+        ),
         responses={
             200: OpenApiResponse(
                 response=GameHistorySerializer,
@@ -60,17 +79,12 @@ class GameHistoryView(ListAPIView):
         return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
-        user = self.request.user
-        return (
-            Game.objects.filter(players__user=user)
-            .select_related("winner")
-            .prefetch_related("players__gifts")
-            .order_by("-started_at")[:20]
-        )
+        return PlayerGameHistory.objects.filter(user_id=self.request.user.id)
 
 
 class TopPlayersAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    authentication_classes = [PrincipalJWTAuthentication]
     
     @extend_schema(
         summary="Лучший игрок",
@@ -90,6 +104,7 @@ class TopPlayersAPIView(APIView):
         },
         tags=["Games"],
     )
+    @cached_response(TOP)
     def get(self, request):
         top_player = get_top_player()
         if not top_player:
@@ -99,9 +114,16 @@ class TopPlayersAPIView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class PvpGameHistoryPagination(KeysetPagination):
+    # индекс pvp_summary_page_idx (-started_at, -game)
+    ordering = ("-started_at", "-game_id")
+
+
 class PvPGameHistoryAPIView(ListAPIView):
     permission_classes = [IsAuthenticated]
+    authentication_classes = [PrincipalJWTAuthentication]
     serializer_class = PublicPvpGameSerializer
+    pagination_class = PvpGameHistoryPagination
     
     @extend_schema(
         summary="История PVP игр",
@@ -120,17 +142,12 @@ class PvPGameHistoryAPIView(ListAPIView):
         },
         tags=["Games"],
     )
+    @cached_response(PVP_HISTORY)
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
-        return (
-            Game.objects
-            .filter(mode="pvp", status="finished")
-            .select_related("winner")
-            .prefetch_related("players__gifts", "players")
-            .order_by("-started_at")
-        )
+        return PvpGameSummary.objects.all()
 
 
 class PvpGameDetailView(APIView):
@@ -158,25 +175,23 @@ class PvpGameDetailView(APIView):
 
     def get(self, request, game_id):
         try:
-            game = (
-                Game.objects
-                .filter(id=game_id, mode="pvp", status="finished")
-                .select_related("winner")
-                .prefetch_related("players__gifts", "players")
-                .get()
-            )
-        except Game.DoesNotExist:
+            summary = PvpGameSummary.objects.get(game_id=game_id)
+        except PvpGameSummary.DoesNotExist:
+            # старые игры вынесены из горячих таблиц — читаем из архива
+            summary = GameArchive.find_summary(game_id)
+        if summary is None:
             return Response(
                 {"detail": "Игра не найдена"}, 
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        serializer = PvpGameDetailSerializer(game)
+        serializer = PvpGameDetailSerializer(summary)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class LastPvpWinnerView(APIView):
     permission_classes = [IsAuthenticated]
+    authentication_classes = [PrincipalJWTAuthentication]
     
     @extend_schema(
         summary="Последний победитель PVP игры",
@@ -196,15 +211,14 @@ class LastPvpWinnerView(APIView):
         },
         tags=["Games"],
     )
+    @cached_response(LAST_WINNER)
     def get(self, request):
-        last_game, winner_gp = get_last_pvp_winner()
+        summary = get_last_pvp_winner()
 
-        if not last_game or not winner_gp:
+        if not summary:
             return Response({"detail": "Нет завершённых игр"}, status=404)
 
-        data = LastWinnerSerializer(winner_gp).data
-        data["game_id"] = last_game.id
-        return Response(data)
+        return Response(LastWinnerSerializer(summary).data)
 
 
 class OnlinePlayersCountView(APIView):
@@ -212,7 +226,7 @@ class OnlinePlayersCountView(APIView):
     
     @extend_schema(
         summary="Количество онлайн игроков",
-        description="Возвращает количество уникальных игроков, которые сейчас играют в PVP рулетку (в активных играх со статусом waiting или running)",
+        description="Возвращает количество уникальных игроков, которые сейчас подключены к PVP рулетке по websocket. То же число приходит в сокет сообщением online_count",
         responses={
             200: OpenApiResponse(
                 response=OnlinePlayersCountSerializer,
@@ -230,4 +244,117 @@ class OnlinePlayersCountView(APIView):
     def get(self, request):
         online_count = GameService.get_online_players_count()
         serializer = OnlinePlayersCountSerializer({"online_count": online_count})
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class LobbyView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Открытые PVP комнаты",
+        description="Возвращает открытые PVP комнаты, в которых есть свободные места, с числом игроков и текущим банком",
+        responses={
+            200: OpenApiResponse(
+                response=LobbyRoomSerializer(many=True),
+                description="Успешный ответ",
+                examples=[
+                    OpenApiExample(
+                        name="Пример ответа",
+                        value=LOBBY_EXAMPLE
+                    )
+                ],
+            ),
+        },
+        tags=["Games"],
+    )
+    def get(self, request):
+        rooms = MatchmakingService.lobby()
+        serializer = LobbyRoomSerializer(rooms, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+LEADERBOARD_WINDOW_PARAM = OpenApiParameter(
+    name="window", type=str, location=OpenApiParameter.QUERY, required=False,
+    enum=list(WINDOWS), description="Период: day — сегодня, week — текущая неделя, all — за всё время (по умолчанию)",
+)
+
+
+def leaderboard_window(request):
+    """Окно лидерборда из ?window= или None, если такого нет."""
+    window = request.query_params.get("window", "all")
+    return window if window in WINDOWS else None
+
+
+LEADERBOARD_WINDOW_ERROR = {"detail": f"window должен быть одним из: {', '.join(WINDOWS)}"}
+
+
+class LeaderboardView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Лидерборд PVP",
+        description="Лучшие игроки по сумме выигранных банков за день, неделю или всё время",
+        parameters=[
+            LEADERBOARD_WINDOW_PARAM,
+            OpenApiParameter(name="limit", type=int, location=OpenApiParameter.QUERY, required=False, description="Сколько игроков вернуть (по умолчанию 10, максимум 100)"),
+        ],
+        responses={
+            200: OpenApiResponse(
+                response=LeaderboardEntrySerializer(many=True),
+                description="Успешный ответ",
+                examples=[
+                    OpenApiExample(
+                        name="Пример ответа",
+                        value=LEADERBOARD_EXAMPLE
+                    )
+                ],
+            ),
+            400: OpenApiResponse(description="Неизвестный период или неверный limit"),
+        },
+        tags=["Games"],
+    )
+    def get(self, request):
+        window = leaderboard_window(request)
+        if window is None:
+            return Response(LEADERBOARD_WINDOW_ERROR, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 100)
+        except ValueError:
+            return Response({"detail": "limit должен быть числом"}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = LeaderboardEntrySerializer(Leaderboard.top(window, limit), many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class LeaderboardMeView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Моё место в лидерборде PVP",
+        description="Место текущего пользователя за день, неделю или всё время",
+        parameters=[LEADERBOARD_WINDOW_PARAM],
+        responses={
+            200: OpenApiResponse(
+                response=LeaderboardEntrySerializer,
+                description="Успешный ответ",
+                examples=[
+                    OpenApiExample(
+                        name="Пример ответа",
+                        value=LEADERBOARD_EXAMPLE[1]
+                    )
+                ],
+            ),
+            400: OpenApiResponse(description="Неизвестный период"),
+            404: OpenApiResponse(description="Нет побед за этот период"),
+        },
+        tags=["Games"],
+    )
+    def get(self, request):
+        window = leaderboard_window(request)
+        if window is None:
+            return Response(LEADERBOARD_WINDOW_ERROR, status=status.HTTP_400_BAD_REQUEST)
+
+        entry = Leaderboard.rank_of(request.user, window)
+        if entry is None:
+            return Response({"detail": "Нет побед за этот период"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(LeaderboardEntrySerializer(entry).data, status=status.HTTP_200_OK)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:00
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('gifts', '0003_gift_backdrop_gift_decimals_gift_is_onchain_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='gift',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='gift_inventory_page_idx'),
+        ),
+    ]
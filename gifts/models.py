@@ -138,6 +138,10 @@ class Gift(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['ton_contract_address'], name='unique_tg_nft_id')
         ]
+        indexes = [
+            # инвентарь пользователя: keyset по (created_at, id)
+            models.Index(fields=['user', '-created_at', '-id'], name='gift_inventory_page_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.ton_contract_address or 'NFT'})"
\ No newline at end of file
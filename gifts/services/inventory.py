@@ -4,6 +4,6 @@ class InventoryService:
     @staticmethod
     def get_user_inventory(user):
         """
-        Вернуть QuerySet подарков пользователя
+        Вернуть QuerySet подарков пользователя (порядок задаёт InventoryPagination)
         """
-        return Gift.objects.filter(user=user).order_by("-created_at")
\ No newline at end of file
+        return Gift.objects.filter(user=user)
\ No newline at end of file
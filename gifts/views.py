@@ -13,6 +13,7 @@ from rest_framework import status, generics
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 
 from .serializers import GiftSerializer, GiftWithdrawSerializer
+from core.pagination import KeysetPagination
 from .services.inventory import InventoryService
 from .services.withdrawal import GiftWithdrawalService
 from .services.withdrawal_request import GiftWithdrawalRequestService
@@ -24,24 +25,33 @@ from user.models import User
 logger = logging.getLogger(__name__)
 
 
+class InventoryPagination(KeysetPagination):
+    # индекс gift_inventory_page_idx (user, -created_at, -id)
+    ordering = ("-created_at", "-id")
+
+
 class UserInventoryView(generics.ListAPIView):
     """
     Получить список подарков в инвентаре текущего пользователя
     """
     serializer_class = GiftSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = InventoryPagination
 
     @extend_schema(
         responses={200: GiftSerializer(many=True)},
         summary="Инвентарь пользователя",
-        description="Возвращает список NFT-подарков, принадлежащих текущему аутентифицированному пользователю."
+        description=(
+            "Возвращает NFT-подарки текущего пользователя, новые первыми, страницами. "
+            "Следующая страница — по ссылке next (курсор)."
+        )
     )
     def get(self, request, *args, **kwargs):
-        user = request.user
-        logger.info(f"[Inventory] Запрос списка подарков для пользователя {user.id}")
-        gifts = InventoryService.get_user_inventory(user)
-        serializer = GiftSerializer(gifts, many=True, context={"request": request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        logger.info(f"[Inventory] Запрос списка подарков для пользователя {request.user.id}")
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return InventoryService.get_user_inventory(self.request.user)
 
 
 class UserAddsGift(APIView):
@@ -18,7 +18,7 @@ def get_current_raffle_with_stats(user):
             participants_count=Count("participants", distinct=True),
             user_participates=Exists(
                 DailyRaffleParticipant.objects.filter(
-                    raffle=OuterRef("pk"), user=user
+                    raffle=OuterRef("pk"), user_id=user.id
                 )
             )
         )
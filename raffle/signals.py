@@ -1,11 +1,22 @@
 # raffle/signals.py
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from raffle.models import DailyRaffle
+from raffle.models import DailyRaffle, DailyRaffleParticipant
 from raffle.tasks import schedule_raffle_task
+from core.response_cache import ResponseCache, RAFFLE
 
 
 @receiver(post_save, sender=DailyRaffle)
 def schedule_task(sender, instance, created, **kwargs):
     if created:
         schedule_raffle_task.delay(instance.id)
+
+
+@receiver(post_save, sender=DailyRaffle)
+@receiver(post_delete, sender=DailyRaffle)
+@receiver(post_save, sender=DailyRaffleParticipant)
+@receiver(post_delete, sender=DailyRaffleParticipant)
+def invalidate_current_raffle(sender, instance, **kwargs):
+    # новый розыгрыш, завершение и вступление меняют /api/raffle/current у всех
+    transaction.on_commit(lambda: ResponseCache.invalidate(RAFFLE))
@@ -7,6 +7,7 @@ from django.db import transaction
 
 from raffle.models import DailyRaffle
 from gifts.models import Gift
+from core.events import Outbox, RAFFLE_FINISHED
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +72,12 @@ def finalize_raffle(raffle_id: int):
         raffle.status = "finished"
         raffle.save(update_fields=["status", "updated_at"])
 
+        Outbox.emit(RAFFLE_FINISHED, {
+            "raffle_id": raffle.id,
+            "winner_id": winner.id if winner else None,
+            "prize_id": raffle.prize_id,
+        })
+
         # ---------- Подбор следующего подарка ----------
         current_prize = raffle.prize
 
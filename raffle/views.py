@@ -8,10 +8,13 @@ from .services.join_raffle import join_current_raffle
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from core.response_cache import cached_response, RAFFLE
+from user.authentication import PrincipalJWTAuthentication
 
 
 class CurrentRaffleView(RetrieveAPIView):
     permission_classes = [IsAuthenticated]
+    authentication_classes = [PrincipalJWTAuthentication]
     serializer_class = CurrentRaffleSerializer
 
     def get_object(self):
@@ -30,6 +33,7 @@ class CurrentRaffleView(RetrieveAPIView):
         },
         tags=["Raffle"],
     )
+    @cached_response(RAFFLE, per_user=True)
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
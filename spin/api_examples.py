@@ -63,9 +63,7 @@ def spin_wheel_schema(view_class):
 # ===============================
 def spin_history_schema(view_class):
     example_response = {
-        "count": 2,
-        "next": None,
-        "previous": None,
+        "next": "https://example.com/spin/history/?cursor=WyIyMDI1LTAxLTI4VDEwOjAwOjAwWiIsIDE1XQ%3D%3D",
         "results": [
             {
                 "id": 15,
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SpinConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'spin'
+
+    def ready(self):
+        import spin.signals
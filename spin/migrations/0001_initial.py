@@ -0,0 +1,83 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:00
+
+from decimal import Decimal
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_tables_and_page_index(apps, schema_editor):
+    """
+    У spin не было своих миграций, и на уже развёрнутых базах таблицы spin_* созданы вне них.
+    Там только строим индекс (CONCURRENTLY — без блокировки записи), на пустой базе создаём таблицы.
+    """
+    tables = schema_editor.connection.introspection.table_names()
+    for name in ("SpinWheelSector", "SpinGame"):
+        model = apps.get_model("spin", name)
+        if model._meta.db_table not in tables:
+            # create_model создаст и индексы из Meta, включая spin_game_page_idx
+            schema_editor.create_model(model)
+        elif name == "SpinGame":
+            schema_editor.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS spin_game_page_idx "
+                "ON spin_spingame (played_at DESC, id DESC)"
+            )
+
+
+def drop_page_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS spin_game_page_idx")
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY нельзя выполнять в транзакции
+    atomic = False
+
+    initial = True
+
+    dependencies = [
+        ('gifts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='SpinWheelSector',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('index', models.PositiveSmallIntegerField(verbose_name='Номер сектора')),
+                        ('probability', models.DecimalField(decimal_places=2, default=Decimal('1.0'), max_digits=5, verbose_name='Вероятность выпадения')),
+                        ('gift', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='gifts.gift', verbose_name='Привязанный подарок')),
+                    ],
+                    options={
+                        'verbose_name': 'Сектор колеса',
+                        'verbose_name_plural': 'Сектора колеса',
+                        'ordering': ['index'],
+                        'unique_together': {('index',)},
+                    },
+                ),
+                migrations.CreateModel(
+                    name='SpinGame',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('bet_stars', models.PositiveIntegerField(default=0, verbose_name='Ставка в Stars')),
+                        ('bet_ton', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Ставка в TON')),
+                        ('win_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Выигрыш в TON')),
+                        ('result_sector', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Выигрышный сектор')),
+                        ('played_at', models.DateTimeField(auto_now_add=True)),
+                        ('gift_won', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='gifts.gift', verbose_name='Выигранный подарок')),
+                        ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Игрок')),
+                    ],
+                    options={
+                        'verbose_name': 'Игра Spin',
+                        'verbose_name_plural': 'Игры Spin',
+                        'indexes': [models.Index(fields=['-played_at', '-id'], name='spin_game_page_idx')],
+                    },
+                ),
+            ],
+        ),
+        # отдельной операцией: RunPython внутри database_operations не видит моделей из state_operations
+        migrations.RunPython(create_tables_and_page_index, drop_page_index),
+    ]
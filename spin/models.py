@@ -22,6 +22,10 @@ class SpinGame(models.Model):
     class Meta:
         verbose_name = "Игра Spin"
         verbose_name_plural = "Игры Spin"
+        indexes = [
+            # /spin/history/: keyset по (played_at, id)
+            models.Index(fields=["-played_at", "-id"], name="spin_game_page_idx"),
+        ]
 
     def __str__(self):
         return f"Spin {self.id} для {self.player} ({self.played_at})"
@@ -3,12 +3,14 @@ import math
 import random
 from decimal import Decimal
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.utils.translation import gettext as _
 
 from spin.models import SpinGame, SpinWheelSector
 from gifts.models import Gift
 from core.models import Config
 from core import constants
+from core.events import Outbox, SPIN_PLAYED
 
 
 def _clamp(x, lo=0.0, hi=1.0):
@@ -78,52 +80,63 @@ class SpinService:
     def play(user, bet_stars=0, bet_ton=Decimal("0")):
         SpinService.validate_bet(bet_stars, bet_ton)
 
-        if bet_stars > 0:
-            user.subtract_stars(bet_stars)
-        if bet_ton > 0:
-            user.subtract_ton(bet_ton)
-
-        game = SpinGame.objects.create(player=user, bet_stars=bet_stars, bet_ton=bet_ton)
-
-        sectors = list(SpinWheelSector.objects.filter(probability__gt=0))
-        if not sectors:
-            raise ValidationError(_("Колесо не настроено!"))
-
-        r = SpinService._bet_ratio(bet_stars, bet_ton)
-        weights = SpinService._weighted_probabilities(sectors, r)
-        chosen = random.choices(sectors, weights=weights, k=1)[0]
-
-        game.result_sector = chosen.index
-        game.gift_won = chosen.gift
-        game.save(update_fields=["result_sector", "gift_won"])
-
-        # если у сектора есть подарок
-        if chosen.gift:
-            won_gift = chosen.gift
-            won_gift.user = user
-            won_gift.save(update_fields=["user"])
-
-            # пробуем найти замену
-            replacement = Gift.objects.filter(
-                name=won_gift.name,
-                image_url=won_gift.image_url,
-                ton_contract_address=won_gift.ton_contract_address,
-                price_ton=won_gift.price_ton,
-                rarity_level=won_gift.rarity_level,
-                user__isnull=True,
-            ).exclude(id=won_gift.id).first()
-
-            # если нашли замену — ставим её
-            if replacement:
-                chosen.gift = replacement
-                chosen.save(update_fields=["gift"])
-            else:
-                # если подарков больше нет — перераспределяем и удаляем сектор
-                SpinService._redistribute_probabilities(chosen)
-                # не вызываем chosen.save() — он уже мёртв после delete()
-
-            game.gift_won = won_gift
-            game.save(update_fields=["gift_won"])
+        # ставка, игра, подарок и событие — одной транзакцией
+        with transaction.atomic():
+            if bet_stars > 0:
+                user.subtract_stars(bet_stars)
+            if bet_ton > 0:
+                user.subtract_ton(bet_ton)
+
+            game = SpinGame.objects.create(player=user, bet_stars=bet_stars, bet_ton=bet_ton)
+
+            sectors = list(SpinWheelSector.objects.filter(probability__gt=0))
+            if not sectors:
+                raise ValidationError(_("Колесо не настроено!"))
+
+            r = SpinService._bet_ratio(bet_stars, bet_ton)
+            weights = SpinService._weighted_probabilities(sectors, r)
+            chosen = random.choices(sectors, weights=weights, k=1)[0]
+
+            game.result_sector = chosen.index
+            game.gift_won = chosen.gift
+            game.save(update_fields=["result_sector", "gift_won"])
+
+            # если у сектора есть подарок
+            if chosen.gift:
+                won_gift = chosen.gift
+                won_gift.user = user
+                won_gift.save(update_fields=["user"])
+
+                # пробуем найти замену
+                replacement = Gift.objects.filter(
+                    name=won_gift.name,
+                    image_url=won_gift.image_url,
+                    ton_contract_address=won_gift.ton_contract_address,
+                    price_ton=won_gift.price_ton,
+                    rarity_level=won_gift.rarity_level,
+                    user__isnull=True,
+                ).exclude(id=won_gift.id).first()
+
+                # если нашли замену — ставим её
+                if replacement:
+                    chosen.gift = replacement
+                    chosen.save(update_fields=["gift"])
+                else:
+                    # если подарков больше нет — перераспределяем и удаляем сектор
+                    SpinService._redistribute_probabilities(chosen)
+                    # не вызываем chosen.save() — он уже мёртв после delete()
+
+                game.gift_won = won_gift
+                game.save(update_fields=["gift_won"])
+
+            Outbox.emit(SPIN_PLAYED, {
+                "spin_id": game.id,
+                "user_id": user.id,
+                "bet_stars": bet_stars,
+                "bet_ton": bet_ton,
+                "sector": chosen.index,
+                "gift_id": game.gift_won_id,
+            })
 
         return game, chosen
 
@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from spin.models import SpinWheelSector
+from core.response_cache import ResponseCache, SPIN_WHEEL
+
+
+@receiver(post_save, sender=SpinWheelSector)
+@receiver(post_delete, sender=SpinWheelSector)
+def invalidate_wheel(sender, instance, **kwargs):
+    # сектор меняют админка и SpinService при выдаче последнего подарка
+    transaction.on_commit(lambda: ResponseCache.invalidate(SPIN_WHEEL))
@@ -8,6 +8,9 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.generics import ListAPIView
+from core.pagination import KeysetPagination
+from core.response_cache import cached_response, SPIN_WHEEL
+from user.authentication import PrincipalJWTAuthentication
 
 from .models import SpinGame, SpinWheelSector
 from .serializers import (
@@ -44,23 +47,28 @@ class TelegramStarsWebhookView(APIView):
 
 @spin_wheel_schema
 class SpinWheelView(APIView):
+    authentication_classes = [PrincipalJWTAuthentication]
+
+    @cached_response(SPIN_WHEEL)
     def get(self, request):
         sectors = SpinWheelSector.objects.select_related("gift").all().order_by("index")
         serializer = SpinWheelSectorSerializer(sectors, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class SpinGameHistoryPagination(KeysetPagination):
+    # индекс spin_game_page_idx (-played_at, -id)
+    ordering = ("-played_at", "-id")
+
+
 @spin_history_schema
 class SpinGameHistoryView(ListAPIView):
     serializer_class = SpinGameHistorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SpinGameHistoryPagination
 
     def get_queryset(self):
-        return (
-            SpinGame.objects
-            .select_related("gift_won")
-            .order_by("-played_at")
-        )
+        return SpinGame.objects.select_related("gift_won")
 
 
 @spin_play_schema
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:00
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('transactions', '0003_alter_transaction_currency_tontransaction_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='tontransaction',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='ton_tx_user_page_idx'),
+        ),
+    ]
@@ -121,6 +121,10 @@ class TONTransaction(models.Model):
         verbose_name = "TON Транзакция"
         verbose_name_plural = "TON Транзакции"
         ordering = ["-created_at"]
+        indexes = [
+            # история транзакций пользователя: keyset по (created_at, id)
+            models.Index(fields=["user", "-created_at", "-id"], name="ton_tx_user_page_idx"),
+        ]
     
     def __str__(self):
         return f"TON транзакция {self.tx_hash[:10]}... ({self.status})"
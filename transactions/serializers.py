@@ -87,4 +87,5 @@ class BalanceResponseSerializer(serializers.Serializer):
 
 class TransactionsListResponseSerializer(serializers.Serializer):
     success = serializers.BooleanField()
-    transactions = TONTransactionSerializer(many=True)
\ No newline at end of file
+    transactions = TONTransactionSerializer(many=True)
+    next = serializers.URLField(allow_null=True)
@@ -3,6 +3,8 @@ import time
 from decimal import Decimal
 from django.conf import settings
 from django.utils import timezone
+from django.db import transaction
+from core.events import Outbox, DEPOSIT_RECEIVED
 from .models import TONWallet, TONTransaction, Transaction
 
 
@@ -114,33 +116,43 @@ class TONService:
                 token = "USDT"
                 amount = Decimal(tx_data.get("amount", 0)) / Decimal("1000000")
             
-            # Создаем запись о TON транзакции
-            ton_tx = TONTransaction.objects.create(
-                user=wallet.user,
-                wallet=wallet,
-                tx_hash=tx_hash,
-                amount=amount,
-                token=token,
-                status="confirmed",
-                sender_address=sender,
-                block_time=timezone.now()
-            )
-            
-            # Создаем запись о транзакции в приложении
-            currency = "TON" if token == "TON" else "USDT"
-            Transaction.objects.create(
-                user=wallet.user,
-                tx_type="deposit",
-                amount=amount,
-                currency=currency,
-                description=f"Пополнение через TON кошелек",
-                ton_transaction=ton_tx
-            )
-            
-            # Обновляем TON баланс пользователя, если поле присутствует
-            if hasattr(wallet.user, 'balance_ton'):
-                wallet.user.balance_ton += amount
-                wallet.user.save(update_fields=["balance_ton"]) 
+            # записи, баланс и событие — одной транзакцией
+            with transaction.atomic():
+                # Создаем запись о TON транзакции
+                ton_tx = TONTransaction.objects.create(
+                    user=wallet.user,
+                    wallet=wallet,
+                    tx_hash=tx_hash,
+                    amount=amount,
+                    token=token,
+                    status="confirmed",
+                    sender_address=sender,
+                    block_time=timezone.now()
+                )
+
+                # Создаем запись о транзакции в приложении
+                currency = "TON" if token == "TON" else "USDT"
+                Transaction.objects.create(
+                    user=wallet.user,
+                    tx_type="deposit",
+                    amount=amount,
+                    currency=currency,
+                    description=f"Пополнение через TON кошелек",
+                    ton_transaction=ton_tx
+                )
+
+                # Обновляем TON баланс пользователя, если поле присутствует
+                if hasattr(wallet.user, 'balance_ton'):
+                    wallet.user.balance_ton += amount
+                    wallet.user.save(update_fields=["balance_ton"])
+
+                Outbox.emit(DEPOSIT_RECEIVED, {
+                    "user_id": wallet.user_id,
+                    "ton_transaction_id": ton_tx.id,
+                    "tx_hash": tx_hash,
+                    "amount": amount,
+                    "currency": currency,
+                })
             
             return True
             
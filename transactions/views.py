@@ -2,6 +2,7 @@ from django.shortcuts import render
 from rest_framework import status, viewsets, mixins, decorators
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
 from django.contrib.auth import get_user_model
 from .ton_service import TONService
 from .models import TONWallet, TONTransaction, Transaction
@@ -15,11 +16,17 @@ from .serializers import (
     DepositAddressSerializer,
 )
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample, OpenApiParameter
+from core.pagination import KeysetPagination
 
 User = get_user_model()
 ton_service = TONService()
 
 
+class TransactionPagination(KeysetPagination):
+    # индекс ton_tx_user_page_idx (user, -created_at, -id)
+    ordering = ("-created_at", "-id")
+
+
 class WalletViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
@@ -120,7 +127,7 @@ class WalletViewSet(viewsets.ViewSet):
         responses={200: TransactionsListResponseSerializer},
         parameters=[
             OpenApiParameter(name="limit", type=int, location=OpenApiParameter.QUERY, required=False, description="Количество элементов на странице (по умолчанию settings.PAGE_SIZE)"),
-            OpenApiParameter(name="offset", type=int, location=OpenApiParameter.QUERY, required=False, description="Смещение для пагинации"),
+            OpenApiParameter(name="cursor", type=str, location=OpenApiParameter.QUERY, required=False, description="Курсор следующей страницы (из поля next)"),
         ],
         examples=[
             OpenApiExample(
@@ -139,7 +146,8 @@ class WalletViewSet(viewsets.ViewSet):
                             "created_at": "2024-01-01T12:00:00Z",
                             "updated_at": "2024-01-01T12:00:00Z"
                         }
-                    ]
+                    ],
+                    "next": "https://example.com/api/transactions/wallets/me/transactions/?cursor=WyIyMDI0LTAxLTAxVDEyOjAwOjAwWiIsIDFd"
                 },
             )
         ],
@@ -149,10 +157,17 @@ class WalletViewSet(viewsets.ViewSet):
     def transactions(self, request):
         """История TON-транзакций текущего пользователя"""
         try:
-            transactions = TONTransaction.objects.filter(user=request.user).order_by('-created_at')
+            paginator = TransactionPagination()
+            transactions = paginator.paginate_queryset(
+                TONTransaction.objects.filter(user=request.user), request, view=self
+            )
             return Response({
                 'success': True,
-                'transactions': TONTransactionSerializer(transactions, many=True).data
+                'transactions': TONTransactionSerializer(transactions, many=True).data,
+                'next': paginator.get_next_link(),
             }, status=status.HTTP_200_OK)
+        except NotFound:
+            # неверный курсор — 404, как у остальных списков с курсором
+            raise
         except Exception as e:
             return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -18,9 +18,27 @@ class JWTAuthentication(BaseAuthentication):
         if payload.get("type") != "access":
             raise AuthenticationFailed("Invalid token type")
 
-        User = get_user_model()
-        user = User.objects.filter(id=payload["user_id"]).first()
+        user = self.get_user(payload["user_id"])
         if not user:
             raise AuthenticationFailed("User not found")
 
         return (user, None)
+
+    def get_user(self, user_id):
+        User = get_user_model()
+        return User.objects.filter(id=user_id).first()
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    """
+    Тот же JWT, но request.user — UserPrincipal из кэша Redis, без запроса в БД.
+    Для эндпоинтов, которым от пользователя нужен только id (кэш ответов).
+    """
+
+    def get_user(self, user_id):
+        from user.services.principal import PrincipalCache
+
+        principal = PrincipalCache.get(user_id)
+        if principal and not principal.is_active:
+            return None
+        return principal
@@ -0,0 +1,77 @@
+import json
+import logging
+from django.conf import settings
+
+
+r = settings.REDIS_CLIENT
+logger = logging.getLogger('user.services.principal')
+
+PRINCIPAL_KEY = "user_principal:{user_id}"
+PRINCIPAL_TTL = 3600
+
+PRINCIPAL_FIELDS = ("id", "username", "avatar_url", "is_active", "is_staff", "has_free_test")
+
+
+class UserPrincipal:
+    """
+    Лёгкий пользователь для websocket-соединений: только то, что нужно комнате,
+    без балансов (их всегда читаем из БД в момент операции).
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, username, avatar_url, is_active, is_staff, has_free_test):
+        self.id = id
+        self.username = username
+        self.avatar_url = avatar_url
+        self.is_active = is_active
+        self.is_staff = is_staff
+        self.has_free_test = has_free_test
+
+    @property
+    def pk(self):
+        return self.id
+
+    def get_avatar_url(self):
+        return self.avatar_url
+
+    def __str__(self):
+        return f"{self.username or self.id}"
+
+
+class PrincipalCache:
+    """
+    Кэш UserPrincipal в Redis. Промах — один запрос в БД по первичному ключу,
+    сброс — сигнал post_save пользователя (user/signals.py).
+    """
+
+    @staticmethod
+    def get(user_id):
+        key = PRINCIPAL_KEY.format(user_id=user_id)
+        raw = r.get(key)
+        if raw:
+            return UserPrincipal(**json.loads(raw))
+
+        from django.contrib.auth import get_user_model
+
+        user = get_user_model().objects.filter(id=user_id).first()
+        if not user:
+            return None
+
+        data = {
+            "id": user.id,
+            "username": user.username,
+            # аватар по умолчанию подставляем сразу, чтобы не держать settings в кэше
+            "avatar_url": user.get_avatar_url(),
+            "is_active": user.is_active,
+            "is_staff": user.is_staff,
+            "has_free_test": user.has_free_test,
+        }
+        r.set(key, json.dumps(data), ex=PRINCIPAL_TTL)
+        return UserPrincipal(**data)
+
+    @staticmethod
+    def invalidate(user_id):
+        r.delete(PRINCIPAL_KEY.format(user_id=user_id))
+        logger.info(f"Кэш пользователя {user_id} сброшен")
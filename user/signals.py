@@ -0,0 +1,11 @@
+# user/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from user.models import User
+from user.services.principal import PrincipalCache
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_principal(sender, instance, **kwargs):
+    PrincipalCache.invalidate(instance.id)